@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import resource
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from .config import CountyConfig
+from .engine import MockEngine, ScrapeEngine, build_engine
+from .metrics import RunMetrics
+from .models import ParcelInput
+from .orchestrator import iter_scrape
+from .standin import StandInOptions, StandInProcess, StandInServer, parcel_taxes, standin_configs, standin_parcels
+
+
+class BenchResult:
+    def __init__(self, engine: str, concurrency: int):
+        self.engine = engine
+        self.concurrency = concurrency
+        self.parcels = 0
+        self.ok = 0
+        self.elapsed_s = 0.0
+        self.p50_s: Optional[float] = None
+        self.p95_s: Optional[float] = None
+        self.peak_rss_mb: Optional[float] = None
+        self.error: Optional[str] = None
+
+    @property
+    def parcels_per_s(self) -> float:
+        return self.parcels / self.elapsed_s if self.elapsed_s else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "engine": self.engine,
+            "concurrency": self.concurrency,
+            "parcels": self.parcels,
+            "ok": self.ok,
+            "elapsed_s": round(self.elapsed_s, 3),
+            "parcels_per_s": round(self.parcels_per_s, 2),
+            "p50_s": self.p50_s,
+            "p95_s": self.p95_s,
+            "peak_rss_mb": self.peak_rss_mb,
+            "error": self.error,
+        }
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 4)
+
+
+def _rss_mb() -> float:
+    # this process plus its children (the browser), when psutil is around; else our own peak RSS
+    try:
+        import psutil
+    except ImportError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    proc = psutil.Process()
+    total = proc.memory_info().rss
+    for child in proc.children(recursive=True):
+        try:
+            total += child.memory_info().rss
+        except psutil.Error:
+            pass
+    return total / (1024 * 1024)
+
+
+def _engine(kind: str, parcels: List[ParcelInput], *, headless: bool, max_contexts: int) -> ScrapeEngine:
+    if kind == "mock":
+        # orchestrator/normalizer overhead with no I/O at all
+        fixtures = {
+            f"{p.county.lower()}::{p.parcel_number}": {"current_year_total_tax": parcel_taxes(p.parcel_number)["total"]} for p in parcels
+        }
+        return MockEngine(fixtures=fixtures)
+    return build_engine(mode="live", kind=kind, headless=headless, max_contexts=max_contexts)
+
+
+async def _bench_one(
+    kind: str,
+    concurrency: int,
+    county_configs: Dict[str, CountyConfig],
+    parcels: List[ParcelInput],
+    *,
+    headless: bool,
+    sample_s: float = 0.25,
+) -> BenchResult:
+    result = BenchResult(kind, concurrency)
+    latencies: List[float] = []
+    metrics = RunMetrics(trace=lambda line: latencies.append(json.loads(line)["fetch_s"]))
+    engine = _engine(kind, parcels, headless=headless, max_contexts=max(concurrency, 1))
+    peak = 0.0
+
+    async def _sample() -> None:
+        nonlocal peak
+        while True:
+            peak = max(peak, _rss_mb())
+            await asyncio.sleep(sample_s)
+
+    sampler = asyncio.create_task(_sample())
+    started = time.perf_counter()
+    try:
+        await engine.start()
+        try:
+            async for rec in iter_scrape(
+                parcels=parcels,
+                county_configs=county_configs,
+                engine=engine,
+                max_concurrency=concurrency,
+                show_progress=False,
+                metrics=metrics,
+            ):
+                result.parcels += 1
+                result.ok += not rec.errors
+        finally:
+            result.elapsed_s = time.perf_counter() - started
+            peak = max(peak, _rss_mb())
+            await engine.stop()
+    except Exception as e:
+        # first line only: Playwright's "browser not installed" message is a whole banner
+        result.error = f"{type(e).__name__}: {(str(e).strip().splitlines() or [''])[0]}"
+        result.elapsed_s = time.perf_counter() - started
+    finally:
+        sampler.cancel()
+    result.p50_s = _percentile(latencies, 0.5)
+    result.p95_s = _percentile(latencies, 0.95)
+    result.peak_rss_mb = round(peak, 1)
+    return result
+
+
+def run_bench(
+    *,
+    engines: List[str],
+    concurrencies: List[int],
+    county_configs: Dict[str, CountyConfig],
+    per_county: int = 50,
+    options: Optional[StandInOptions] = None,
+    headless: bool = True,
+    server_process: bool = True,
+) -> List[BenchResult]:
+    # every engine x concurrency pair runs the same parcels against a fresh stand-in server
+    parcels = standin_parcels(per_county)
+    results: List[BenchResult] = []
+    for kind in engines:
+        for concurrency in concurrencies:
+            with (StandInProcess(options) if server_process else StandInServer(options)) as server:
+                cfgs = standin_configs(server.url, county_configs)
+                results.append(asyncio.run(_bench_one(kind, concurrency, cfgs, parcels, headless=headless)))
+    return results
+
+
+def regressions(results: List[BenchResult], baseline: List[Dict[str, Any]], *, max_drop: float = 0.2) -> List[str]:
+    # throughput drops of more than `max_drop` against a saved --json-out run
+    base = {(b["engine"], b["concurrency"]): b for b in baseline}
+    out: List[str] = []
+    for r in results:
+        b = base.get((r.engine, r.concurrency))
+        if not b or not b.get("parcels_per_s"):
+            continue
+        if r.error:
+            out.append(f"{r.engine} x{r.concurrency}: failed ({r.error})")
+        elif r.parcels_per_s < b["parcels_per_s"] * (1 - max_drop):
+            out.append(f"{r.engine} x{r.concurrency}: {r.parcels_per_s:.1f} parcels/s vs baseline {b['parcels_per_s']:.1f}")
+    return out
@@ -1,12 +1,143 @@
 from __future__ import annotations
 
+from datetime import date
 from typing import Literal, Optional, Dict, Any, List
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
+
+from .normalizer import NORMALIZED_FIELDS
+from .waits import check_waits
 
 
 SearchMode = Literal["parcel_number", "address", "owner_name"]
 
 
+class SessionPolicy(BaseModel):
+    # recycle a warm browser context after this many parcels (it is always recycled on error)
+    max_uses: int = 50
+    # cap on idle warm contexts kept per county; None keeps every healthy one
+    max_idle: Optional[int] = None
+
+
+class ResourcePolicy(BaseModel):
+    # Playwright resource types to abort (image, font, media, stylesheet, ...); None uses the global default
+    block_resources: Optional[List[str]] = None
+    # regexes for URLs to abort regardless of type (analytics, map tiles); None uses the global default
+    block_url_patterns: Optional[List[str]] = None
+    # regexes for URLs that are never blocked, even if they match the above
+    allow_url_patterns: List[str] = Field(default_factory=list)
+
+
+class CountyLimits(BaseModel):
+    # concurrent fetches for this county (None: the run's --max-concurrency); AIMD moves
+    # the live limit between min and max
+    max_concurrency: Optional[int] = None
+    min_concurrency: int = 1
+    initial_concurrency: Optional[int] = None  # default: half of max_concurrency
+    # token-bucket cap on fetch starts; None means no rate cap
+    requests_per_second: Optional[float] = None
+    burst: int = 1
+    # fetches slower than 2x this count as congestion; faster than this ramp the limit up
+    target_latency_s: float = 20.0
+    adaptive: bool = True
+    # dispatch order within each round of the orchestrator's county rotation; higher goes first
+    priority: int = 0
+
+
+class BreakerPolicy(BaseModel):
+    # the orchestrator stops sending this county work after `failures` consecutive timeouts/outages
+    # (0: never), then probes the portal with one parcel after cooldown_s, doubling per failed probe
+    failures: int = 10
+    cooldown_s: float = 30.0
+    max_cooldown_s: float = 600.0
+    # park: queued parcels wait for the portal to recover; fail: they fail fast as site_down
+    on_open: Literal["park", "fail"] = "park"
+    # parked parcels fail fast too once the portal has been down this long; None waits indefinitely
+    give_up_s: Optional[float] = 1800.0
+
+
+def _check_windows(v: List[str]) -> List[str]:
+    for w in v:
+        try:
+            date.fromisoformat(f"2000-{w}")  # leap year, so 02-29 passes
+        except ValueError:
+            raise ValueError(f"refresh window {w!r} is not MM-DD")
+    return v
+
+
+class RefreshRule(BaseModel):
+    # a field is stale once it is older than max_age_days, or once one of `windows` (MM-DD: the day bills
+    # go out, an installment falls due) has passed since it was fetched
+    max_age_days: Optional[float] = None
+    windows: List[str] = Field(default_factory=list)
+    # only apply the rule while the previous value is set (an open delinquency can be paid off any day)
+    when_set: bool = False
+
+    @field_validator("windows")
+    @classmethod
+    def _mm_dd(cls, v: List[str]) -> List[str]:
+        return _check_windows(v)
+
+
+def _default_field_rules() -> Dict[str, RefreshRule]:
+    return {
+        # installments fall due Jan 31 and Jul 31
+        "delinquent_status": RefreshRule(windows=["02-01", "08-01"]),
+        # open delinquencies can be paid off (and accrue interest) any week
+        "delinquent_amount": RefreshRule(max_age_days=6, when_set=True),
+        "penalties_interest": RefreshRule(max_age_days=6, when_set=True),
+    }
+
+
+class RefreshPolicy(BaseModel):
+    # incremental runs (--previous): a parcel is re-fetched when its last good record is older than
+    # max_age_days, a window has passed since, or any of the per-field rules says a field is stale.
+    # The defaults follow the WI tax calendar (bills go out in December); a county's `refresh` block
+    # only needs the keys where it differs, and its `fields` replace the default ones.
+    max_age_days: Optional[float] = 91
+    windows: List[str] = Field(default_factory=lambda: ["12-15"])
+    fields: Dict[str, RefreshRule] = Field(default_factory=_default_field_rules)
+
+    @field_validator("windows")
+    @classmethod
+    def _mm_dd(cls, v: List[str]) -> List[str]:
+        return _check_windows(v)
+
+    @field_validator("fields")
+    @classmethod
+    def _known_fields(cls, v: Dict[str, RefreshRule]) -> Dict[str, RefreshRule]:
+        for name in v:
+            if name not in NORMALIZED_FIELDS:
+                raise ValueError(f"unknown normalized field {name!r} in refresh rules (expected one of {', '.join(NORMALIZED_FIELDS)})")
+        return v
+
+
+class HttpStep(BaseModel):
+    # url/params/form/body values are str.format templates over base_url, parcel_number, owner_name, property_address
+    method: Optional[str] = None  # default: POST when the step sends a form, else GET
+    url: Optional[str] = None  # relative to the previous response; default base_url
+    params: Dict[str, Any] = Field(default_factory=dict)
+    form: Dict[str, Any] = Field(default_factory=dict)
+    body: Optional[Any] = None  # JSON request body
+    headers: Dict[str, str] = Field(default_factory=dict)
+    # resend the previous page's form inputs (ASP.NET __VIEWSTATE, __EVENTVALIDATION, ...)
+    replay_form: bool = False
+    form_selector: str = "form"
+    # follow a link from the previous page ({css|xpath, attr}); postback_from turns a
+    # javascript:__doPostBack('target','arg') href into __EVENTTARGET/__EVENTARGUMENT
+    url_from: Optional[Dict[str, str]] = None
+    postback_from: Optional[Dict[str, str]] = None
+
+
+class HttpRecipe(BaseModel):
+    steps: List[HttpStep]
+    # field -> css / xpath / jsonpath rule, applied to the last response
+    extract: Dict[str, Any] = Field(default_factory=dict)
+    format: Literal["html", "json"] = "html"
+    # the recipe counts as failed (browser fallback) when any of these come back empty;
+    # with none listed, only an all-empty extraction fails
+    required: List[str] = Field(default_factory=list)
+
+
 class CountyConfig(BaseModel):
     county: str
     platform: str  # e.g., Ascent, GCS, LandNav
@@ -18,8 +149,46 @@ class CountyConfig(BaseModel):
     # selectors / actions are intentionally high-level so they can be tweaked without code changes
     selectors: Dict[str, Any] = Field(default_factory=dict)
 
-    # mapping from page fields -> normalized keys
+    # reuse of post-setup browser contexts across parcels
+    session: SessionPolicy = Field(default_factory=SessionPolicy)
+
+    # per-county concurrency / request-rate budget enforced by the orchestrator
+    limits: CountyLimits = Field(default_factory=CountyLimits)
+
+    # circuit breaker for outages (see BreakerPolicy)
+    breaker: BreakerPolicy = Field(default_factory=BreakerPolicy)
+
+    # browser-free request recipe used by the http / hybrid engines
+    http: Optional[HttpRecipe] = None
+
+    # request interception applied to every browser context for this county
+    resources: ResourcePolicy = Field(default_factory=ResourcePolicy)
+
+    # when incremental runs re-fetch this county's parcels
+    refresh: RefreshPolicy = Field(default_factory=RefreshPolicy)
+
+    # mapping from page fields -> normalized keys, tried before the normalizer's built-in aliases
     field_mapping: Dict[str, str] = Field(default_factory=dict)
 
     # optional notes for maintainers
     notes: Optional[str] = None
+
+    @field_validator("selectors")
+    @classmethod
+    def _check_selectors(cls, v: Dict[str, Any]) -> Dict[str, Any]:
+        if "waits" in v:
+            check_waits(v["waits"])
+        if v.get("extract"):
+            # the browser runs extract rules as one compiled plan; a rule it can't run fails here, not per parcel
+            from .extraction import compile_rules
+
+            compile_rules(v["extract"])
+        return v
+
+    @field_validator("field_mapping")
+    @classmethod
+    def _known_targets(cls, v: Dict[str, str]) -> Dict[str, str]:
+        for page_field, target in v.items():
+            if target not in NORMALIZED_FIELDS:
+                raise ValueError(f"unknown normalized field {target!r} for {page_field!r} (expected one of {', '.join(NORMALIZED_FIELDS)})")
+        return v
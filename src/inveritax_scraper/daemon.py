@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import queue
+import signal
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from pydantic import ValidationError
+
+from .config import CountyConfig
+from .engine import ScrapeEngine
+from .failures import RetryPolicy
+from .metrics import RunMetrics, prometheus_text
+from .models import NormalizedTaxRecord, ParcelInput
+from .orchestrator import iter_scrape
+from .throttle import CircuitBreaker, CountyThrottle
+
+
+class ScrapeDaemon:
+    # one started engine (warm browser contexts, HTTP pool), the county registry and the per-county
+    # budgets, shared by every job for the life of the process
+    def __init__(
+        self,
+        *,
+        engine: ScrapeEngine,
+        county_configs: Dict[str, CountyConfig],
+        max_concurrency: int = 5,
+        retry: Optional[RetryPolicy] = None,
+    ):
+        self.engine = engine
+        self.county_configs = county_configs
+        self.max_concurrency = max_concurrency
+        self.retry = retry
+        self.metrics = RunMetrics(gauges=engine.stats)
+        self.throttles: Dict[str, CountyThrottle] = {}
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.jobs = 0
+        self.parcels = 0
+        self.started_at = time.time()
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def start(self) -> None:
+        await self.engine.start()
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+
+    async def stop(self) -> None:
+        await self.engine.stop()
+
+    async def run_job(self, parcels: List[ParcelInput], emit: Callable[[NormalizedTaxRecord], None]) -> None:
+        self.jobs += 1
+        async for rec in iter_scrape(
+            parcels=parcels,
+            county_configs=self.county_configs,
+            engine=self.engine,
+            max_concurrency=self.max_concurrency,
+            show_progress=False,
+            metrics=self.metrics,
+            retry=self.retry,
+            throttles=self.throttles,
+            breakers=self.breakers,
+            slots=self._slots,
+        ):
+            self.parcels += 1
+            emit(rec)
+
+    def health(self) -> Dict[str, Any]:
+        return {
+            "ok": True,
+            "counties": sorted(self.county_configs),
+            "jobs": self.jobs,
+            "parcels": self.parcels,
+            "uptime_s": round(time.time() - self.started_at, 1),
+            "engine": self.engine.stats(),
+            # counties whose portal is being probed instead of fetched
+            "circuits_open": sorted(k for k, b in self.breakers.items() if b.state != b.CLOSED),
+        }
+
+
+def parse_job(body: bytes) -> List[ParcelInput]:
+    # {"parcels": [{"county": ..., "parcel_number": ...}, ...]} or just the list
+    payload = json.loads(body or b"null")
+    items = payload.get("parcels") if isinstance(payload, dict) else payload
+    if not isinstance(items, list) or not items:
+        raise ValueError("expected a non-empty list of parcels")
+    return [ParcelInput.model_validate(item) for item in items]
+
+
+def _handler(daemon: ScrapeDaemon, loop: asyncio.AbstractEventLoop) -> type:
+    class _Handler(BaseHTTPRequestHandler):
+        # HTTP/1.1 for chunked responses: records are streamed as the parcels finish
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, status: int, body: bytes, content_type: str = "application/json") -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _chunk(self, data: bytes) -> None:
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+
+        def do_GET(self) -> None:  # noqa: N802
+            path = self.path.split("?")[0]
+            if path == "/health":
+                self._send(200, json.dumps(daemon.health()).encode())
+            elif path == "/metrics":
+                self._send(200, prometheus_text(daemon.metrics).encode(), "text/plain; version=0.0.4")
+            else:
+                self._send(404, b'{"error": "not found"}')
+
+        def do_POST(self) -> None:  # noqa: N802
+            if self.path.split("?")[0] != "/scrape":
+                self._send(404, b'{"error": "not found"}')
+                return
+            try:
+                parcels = parse_job(self.rfile.read(int(self.headers.get("Content-Length") or 0)))
+            except (ValueError, ValidationError) as e:
+                self._send(400, json.dumps({"error": str(e)}).encode())
+                return
+
+            records: "queue.Queue[Optional[NormalizedTaxRecord]]" = queue.Queue()
+            job = asyncio.run_coroutine_threadsafe(daemon.run_job(parcels, records.put), loop)
+            job.add_done_callback(lambda _: records.put(None))
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            try:
+                while True:
+                    rec = records.get()
+                    if rec is None:
+                        break
+                    self._chunk(rec.model_dump_json().encode() + b"\n")
+                    self.wfile.flush()
+                if not job.cancelled() and job.exception():
+                    self._chunk(json.dumps({"error": f"job failed: {job.exception()}"}).encode() + b"\n")
+                self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                # the client went away: stop fetching for it
+                job.cancel()
+
+        def log_message(self, *args: Any) -> None:
+            return None
+
+    return _Handler
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+async def serve_daemon(
+    daemon: ScrapeDaemon,
+    *,
+    host: str = "127.0.0.1",
+    port: int = 8787,
+    socket_path: Optional[Path] = None,
+    ready: Optional[Callable[[str], None]] = None,
+    stop: Optional[asyncio.Event] = None,
+) -> None:
+    # serves until `stop` is set, SIGTERM, or the task is cancelled; HTTP handler threads hand jobs to this loop
+    await daemon.start()
+    loop = asyncio.get_running_loop()
+    stop = stop or asyncio.Event()
+    try:
+        loop.add_signal_handler(signal.SIGTERM, stop.set)
+        on_sigterm = True
+    except (NotImplementedError, RuntimeError, ValueError):
+        on_sigterm = False  # Windows, or not the main thread
+    handler = _handler(daemon, loop)
+    server: socketserver.BaseServer
+    if socket_path:
+        if socket_path.exists():
+            socket_path.unlink()
+        server = _UnixHTTPServer(str(socket_path), handler)
+        os.chmod(socket_path, 0o600)
+        where = f"unix:{socket_path}"
+    else:
+        server = ThreadingHTTPServer((host, port), handler)
+        where = f"http://{host}:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        if ready:
+            ready(where)
+        await stop.wait()
+    finally:
+        if on_sigterm:
+            loop.remove_signal_handler(signal.SIGTERM)
+        server.shutdown()
+        server.server_close()
+        if socket_path and socket_path.exists():
+            socket_path.unlink()
+        await daemon.stop()
@@ -1,17 +1,45 @@
 from __future__ import annotations
 
+import json
 from abc import ABC, abstractmethod
-from typing import Optional, Dict, Any
+from pathlib import Path
+from typing import Optional, Dict, Any, List
 
+from .failures import NOT_FOUND
+from .metrics import Span
 from .models import ParcelInput
 
 
 class ScrapeResult:
-    def __init__(self, ok: bool, data: Optional[Dict[str, Any]] = None, source_url: Optional[str] = None, error: Optional[str] = None):
+    def __init__(
+        self,
+        ok: bool,
+        data: Optional[Dict[str, Any]] = None,
+        source_url: Optional[str] = None,
+        error: Optional[str] = None,
+        timings: Optional[Dict[str, float]] = None,
+        spans: Optional[List[Span]] = None,
+        failure: Optional[str] = None,
+        step: Optional[str] = None,
+        snapshot: Optional[str] = None,
+        snapshot_source: Optional[str] = None,
+    ):
         self.ok = ok
         self.data = data or {}
         self.source_url = source_url
         self.error = error
+        # seconds spent per workflow wait point (engines that don't measure leave this empty)
+        self.timings = timings or {}
+        # (step, perf_counter start, seconds) per workflow step, in order
+        self.spans = spans or []
+        # failed results: the failure class (see failures.py; the orchestrator classifies `error` when
+        # an engine leaves this unset) and the workflow step that failed
+        self.failure = failure
+        self.step = step
+        # the document `data` was extracted from, when the engine was asked to keep it (see snapshots.py),
+        # and which extract rules ran on it: "browser" (selectors.extract) or "http" (http.extract)
+        self.snapshot = snapshot
+        self.snapshot_source = snapshot_source
 
 
 class ScrapeEngine(ABC):
@@ -26,3 +54,74 @@ class ScrapeEngine(ABC):
     @abstractmethod
     async def fetch(self, *, base_url: str, cfg: Dict[str, Any], parcel: ParcelInput) -> ScrapeResult:
         ...
+
+    def batch_size(self, cfg: Dict[str, Any]) -> int:
+        # parcels per fetch_batch call for this county; 0 means the orchestrator fetches one at a time
+        return 0
+
+    async def fetch_batch(self, *, base_url: str, cfg: Dict[str, Any], parcels: List[ParcelInput]) -> List[ScrapeResult]:
+        # one result per parcel, in order; engines that can work through a batch on one page override this
+        return [await self.fetch(base_url=base_url, cfg=cfg, parcel=p) for p in parcels]
+
+    def stats(self) -> Dict[str, float]:
+        # resource gauges (browser memory, open contexts, recycles) for metrics and /health
+        return {}
+
+
+class MockEngine(ScrapeEngine):
+    def __init__(self, *, fixtures: Dict[str, Dict[str, Any]]):
+        self.fixtures = fixtures
+
+    async def start(self) -> None:
+        return None
+
+    async def stop(self) -> None:
+        return None
+
+    async def fetch(self, *, base_url: str, cfg: Dict[str, Any], parcel: ParcelInput) -> ScrapeResult:
+        key = f"{parcel.county.lower()}::{parcel.parcel_number}"
+        if key not in self.fixtures:
+            return ScrapeResult(False, error=f"No fixture for {key}", failure=NOT_FOUND)
+        data = self.fixtures[key]
+        return ScrapeResult(True, data=data, source_url=base_url)
+
+
+def build_engine(
+    *,
+    mode: str = "live",
+    kind: str = "hybrid",
+    headless: bool = True,
+    max_contexts: int = 100,
+    fixtures_path: Optional[Path] = None,
+    snapshots: bool = False,
+    recycle_pages: Optional[int] = 5000,
+    memory_ceiling_mb: Optional[float] = None,
+    min_free_mb: Optional[float] = 512,
+    adaptive_timeouts: bool = True,
+) -> ScrapeEngine:
+    # concrete engines are imported here so callers only load what they actually run
+    if mode == "mock":
+        if not fixtures_path or not fixtures_path.exists():
+            raise ValueError("mock mode requires --fixtures pointing to a fixtures json file")
+        return MockEngine(fixtures=json.loads(fixtures_path.read_text()))
+
+    from .engines_http import HttpEngine, HybridEngine
+    from .engines_playwright import AsyncPlaywrightEngine
+
+    # snapshots: results carry the document their data came from, for SnapshotStore
+    if kind == "http":
+        return HttpEngine(snapshots=snapshots)
+    browser = AsyncPlaywrightEngine(
+        headless=headless,
+        max_contexts=max_contexts,
+        snapshots=snapshots,
+        recycle_pages=recycle_pages,
+        memory_ceiling_mb=memory_ceiling_mb,
+        min_free_mb=min_free_mb,
+        adaptive_timeouts=adaptive_timeouts,
+    )
+    if kind == "browser":
+        return browser
+    if kind == "hybrid":
+        return HybridEngine(http=HttpEngine(snapshots=snapshots), browser=browser)
+    raise ValueError("--engine must be one of: hybrid, browser, http")
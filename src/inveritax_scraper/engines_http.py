@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import asyncio
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from .engine import ScrapeEngine, ScrapeResult
+from .extraction import extract_html, extract_json, form_fields, missing_fields, postback_target
+from .failures import classify_exception
+from .metrics import Spans
+from .models import ParcelInput
+
+
+USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+
+class _SharedTransport(httpx.AsyncBaseTransport):
+    # lets short-lived per-parcel clients (own cookie jar) share the engine's connection pool
+    def __init__(self, inner: httpx.AsyncBaseTransport):
+        self.inner = inner
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self.inner.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        return None
+
+
+def _fill(value: Any, values: Dict[str, str]) -> Any:
+    if isinstance(value, str):
+        return value.format_map(values)
+    if isinstance(value, dict):
+        return {k: _fill(v, values) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_fill(v, values) for v in value]
+    return value
+
+
+class HttpEngine(ScrapeEngine):
+    def __init__(self, *, timeout_s: float = 30.0, max_connections: int = 100, max_keepalive: int = 20, snapshots: bool = False):
+        self.timeout_s = timeout_s
+        # keep the final response on each result (see snapshots.py)
+        self.snapshots = snapshots
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive)
+        self._transport: Optional[httpx.AsyncHTTPTransport] = None
+
+    async def start(self) -> None:
+        self._transport = httpx.AsyncHTTPTransport(limits=self.limits, retries=1)
+
+    async def stop(self) -> None:
+        if self._transport:
+            await self._transport.aclose()
+            self._transport = None
+
+    async def fetch(self, *, base_url: str, cfg: Dict[str, Any], parcel: ParcelInput) -> ScrapeResult:
+        if not self._transport:
+            return ScrapeResult(False, error="HttpEngine not started")
+        recipe = cfg.get("http")
+        if not recipe:
+            return ScrapeResult(False, error=f"No http recipe for {parcel.county}")
+
+        values = {
+            "base_url": base_url,
+            "parcel_number": parcel.parcel_number,
+            "owner_name": parcel.owner_name or "",
+            "property_address": parcel.property_address or "",
+        }
+        response: Optional[httpx.Response] = None
+        spans = Spans()
+        try:
+            async with httpx.AsyncClient(
+                transport=_SharedTransport(self._transport),
+                timeout=self.timeout_s,
+                follow_redirects=True,
+                headers={"User-Agent": USER_AGENT},
+            ) as client:
+                for i, step in enumerate(recipe.get("steps", [])):
+                    with spans.step(f"http_step_{i}"):
+                        response = await self._run_step(client, step, values, base_url, response)
+        except Exception as e:
+            # besides HTTP errors: url_from/postback_from selectors lxml can't parse (XPathEvalError,
+            # SelectorSyntaxError), which must fail the recipe so the hybrid engine falls back
+            failed = spans.take()
+            return ScrapeResult(
+                False,
+                error=f"http recipe failed: {e}",
+                source_url=str(response.url) if response else base_url,
+                spans=failed,
+                failure=classify_exception(e),
+                step=failed[-1][0] if failed else None,
+            )
+
+        if response is None:
+            return ScrapeResult(False, error="http recipe has no steps", source_url=base_url)
+
+        rules = recipe.get("extract", {})
+        snapshot = response.text if self.snapshots else None
+        try:
+            with spans.step("extract"):
+                if recipe.get("format") == "json":
+                    data = extract_json(response.json(), rules)
+                else:
+                    data = extract_html(response.text, rules)
+        except Exception as e:
+            # a recipe that no longer fits the page (HTML where JSON was expected, a broken XPath) fails
+            # like any other recipe failure, so the hybrid engine falls back to the browser
+            return ScrapeResult(
+                False,
+                error=f"http recipe extract failed: {e}",
+                source_url=str(response.url),
+                spans=spans.take(),
+                failure=classify_exception(e),
+                step="extract",
+                snapshot=snapshot,
+                snapshot_source="http",
+            )
+
+        missing = missing_fields(data, recipe.get("required", []))
+        if missing:
+            return ScrapeResult(
+                False,
+                data=data,
+                error=f"http recipe missing fields: {', '.join(missing)}",
+                source_url=str(response.url),
+                spans=spans.take(),
+                snapshot=snapshot,
+                snapshot_source="http",
+            )
+        return ScrapeResult(True, data=data, source_url=str(response.url), spans=spans.take(), snapshot=snapshot, snapshot_source="http")
+
+    async def _run_step(
+        self,
+        client: httpx.AsyncClient,
+        step: Dict[str, Any],
+        values: Dict[str, str],
+        base_url: str,
+        prev: Optional[httpx.Response],
+    ) -> httpx.Response:
+        origin = prev.url if prev is not None else httpx.URL(base_url)
+        url = origin.join(_fill(step.get("url") or "{base_url}", values))
+        form: Dict[str, Any] = {}
+
+        if prev is not None and step.get("replay_form"):
+            form.update(form_fields(prev.text, step.get("form_selector") or "form"))
+
+        link_rule = step.get("url_from") or step.get("postback_from")
+        if link_rule:
+            if prev is None:
+                raise ValueError("url_from/postback_from needs a previous step")
+            href = extract_html(prev.text, {"href": {"attr": "href", **link_rule}})["href"]
+            if not href:
+                raise ValueError(f"link not found: {link_rule}")
+            if step.get("postback_from"):
+                target = postback_target(href)
+                if not target:
+                    raise ValueError(f"not a __doPostBack link: {href}")
+                form.update(target)
+            else:
+                url = prev.url.join(href)
+
+        form.update(_fill(step.get("form") or {}, values))
+        response = await client.request(
+            (step.get("method") or ("POST" if form else "GET")).upper(),
+            url,
+            params=_fill(step.get("params") or {}, values) or None,
+            data=form or None,
+            json=_fill(step.get("body"), values),
+            headers=step.get("headers") or None,
+        )
+        response.raise_for_status()
+        return response
+
+
+class HybridEngine(ScrapeEngine):
+    # HTTP recipe first for counties that declare one, browser fallback when the recipe fails
+    def __init__(self, *, http: HttpEngine, browser: ScrapeEngine, max_http_failures: int = 20):
+        self.http = http
+        self.browser = browser
+        # after this many consecutive recipe failures a county goes straight to the browser
+        self.max_http_failures = max_http_failures
+        self._http_failures: Dict[str, int] = defaultdict(int)
+        self._browser_started = False
+        self._browser_lock = asyncio.Lock()
+        self.http_ok = 0
+        self.fallbacks = 0
+
+    async def start(self) -> None:
+        await self.http.start()
+
+    async def stop(self) -> None:
+        await self.http.stop()
+        if self._browser_started:
+            await self.browser.stop()
+            self._browser_started = False
+
+    async def fetch(self, *, base_url: str, cfg: Dict[str, Any], parcel: ParcelInput) -> ScrapeResult:
+        county = parcel.county.lower()
+        if cfg.get("http") and self._http_failures[county] < self.max_http_failures:
+            res = await self.http.fetch(base_url=base_url, cfg=cfg, parcel=parcel)
+            if res.ok:
+                self._http_failures[county] = 0
+                self.http_ok += 1
+                return res
+            self._http_failures[county] += 1
+            self.fallbacks += 1
+            await self._ensure_browser()
+            fallback = await self.browser.fetch(base_url=base_url, cfg=cfg, parcel=parcel)
+            # keep the failed recipe's steps so the trace shows what the fallback cost
+            fallback.spans = res.spans + fallback.spans
+            return fallback
+
+        await self._ensure_browser()
+        return await self.browser.fetch(base_url=base_url, cfg=cfg, parcel=parcel)
+
+    def batch_size(self, cfg: Dict[str, Any]) -> int:
+        # recipe counties go parcel by parcel so HTTP requests run concurrently; the browser
+        # decides for the rest
+        if cfg.get("http") and self._http_failures[cfg.get("county", "").lower()] < self.max_http_failures:
+            return 0
+        return self.browser.batch_size(cfg)
+
+    async def fetch_batch(self, *, base_url: str, cfg: Dict[str, Any], parcels: List[ParcelInput]) -> List[ScrapeResult]:
+        results: List[Optional[ScrapeResult]] = [None] * len(parcels)
+        county = parcels[0].county.lower() if parcels else ""
+        if cfg.get("http"):
+            for i, parcel in enumerate(parcels):
+                if self._http_failures[county] >= self.max_http_failures:
+                    break
+                res = await self.http.fetch(base_url=base_url, cfg=cfg, parcel=parcel)
+                if res.ok:
+                    self._http_failures[county] = 0
+                    self.http_ok += 1
+                    results[i] = res
+                else:
+                    self._http_failures[county] += 1
+                    self.fallbacks += 1
+
+        # whatever the recipe could not answer goes through the browser as one batch
+        todo = [i for i, r in enumerate(results) if r is None]
+        if todo:
+            await self._ensure_browser()
+            fetched = await self.browser.fetch_batch(base_url=base_url, cfg=cfg, parcels=[parcels[i] for i in todo])
+            for i, res in zip(todo, fetched):
+                results[i] = res
+        return results  # type: ignore[return-value]
+
+    def stats(self) -> Dict[str, float]:
+        return {**self.browser.stats(), "http_ok_total": self.http_ok, "http_fallbacks_total": self.fallbacks}
+
+    async def _ensure_browser(self) -> None:
+        # the browser only launches once some county actually needs it
+        async with self._browser_lock:
+            if not self._browser_started:
+                await self.browser.start()
+                self._browser_started = True
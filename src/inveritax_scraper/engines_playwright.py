@@ -1,247 +1,675 @@
 from __future__ import annotations
 
 import asyncio
-from typing import Dict, Any, Optional
-from tenacity import retry, stop_after_attempt, wait_exponential
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Set, Tuple
 
-from playwright.sync_api import sync_playwright, Browser, Page
+from playwright.async_api import async_playwright, Browser, Page, Playwright
 
-from .engine import ScrapeEngine, ScrapeResult
+# MockEngine moved to engine.py (no Playwright import for mock runs); still importable from here
+from .engine import MockEngine, ScrapeEngine, ScrapeResult
+from .extraction import EXTRACT_JS, compile_rules
+from .failures import ERROR, NOT_FOUND, SITE_DOWN, TRANSIENT, classify_exception
+from .memory import MemoryGovernor, children_rss_mb, host_available_mb
 from .models import ParcelInput
+from .resources import ResourceBlocker
+from .session_pool import BrowserSession, SessionPool
+from .throttle import AdjustableLimiter
+from .timeouts import StepLatencies
+from .waits import Waiter
 
+logger = logging.getLogger(__name__)
 
-class PlaywrightEngine(ScrapeEngine):
-    def __init__(self, *, headless: bool = True, slow_mo_ms: int = 0, timeout_ms: int = 30000):
+# detail page URLs kept for retries; a parcel that is never retried (retries off or used up) ages out
+MAX_RESUME_URLS = 1000
+
+# after a failed relaunch the next attempt waits 1 s, doubling up to this
+MAX_RELAUNCH_BACKOFF_S = 60.0
+
+COMMON_POPUP_SELECTORS = [
+    'button:has-text("I Accept")',
+    'button:has-text("I understand")',
+    'button:has-text("Accept")',
+    'button:has-text("OK")',
+    'button:has-text("Guest")',
+    'a:has-text("Guest")',
+    'button:has-text("Continue as Guest")',
+    'a:has-text("Previous Page")',
+    '#btnAccept',
+    '#btnOk'
+]
+
+# steps that run on the parcel's detail page; a transient failure here can resume from that page
+DETAIL_STEPS = ("detail_tab", "taxes", "extract")
+
+CONTEXT_OPTIONS: Dict[str, Any] = {
+    "viewport": {'width': 1920, 'height': 1080},
+    "user_agent": 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+}
+
+
+class AsyncPlaywrightEngine(ScrapeEngine):
+    def __init__(
+        self,
+        *,
+        headless: bool = True,
+        slow_mo_ms: int = 0,
+        timeout_ms: int = 30000,
+        max_contexts: int = 100,
+        snapshots: bool = False,
+        recycle_pages: Optional[int] = 5000,
+        memory_ceiling_mb: Optional[float] = None,
+        min_free_mb: Optional[float] = 512,
+        sample_s: float = 5.0,
+        adaptive_timeouts: bool = True,
+    ):
         self.headless = headless
         self.slow_mo_ms = slow_mo_ms
         self.timeout_ms = timeout_ms
-        self._pw = None
+        # each in-flight fetch owns one browser context; this is the real concurrency limit
+        self.max_contexts = max_contexts
+        # keep the detail page DOM on each result (see snapshots.py)
+        self.snapshots = snapshots
+        # browser restarts after recycle_pages fetches or past memory_ceiling_mb, and fewer contexts
+        # while the host has less than min_free_mb available; memory is sampled every sample_s
+        self.governor = MemoryGovernor(max_contexts=max_contexts, recycle_pages=recycle_pages, ceiling_mb=memory_ceiling_mb, min_free_mb=min_free_mb)
+        self.sample_s = sample_s
+        # timeouts sized from each county's recent step latencies instead of the fixed ones (timeouts.py)
+        self.adaptive_timeouts = adaptive_timeouts
+        self._latencies: Dict[str, StepLatencies] = {}
+        self._pw: Optional[Playwright] = None
         self._browser: Optional[Browser] = None
+        self._contexts: Optional[AdjustableLimiter] = None
+        self._pool: Optional[SessionPool] = None
+        # (county, parcel number) -> detail page URL reached before a transient failure
+        self._resume: OrderedDict[Tuple[str, str], str] = OrderedDict()
+        # fetches in flight; a recycle holds new ones at the gate until these drain
+        self._gate = asyncio.Condition()
+        self._in_flight = 0
+        self._recycling = False
+        self._down: Optional[str] = None
+        self._relaunch_backoff = 1.0
+        self._relaunch_at = 0.0
+        self._relaunch_failures = 0
+        self._tasks: Set[asyncio.Task] = set()
+        self._created = 0
 
     async def start(self) -> None:
-        def _start():
-            self._pw = sync_playwright().start()
-            self._browser = self._pw.firefox.launch(headless=self.headless, slow_mo=self.slow_mo_ms)
-        await asyncio.to_thread(_start)
+        self._pw = await async_playwright().start()
+        self._contexts = AdjustableLimiter(self.max_contexts)
+        await self._launch()
+        self._spawn(self._monitor())
+
+    async def _launch(self) -> None:
+        self._browser = await self._pw.firefox.launch(headless=self.headless, slow_mo=self.slow_mo_ms)
+        # a browser that dies under us is replaced like a recycled one; our own close() unsets _browser first
+        self._browser.on("disconnected", lambda _: self._request_recycle("crash"))
+        # idle warm contexts count against --max-contexts too
+        self._pool = SessionPool(
+            self._browser, setup=self._setup_session, context_options=CONTEXT_OPTIONS, max_open=lambda: self._contexts.limit
+        )
+
+    async def _close_browser(self) -> None:
+        if self._pool:
+            self._created += self._pool.created
+            await self._pool.close()
+            self._pool = None
+        browser, self._browser = self._browser, None
+        if browser:
+            try:
+                await browser.close()
+            except Exception:
+                pass  # already gone (crashed, or killed for memory)
 
     async def stop(self) -> None:
-        def _stop():
-            if self._browser:
-                self._browser.close()
-            if self._pw:
-                self._pw.stop()
-        await asyncio.to_thread(_stop)
-
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=0.75, min=1, max=8))
+        for task in list(self._tasks):
+            task.cancel()
+        await self._close_browser()
+        self._resume.clear()
+        if self._pw:
+            await self._pw.stop()
+            self._pw = None
+
+    def _spawn(self, coro: Any) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _enter(self) -> None:
+        # a browser that failed to relaunch is retried by the next fetch once its backoff is up
+        self._request_recycle(None)
+        async with self._gate:
+            await self._gate.wait_for(lambda: not self._recycling)
+            self._in_flight += 1
+
+    async def _leave(self, pages: int = 1) -> None:
+        async with self._gate:
+            self._in_flight -= 1
+            self._gate.notify_all()
+        self.governor.page_done(pages)
+        self._request_recycle(self.governor.recycle_reason())
+
+    def _request_recycle(self, reason: Optional[str]) -> None:
+        if self._recycling:
+            return
+        if self._browser is not None and reason:
+            self._recycling = True
+            self._spawn(self._recycle(reason))
+        elif self._down and self._browser is None and time.monotonic() >= self._relaunch_at:
+            self._recycling = True
+            self._spawn(self._recycle(None))
+
+    async def _recycle(self, reason: Optional[str]) -> None:
+        # a fresh browser process gives back everything the old one accumulated (leaked pages, JS heaps,
+        # caches). New fetches wait at the gate; in-flight ones finish on the old browser first.
+        # reason None retries a relaunch that failed.
+        try:
+            async with self._gate:
+                await self._gate.wait_for(lambda: self._in_flight == 0)
+            await self._close_browser()
+            if reason:
+                self.governor.recycled(reason)
+            try:
+                await self._launch()
+                self._down = None
+                self._relaunch_backoff = 1.0
+            except Exception as e:
+                self._down = f"browser relaunch failed: {e}"
+                self._relaunch_failures += 1
+                self._relaunch_at = time.monotonic() + self._relaunch_backoff
+                logger.warning("%s; retrying in %gs", self._down, self._relaunch_backoff)
+                self._relaunch_backoff = min(MAX_RELAUNCH_BACKOFF_S, self._relaunch_backoff * 2)
+        finally:
+            async with self._gate:
+                self._recycling = False
+                self._gate.notify_all()
+
+    async def _monitor(self) -> None:
+        while True:
+            await asyncio.sleep(self.sample_s)
+            try:
+                # psutil / /proc walks are blocking; keep them off the event loop
+                rss, free = await asyncio.gather(asyncio.to_thread(children_rss_mb), asyncio.to_thread(host_available_mb))
+                self.governor.observe(rss, free)
+                limit = self.governor.context_limit(self._contexts.limit)
+                if limit != self._contexts.limit:
+                    await self._contexts.set_limit(limit)
+                if self.governor.under_pressure and self._pool:
+                    # warm contexts are a cache; give their memory back before anything else
+                    await self._pool.close_idle()
+            except Exception as e:
+                # one bad sample must not stop memory control (or relaunch retries) for the rest of the run
+                logger.warning("browser memory sample failed: %s", e)
+            self._request_recycle(self.governor.recycle_reason())
+
+    def stats(self) -> Dict[str, float]:
+        out = self.governor.stats()
+        out["in_flight"] = self._in_flight
+        out["browser_down"] = int(self._down is not None)
+        out["relaunch_failures_total"] = self._relaunch_failures
+        if self._contexts:
+            out["context_limit"] = self._contexts.limit
+        out["contexts_created_total"] = self._created + (self._pool.created if self._pool else 0)
+        if self._pool:
+            out["open_contexts"] = self._pool.open
+            out["idle_contexts"] = self._pool.idle_count
+        return out
+
+    def _not_running(self) -> Optional[ScrapeResult]:
+        if self._pool and self._contexts:
+            return None
+        if self._down:
+            # the browser is being relaunched: worth a retry, and the county breakers see an outage
+            return ScrapeResult(False, error=self._down, failure=TRANSIENT, step="setup")
+        return ScrapeResult(False, error="AsyncPlaywrightEngine not started", failure=ERROR)
+
     async def fetch(self, *, base_url: str, cfg: Dict[str, Any], parcel: ParcelInput) -> ScrapeResult:
-        def _fetch_sync():
-            if not self._browser:
-                return ScrapeResult(False, error="PlaywrightEngine not started")
-
-            # Create a new context for each request to avoid state issues
-            context = self._browser.new_context(
-                viewport={'width': 1920, 'height': 1080},
-                user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-            )
-            page: Page = context.new_page()
+        # no retries in here: failed results carry a failure class and the orchestrator re-queues
+        # transient ones at the end of the run
+        await self._enter()
+        try:
+            started = time.perf_counter()
+            result = await self._fetch(base_url=base_url, cfg=cfg, parcel=parcel)
+            self._learn(cfg, [result], time.perf_counter() - started)
+            return result
+        finally:
+            await self._leave()
+
+    def _latency(self, county: str) -> StepLatencies:
+        key = county.lower()
+        if key not in self._latencies:
+            self._latencies[key] = StepLatencies()
+        return self._latencies[key]
+
+    def _learn(self, cfg: Dict[str, Any], results: List[ScrapeResult], fetch_s: float) -> None:
+        # outages fail in milliseconds and would shrink every timeout, so they are left out. Timeouts are
+        # kept: a portal that slows down pushes its p95 up, so its learned timeouts grow back toward the
+        # fixed ones. They never go past them; learning only ever shortens a timeout.
+        if not self.adaptive_timeouts:
+            return
+        for result in results:
+            if result.spans and result.failure != SITE_DOWN:
+                latencies = self._latency(cfg["county"])
+                latencies.observe(result.spans)
+                latencies.add("fetch", fetch_s)
+
+    async def _fetch(self, *, base_url: str, cfg: Dict[str, Any], parcel: ParcelInput) -> ScrapeResult:
+        down = self._not_running()
+        if down:
+            return down
+
+        cfg = {**cfg, "base_url": base_url}
+        key = (cfg["county"].lower(), parcel.parcel_number)
+        async with self._contexts.slot():
             try:
-                import time
-                page.set_default_timeout(self.timeout_ms)
-                page.goto(base_url, wait_until="domcontentloaded")
-                time.sleep(2)
-
-                sel = cfg.get("selectors", {})
-                
-                # Handle popup/modal dismissal
-                popup_dismiss = sel.get("popup_dismiss_selector")
-                if popup_dismiss:
-                    try:
-                        page.click(popup_dismiss, timeout=3000)
-                        time.sleep(0.5)
-                    except Exception:
-                        pass
-                
-                # Try common popup and guest login patterns
-                common_selectors = [
-                    'button:has-text("I Accept")',
-                    'button:has-text("I understand")',
-                    'button:has-text("Accept")',
-                    'button:has-text("OK")',
-                    'button:has-text("Guest")',
-                    'a:has-text("Guest")',
-                    'button:has-text("Continue as Guest")',
-                    'a:has-text("Previous Page")',
-                    '#btnAccept',
-                    '#btnOk'
-                ]
-                clicked_popup = False
-                for selector in common_selectors:
-                    try:
-                        elem = page.query_selector(selector)
-                        if elem and elem.is_visible():
-                            page.click(selector, timeout=2000)
-                            time.sleep(2)  # Give page time to process click
-                            clicked_popup = True
-                            break
-                    except Exception:
-                        pass
-                
-                # If we clicked a popup, wait extra time for page to settle
-                if clicked_popup:
-                    time.sleep(3)
-                
-                # Handle guest accept button (La Crosse specific)
-                guest_accept = sel.get("guest_accept_selector")
-                if guest_accept:
-                    try:
-                        elem = page.query_selector(guest_accept)
-                        if elem and elem.is_visible():
-                            page.click(guest_accept, timeout=3000)
-                            time.sleep(2)
-                    except Exception:
-                        pass
-                
-                # For La Crosse, navigate to search page after accepting
-                if 'landnav' in base_url.lower() and '/Home' in base_url:
-                    try:
-                        page.goto(base_url.replace('/Home', '/Search/RealEstate/Search'))
-                        time.sleep(3)
-                    except:
-                        pass
+                session = await self._pool.acquire(cfg)
+            except Exception as e:
+                return ScrapeResult(False, error=f"session setup failed: {e}", failure=classify_exception(e), step="setup")
 
-                tab_selector = sel.get("tab_selector")
-                if tab_selector:
-                    try:
-                        page.click(tab_selector, timeout=3000)
-                        time.sleep(0.5)
-                    except Exception:
-                        pass
+            page = session.page
+            waiter = session.waiter
+            # anything without its own timeout (navigation, extraction) gets the learned whole-fetch one
+            page.set_default_timeout(waiter.timeout("fetch", self.timeout_ms))
+            sel = cfg.get("selectors", {})
+            healthy = False
+            detail_url: Optional[str] = None
+            try:
+                resume_url = self._resume.pop(key, None)
+                if resume_url:
+                    result = await self._resume_details(page, waiter, sel, resume_url)
+                    if result is not None:
+                        healthy = True
+                        return result
+                if session.uses or resume_url:
+                    await self._return_to_search(session, sel)
+
+                await self._search(page, waiter, sel, parcel)
+                await self._open_result(page, waiter, sel)
+                if page.url != session.search_url:
+                    detail_url = page.url
+                result = await self._extract_details(page, waiter, sel)
+                healthy = True
+                return result
+            except Exception as e:
+                spans = waiter.take_spans()
+                failure = classify_exception(e)
+                step = spans[-1][0] if spans else None
+                if failure == TRANSIENT:
+                    # setup (cookies, guest login) survives a timeout, so the retry keeps the warm context;
+                    # if the detail page was reached, the retry starts there instead of searching again
+                    healthy = True
+                    if detail_url and step in DETAIL_STEPS:
+                        self._remember_detail(key, detail_url)
+                return ScrapeResult(
+                    False, error=str(e), source_url=page.url, timings=waiter.take_timings(), spans=spans, failure=failure, step=step
+                )
+            finally:
+                await self._pool.release(session, cfg, healthy=healthy)
+
+    def _remember_detail(self, key: Tuple[str, str], url: str) -> None:
+        self._resume[key] = url
+        self._resume.move_to_end(key)
+        while len(self._resume) > MAX_RESUME_URLS:
+            self._resume.popitem(last=False)
+
+    async def _resume_details(self, page: Page, waiter: Waiter, sel: Dict[str, Any], url: str) -> Optional[ScrapeResult]:
+        # None sends the caller back to a fresh search
+        try:
+            with waiter.step("resume"):
+                await waiter.run("after_goto", lambda: page.goto(url, wait_until="domcontentloaded"))
+            result = await self._extract_details(page, waiter, sel)
+        except Exception:
+            waiter.take_spans()
+            return None
+        return result if result.ok else None
+
+    def batch_size(self, cfg: Dict[str, Any]) -> int:
+        loop = cfg.get("selectors", {}).get("search_loop")
+        return int(loop.get("batch_size", 25)) if loop else 0
+
+    async def fetch_batch(self, *, base_url: str, cfg: Dict[str, Any], parcels: List[ParcelInput]) -> List[ScrapeResult]:
+        loop = cfg.get("selectors", {}).get("search_loop")
+        if not loop:
+            return await super().fetch_batch(base_url=base_url, cfg=cfg, parcels=parcels)
+        await self._enter()
+        try:
+            started = time.perf_counter()
+            results = await self._fetch_loop(base_url=base_url, cfg=cfg, parcels=parcels, loop=loop)
+            self._learn(cfg, results, (time.perf_counter() - started) / len(parcels))
+            return results
+        finally:
+            await self._leave(len(parcels))
+
+    async def _fetch_loop(self, *, base_url: str, cfg: Dict[str, Any], parcels: List[ParcelInput], loop: Dict[str, Any]) -> List[ScrapeResult]:
+        down = self._not_running()
+        if down:
+            return [down for _ in parcels]
+
+        cfg = {**cfg, "base_url": base_url}
+        sel = cfg.get("selectors", {})
+        wanted = {p.parcel_number for p in parcels}
+        results: Dict[str, ScrapeResult] = {}
+        async with self._contexts.slot():
+            try:
+                session = await self._pool.acquire(cfg)
+            except Exception as e:
+                failure = classify_exception(e)
+                return [ScrapeResult(False, error=f"session setup failed: {e}", failure=failure, step="setup") for _ in parcels]
 
-                query = parcel.parcel_number
-                search_input = sel.get("search_input_selector")
-                if search_input:
-                    # For Angular apps, wait longer for the page to be ready
-                    time.sleep(4)
+            page = session.page
+            waiter = session.waiter
+            page.set_default_timeout(waiter.timeout("fetch", self.timeout_ms))
+            broken = False
+            healthy = False
+            reset = False
+            try:
+                for parcel in parcels:
+                    if parcel.parcel_number in results:
+                        continue  # already harvested from an earlier results grid
                     try:
-                        # For selectors like "input[type='text']:visible:nth(1)", use special handling
-                        if ':visible:nth(' in search_input:
-                            # Get all visible inputs and pick the nth one
-                            n = int(search_input.split(':nth(')[1].split(')')[0])
-                            all_inputs = page.query_selector_all('input[type="text"]')
-                            visible_inputs = [inp for inp in all_inputs if inp.is_visible()]
-                            if len(visible_inputs) > n:
-                                visible_inputs[n].fill(query)
-                        else:
-                            page.wait_for_selector(search_input, timeout=15000, state="visible")
-                            page.locator(search_input).fill(query, force=True, timeout=15000)
+                        if session.uses or results:
+                            await self._loop_return(session, sel, loop, force_reload=reset)
+                        got = await self._search_loop_one(page, waiter, sel, loop, parcel, wanted - set(results))
+                        results.update(got)
+                        # harvesting walked extra pages, so "back" no longer lands on the search form
+                        reset = len(got) > 1
                     except Exception as e:
-                        # Try without force if force fails
-                        try:
-                            page.fill(search_input, query, timeout=15000)
-                        except:
-                            pass
-
-                search_button = sel.get("search_button_selector")
-                if search_button:
-                    time.sleep(2)
-                    # Wait for button to be visible and clickable
-                    page.wait_for_selector(search_button, timeout=20000, state="visible")
-                    page.wait_for_selector(search_button, timeout=5000, state="attached")
-                    page.click(search_button, timeout=15000)
-                    time.sleep(6)  # Give Angular time to load results
-
-                wait_for = sel.get("wait_for_selector")
-                if wait_for:
-                    try:
-                        page.wait_for_selector(wait_for, timeout=15000, state="visible")
-                    except:
-                        # Results might already be there, just not matching our selector
-                        time.sleep(2)
-
-                result_row = sel.get("result_row_selector")
-                details_link = sel.get("details_link_selector")
-                if result_row and details_link:
-                    rows = page.query_selector_all(result_row)
-                    if rows:
-                        link = rows[0].query_selector(details_link)
-                        if link:
-                            link.click()
-                            page.wait_for_load_state("domcontentloaded")
-                            time.sleep(1)
-                elif details_link:
-                    try:
-                        page.click(details_link, timeout=10000)
-                        page.wait_for_load_state("domcontentloaded")
-                        time.sleep(1)
-                    except Exception:
-                        pass
-                
-                detail_tab = sel.get("detail_tab_selector")
-                if detail_tab:
-                    try:
-                        page.click(detail_tab, timeout=5000)
-                        time.sleep(1)
-                    except Exception:
-                        pass
-                
-                taxes_link = sel.get("taxes_link_selector")
-                if taxes_link:
+                        spans = waiter.take_spans()
+                        failure = classify_exception(e)
+                        results[parcel.parcel_number] = ScrapeResult(
+                            False,
+                            error=str(e),
+                            source_url=page.url,
+                            timings=waiter.take_timings(),
+                            spans=spans,
+                            failure=failure,
+                            step=spans[-1][0] if spans else None,
+                        )
+                        # page state is unknown after a failure: reload the search form for the next parcel.
+                        # As for a single fetch, a timeout keeps the warm context; anything else retires it.
+                        broken = broken or failure != TRANSIENT
+                        reset = True
+                healthy = not broken
+            finally:
+                await self._pool.release(session, cfg, healthy=healthy, uses=len(parcels))
+
+        return [results.get(p.parcel_number) or ScrapeResult(False, error="not reached in search loop") for p in parcels]
+
+    async def _loop_return(self, session: BrowserSession, sel: Dict[str, Any], loop: Dict[str, Any], *, force_reload: bool = False) -> None:
+        page = session.page
+        how = loop.get("return_to_search") or "search_url"
+        if force_reload or how == "search_url":
+            await self._return_to_search(session, sel)
+        elif how == "back":
+            # detail page -> results (back_steps) -> search form (one more)
+            for _ in range(loop.get("back_steps", 1) + 1):
+                await session.waiter.run("after_back", page.go_back)
+        else:
+            # a "New Search" style link/button on the detail page
+            await session.waiter.run("after_back", lambda: page.click(how, timeout=session.waiter.timeout("return_to_search", 10000)))
+
+    async def _result_parcels(self, page: Page, sel: Dict[str, Any], loop: Dict[str, Any]) -> List[str]:
+        # parcel number shown on each result row, in row order
+        parcel_sel = loop.get("result_parcel_selector")
+        if not parcel_sel:
+            return []
+        result_row = sel.get("result_row_selector")
+        if result_row:
+            texts = []
+            for row in await page.query_selector_all(result_row):
+                el = await row.query_selector(parcel_sel)
+                texts.append((await el.inner_text()).strip() if el else "")
+            return texts
+        return [(await el.inner_text()).strip() for el in await page.query_selector_all(parcel_sel)]
+
+    async def _search_loop_one(
+        self,
+        page: Page,
+        waiter: Waiter,
+        sel: Dict[str, Any],
+        loop: Dict[str, Any],
+        parcel: ParcelInput,
+        wanted: Set[str],
+    ) -> Dict[str, ScrapeResult]:
+        await self._search(page, waiter, sel, parcel)
+
+        found = await self._result_parcels(page, sel, loop) if loop.get("harvest") else []
+        own = found.index(parcel.parcel_number) if parcel.parcel_number in found else 0
+        # other requested parcels listed in the same grid, harvested before the next search
+        others = [(i, pn) for i, pn in enumerate(found) if pn in wanted and pn != parcel.parcel_number and i != own]
+
+        await self._open_result(page, waiter, sel, own)
+        out = {parcel.parcel_number: await self._extract_details(page, waiter, sel)}
+        for index, parcel_number in others:
+            try:
+                for _ in range(loop.get("back_steps", 1)):
+                    await waiter.run("after_back", page.go_back)
+                await self._open_result(page, waiter, sel, index)
+                got = await self._extract_details(page, waiter, sel)
+                if not got.ok:
+                    break
+                out[parcel_number] = got
+            except Exception:
+                # the parcel will get its own search later in the loop
+                break
+        return out
+
+    async def _setup_session(self, session: BrowserSession, cfg: Dict[str, Any]) -> None:
+        page = session.page
+        base_url = cfg["base_url"]
+        sel = cfg.get("selectors", {})
+        waiter = session.waiter = Waiter(page, sel.get("waits"))
+        if self.adaptive_timeouts:
+            waiter.timeouts = self._latency(cfg["county"])
+        await ResourceBlocker.from_cfg(cfg).install(session.context)
+        page.set_default_timeout(self.timeout_ms)
+        with waiter.step("goto"):
+            await waiter.run("after_goto", lambda: page.goto(base_url, wait_until="domcontentloaded"))
+
+        # Handle popup/modal dismissal
+        with waiter.step("popups"):
+            popup_dismiss = sel.get("popup_dismiss_selector")
+            if popup_dismiss:
+                try:
+                    await waiter.run("after_popup", lambda: page.click(popup_dismiss, timeout=3000))
+                except Exception:
+                    pass
+
+            # Try common popup and guest login patterns
+            for selector in COMMON_POPUP_SELECTORS:
+                try:
+                    elem = await page.query_selector(selector)
+                    if elem and await elem.is_visible():
+                        await waiter.run("after_popup", lambda: page.click(selector, timeout=2000))
+                        break
+                except Exception:
+                    pass
+
+        # Handle guest accept button (La Crosse specific)
+        with waiter.step("guest"):
+            guest_accept = sel.get("guest_accept_selector")
+            if guest_accept:
+                try:
+                    elem = await page.query_selector(guest_accept)
+                    if elem and await elem.is_visible():
+                        await waiter.run("after_guest_accept", lambda: page.click(guest_accept, timeout=3000))
+                except Exception:
+                    pass
+
+        # For La Crosse, navigate to search page after accepting
+        with waiter.step("search_redirect"):
+            if 'landnav' in base_url.lower() and '/Home' in base_url:
+                try:
+                    await waiter.run("after_search_redirect", lambda: page.goto(base_url.replace('/Home', '/Search/RealEstate/Search')))
+                except Exception:
+                    pass
+
+        session.search_url = page.url
+        await self._select_tab(page, waiter, sel)
+
+    async def _return_to_search(self, session: BrowserSession, sel: Dict[str, Any]) -> None:
+        # cookies/guest acceptance live on the context, so only the search form needs reloading
+        page = session.page
+        with session.waiter.step("return_to_search"):
+            await session.waiter.run("after_goto", lambda: page.goto(session.search_url, wait_until="domcontentloaded"))
+        await self._select_tab(page, session.waiter, sel)
+
+    async def _select_tab(self, page: Page, waiter: Waiter, sel: Dict[str, Any]) -> None:
+        tab_selector = sel.get("tab_selector")
+        if tab_selector:
+            with waiter.step("tab"):
+                try:
+                    await waiter.run("after_tab", lambda: page.click(tab_selector, timeout=3000))
+                except Exception:
+                    pass
+
+    async def _search(self, page: Page, waiter: Waiter, sel: Dict[str, Any], parcel: ParcelInput) -> None:
+        query = parcel.parcel_number
+        with waiter.step("search"):
+            search_input = sel.get("search_input_selector")
+            if search_input:
+                # Angular apps render the form late; the default wait checks they are stable
+                await waiter.run("before_search_input")
+                try:
+                    # For selectors like "input[type='text']:visible:nth(1)", use special handling
+                    if ':visible:nth(' in search_input:
+                        # Get all visible inputs and pick the nth one
+                        n = int(search_input.split(':nth(')[1].split(')')[0])
+                        all_inputs = await page.query_selector_all('input[type="text"]')
+                        visible_inputs = [inp for inp in all_inputs if await inp.is_visible()]
+                        if len(visible_inputs) > n:
+                            await visible_inputs[n].fill(query)
+                    else:
+                        await page.wait_for_selector(search_input, timeout=waiter.timeout("search", 15000), state="visible")
+                        await page.locator(search_input).fill(query, force=True, timeout=waiter.timeout("search", 15000))
+                except Exception:
+                    # Try without force if force fails
                     try:
-                        page.click(taxes_link, timeout=5000)
-                        time.sleep(2)
+                        await page.fill(search_input, query, timeout=waiter.timeout("search", 15000))
                     except Exception:
                         pass
 
-                extraction = sel.get("extract", {})
-                data: Dict[str, Any] = {}
-                for key, rule in extraction.items():
-                    if isinstance(rule, str):
-                        el = page.query_selector(rule)
-                        data[key] = el.inner_text() if el else None
-                    elif isinstance(rule, dict):
-                        selector = rule.get("selector")
-                        attr = rule.get("attr")
-                        if selector:
-                            el = page.query_selector(selector)
-                            if not el:
-                                data[key] = None
-                            else:
-                                if attr:
-                                    data[key] = el.get_attribute(attr)
-                                else:
-                                    data[key] = el.inner_text()
-                    else:
-                        data[key] = None
+            search_button = sel.get("search_button_selector")
+            if search_button:
+                await waiter.run("before_search_button")
+                # Wait for button to be visible and clickable
+                await page.wait_for_selector(search_button, timeout=waiter.timeout("search", 20000), state="visible")
+                await page.wait_for_selector(search_button, timeout=waiter.timeout("search", 5000), state="attached")
+                await waiter.run("after_search", lambda: page.click(search_button, timeout=waiter.timeout("search", 15000)))
 
-                result = ScrapeResult(True, data=data, source_url=page.url)
-                page.close()
-                context.close()
-                return result
-            except Exception as e:
-                result = ScrapeResult(False, error=str(e), source_url=getattr(page, "url", None))
+        with waiter.step("results"):
+            wait_for = sel.get("wait_for_selector")
+            if wait_for:
                 try:
-                    page.close()
-                    context.close()
-                except:
+                    await page.wait_for_selector(wait_for, timeout=waiter.timeout("results", 15000), state="visible")
+                except Exception:
+                    # Results might already be there, just not matching our selector
+                    await waiter.run("results_fallback")
+
+    async def _open_result(self, page: Page, waiter: Waiter, sel: Dict[str, Any], index: int = 0) -> None:
+        with waiter.step("open_result"):
+            await self._click_result(page, waiter, sel, index)
+
+    async def _click_result(self, page: Page, waiter: Waiter, sel: Dict[str, Any], index: int) -> None:
+        result_row = sel.get("result_row_selector")
+        details_link = sel.get("details_link_selector")
+        if result_row and details_link:
+            rows = await page.query_selector_all(result_row)
+            if len(rows) > index:
+                link = await rows[index].query_selector(details_link)
+                if link:
+                    await waiter.run("after_details", link.click)
+        elif details_link and index:
+            links = await page.query_selector_all(details_link)
+            if len(links) > index:
+                await waiter.run("after_details", links[index].click)
+        elif details_link:
+            try:
+                await waiter.run("after_details", lambda: page.click(details_link, timeout=waiter.timeout("open_result", 10000)))
+            except Exception:
+                pass
+
+    async def _extract_details(self, page: Page, waiter: Waiter, sel: Dict[str, Any]) -> ScrapeResult:
+        detail_tab = sel.get("detail_tab_selector")
+        if detail_tab:
+            with waiter.step("detail_tab"):
+                try:
+                    await waiter.run("after_detail_tab", lambda: page.click(detail_tab, timeout=waiter.timeout("detail_tab", 5000)))
+                except Exception:
                     pass
-                return result
-        
-        return await asyncio.to_thread(_fetch_sync)
 
+        taxes_link = sel.get("taxes_link_selector")
+        if taxes_link:
+            with waiter.step("taxes"):
+                try:
+                    await waiter.run("after_taxes", lambda: page.click(taxes_link, timeout=waiter.timeout("taxes", 5000)))
+                except Exception:
+                    pass
 
-class MockEngine(ScrapeEngine):
-    def __init__(self, *, fixtures: Dict[str, Dict[str, Any]]):
-        self.fixtures = fixtures
+        with waiter.step("extract"):
+            data = await self._extract(page, sel.get("extract", {}))
+        snapshot = None
+        if self.snapshots:
+            with waiter.step("snapshot"):
+                snapshot = await page.content()
+        if sel.get("extract") and not any(data.values()):
+            # every rule came back empty: the search matched nothing
+            return ScrapeResult(
+                False,
+                data=data,
+                error="no data extracted (parcel not found?)",
+                source_url=page.url,
+                timings=waiter.take_timings(),
+                spans=waiter.take_spans(),
+                failure=NOT_FOUND,
+                step="extract",
+                snapshot=snapshot,
+                snapshot_source="browser",
+            )
+        return ScrapeResult(
+            True, data=data, source_url=page.url, timings=waiter.take_timings(), spans=waiter.take_spans(), snapshot=snapshot, snapshot_source="browser"
+        )
 
-    async def start(self) -> None:
-        return None
+    async def _extract(self, page: Page, extraction: Dict[str, Any]) -> Dict[str, Any]:
+        # every field in one in-page evaluation instead of 2+ IPC round trips per field
+        result = await page.evaluate(EXTRACT_JS, compile_rules(extraction))
+        data: Dict[str, Any] = result["data"]
+        for key in result["fallback"]:
+            data[key] = await self._extract_field(page, extraction[key])
+        return data
 
-    async def stop(self) -> None:
-        return None
+    async def _extract_field(self, page: Page, rule: Any) -> Any:
+        # slow path for selectors only Playwright's engine understands
+        if isinstance(rule, str):
+            rule = {"selector": rule}
+        if rule.get("rows"):
+            rows = await page.query_selector_all(rule["rows"])
+            out = []
+            for row in rows:
+                rec = {}
+                for name, col in (rule.get("columns") or {}).items():
+                    col = {"selector": col} if isinstance(col, str) else col
+                    el = await row.query_selector(self._selector(col))
+                    rec[name] = await self._read(el, col.get("attr"))
+                out.append(rec)
+            return out
+        if rule.get("all"):
+            return [await self._read(el, rule.get("attr")) for el in await page.query_selector_all(self._selector(rule))]
+        return await self._read(await page.query_selector(self._selector(rule)), rule.get("attr"))
 
-    async def fetch(self, *, base_url: str, cfg: Dict[str, Any], parcel: ParcelInput) -> ScrapeResult:
-        key = f"{parcel.county.lower()}::{parcel.parcel_number}"
-        if key not in self.fixtures:
-            return ScrapeResult(False, error=f"No fixture for {key}")
-        data = self.fixtures[key]
-        return ScrapeResult(True, data=data, source_url=base_url)
+    @staticmethod
+    def _selector(rule: Dict[str, Any]) -> str:
+        # Playwright takes XPath with an xpath= prefix
+        return f"xpath={rule['xpath']}" if rule.get("xpath") else rule.get("css") or rule["selector"]
+
+    @staticmethod
+    async def _read(el: Any, attr: Optional[str]) -> Optional[str]:
+        if not el:
+            return None
+        return await el.get_attribute(attr) if attr else await el.inner_text()
+
+
+# Kept so existing imports keep working; the sync engine behind asyncio.to_thread is gone.
+PlaywrightEngine = AsyncPlaywrightEngine
@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, List, Optional
+
+from lxml import html as lxml_html
+from lxml.cssselect import CSSSelector
+
+
+# Rule shapes shared by every engine:
+#   "css selector"                       -> text of first match
+#   {selector|css: ..., attr: ...}       -> attribute (or text) of first match
+#   {selector, attr?, all: true}         -> list with every match
+#   {rows: ..., columns: {name: rule}}   -> list of {name: value} per matching row (table capture)
+#   {xpath: ...}                         -> first xpath result (text of element, or the string value)
+#   {jsonpath: "$.a.b[0].c"}             -> value from a JSON document
+
+
+_css_cache: Dict[str, CSSSelector] = {}
+
+
+def _css(selector: str) -> CSSSelector:
+    compiled = _css_cache.get(selector)
+    if compiled is None:
+        compiled = _css_cache[selector] = CSSSelector(selector)
+    return compiled
+
+
+def _text(el: Any) -> str:
+    return " ".join(el.text_content().split())
+
+
+def _value(hit: Any, attr: Optional[str]) -> Optional[str]:
+    if isinstance(hit, str):
+        return hit.strip()
+    return hit.get(attr) if attr else _text(hit)
+
+
+def _matches(doc: Any, rule: Dict[str, Any]) -> List[Any]:
+    if rule.get("xpath"):
+        hits = doc.xpath(rule["xpath"])
+        # string(), count() and friends give one value, not a node list
+        return hits if isinstance(hits, list) else [str(hits)]
+    selector = rule.get("css") or rule.get("selector")
+    return _css(selector)(doc) if selector else []
+
+
+def _apply_html(doc: Any, rule: Any) -> Any:
+    if isinstance(rule, str):
+        rule = {"selector": rule}
+    if not isinstance(rule, dict):
+        return None
+    attr = rule.get("attr")
+    if rule.get("rows"):
+        columns = rule.get("columns") or {}
+        return [{name: _apply_html(row, col) for name, col in columns.items()} for row in _css(rule["rows"])(doc)]
+    found = _matches(doc, rule)
+    if rule.get("all"):
+        return [_value(hit, attr) for hit in found]
+    return _value(found[0], attr) if found else None
+
+
+def extract_html(html: str, rules: Dict[str, Any]) -> Dict[str, Any]:
+    doc = lxml_html.fromstring(html or "<html></html>")
+    return {key: _apply_html(doc, rule) for key, rule in rules.items()}
+
+
+def _locate(key: str, rule: Dict[str, Any]) -> Dict[str, Any]:
+    # how EXTRACT_JS finds a rule's matches: CSS through querySelector, XPath through document.evaluate
+    if rule.get("xpath"):
+        return {"xpath": rule["xpath"], "attr": rule.get("attr")}
+    selector = rule.get("css") or rule.get("selector")
+    if selector:
+        return {"selector": selector, "attr": rule.get("attr")}
+    if rule.get("jsonpath"):
+        raise ValueError(f"extract rule {key!r}: jsonpath only applies to JSON responses, not to a browser page")
+    raise ValueError(f"extract rule {key!r} needs one of selector, css, xpath or rows")
+
+
+def compile_rules(rules: Dict[str, Any]) -> List[Dict[str, Any]]:
+    # flattens YAML extract rules into the plan EXTRACT_JS evaluates in one round trip. Every shape
+    # extract_html understands compiles to the same matches in the browser; anything else raises
+    # here instead of coming back empty.
+    plan: List[Dict[str, Any]] = []
+    for key, rule in rules.items():
+        if isinstance(rule, str):
+            rule = {"selector": rule}
+        if not isinstance(rule, dict):
+            raise ValueError(f"extract rule {key!r} must be a selector string or a mapping, got {rule!r}")
+        if rule.get("rows"):
+            columns = [
+                {"key": name, **_locate(f"{key}.{name}", {"selector": col} if isinstance(col, str) else col)}
+                for name, col in (rule.get("columns") or {}).items()
+            ]
+            plan.append({"key": key, "kind": "table", "rows": rule["rows"], "columns": columns})
+        else:
+            plan.append({"key": key, "kind": "all" if rule.get("all") else "one", **_locate(key, rule)})
+    return plan
+
+
+# Runs a compiled plan inside the page, with extract_html's semantics: XPath string results and
+# text/attribute nodes are trimmed, elements give their text or `attr`. Keys whose selector the
+# browser can't parse (Playwright-only syntax such as :has-text) come back in `fallback` for
+# per-field extraction.
+EXTRACT_JS = """
+(plan) => {
+  const data = {};
+  const fallback = [];
+  const matches = (root, rule, firstOnly) => {
+    if (!rule.xpath) {
+      return firstOnly ? [root.querySelector(rule.selector)] : Array.from(root.querySelectorAll(rule.selector));
+    }
+    const r = document.evaluate(rule.xpath, root, null, XPathResult.ANY_TYPE, null);
+    if (r.resultType === XPathResult.STRING_TYPE) return [r.stringValue];
+    if (r.resultType === XPathResult.NUMBER_TYPE) return [String(r.numberValue)];
+    if (r.resultType === XPathResult.BOOLEAN_TYPE) return [String(r.booleanValue)];
+    const hits = [];
+    for (let n = r.iterateNext(); n; n = r.iterateNext()) hits.push(n);
+    return hits;
+  };
+  const pick = (hit, attr) => {
+    if (hit == null) return null;
+    if (typeof hit === 'string') return hit.trim();
+    if (hit.nodeType !== Node.ELEMENT_NODE) return hit.nodeValue.trim();
+    return attr ? hit.getAttribute(attr) : hit.innerText;
+  };
+  const first = (root, rule) => pick(matches(root, rule, true)[0], rule.attr);
+  for (const rule of plan) {
+    try {
+      if (rule.kind === 'one') {
+        data[rule.key] = first(document, rule);
+      } else if (rule.kind === 'all') {
+        data[rule.key] = matches(document, rule, false).map(hit => pick(hit, rule.attr));
+      } else if (rule.kind === 'table') {
+        data[rule.key] = Array.from(document.querySelectorAll(rule.rows), row => {
+          const rec = {};
+          for (const col of rule.columns) rec[col.key] = first(row, col);
+          return rec;
+        });
+      }
+    } catch (e) {
+      fallback.push(rule.key);
+    }
+  }
+  return {data, fallback};
+}
+"""
+
+
+_path_token = re.compile(r"\.([^.\[\]]+)|\[(\d+)\]|\[['\"]([^'\"]+)['\"]\]")
+
+
+def jsonpath_get(doc: Any, path: str) -> Any:
+    # small JSONPath subset: $.a.b, $.a[0].b, $['a b']
+    if not path.startswith("$"):
+        raise ValueError(f"JSONPath must start with '$': {path}")
+    cur = doc
+    for key, index, quoted in _path_token.findall(path[1:]):
+        if cur is None:
+            return None
+        if index:
+            i = int(index)
+            cur = cur[i] if isinstance(cur, list) and i < len(cur) else None
+        else:
+            name = key or quoted
+            cur = cur.get(name) if isinstance(cur, dict) else None
+    return cur
+
+
+def extract_json(doc: Any, rules: Dict[str, Any]) -> Dict[str, Any]:
+    data: Dict[str, Any] = {}
+    for key, rule in rules.items():
+        path = rule.get("jsonpath") if isinstance(rule, dict) else rule
+        data[key] = jsonpath_get(doc, path) if path else None
+    return data
+
+
+def missing_fields(data: Dict[str, Any], required: List[str]) -> List[str]:
+    if required:
+        return [k for k in required if data.get(k) in (None, "")]
+    # nothing required explicitly: treat an all-empty extraction as a miss
+    return list(data) if all(v in (None, "") for v in data.values()) else []
+
+
+_skip_input_types = {"submit", "button", "image", "reset", "file"}
+
+
+def form_fields(html: str, form_selector: str = "form") -> Dict[str, str]:
+    # current values of a form's inputs, e.g. ASP.NET __VIEWSTATE / __EVENTVALIDATION for postback replay
+    doc = lxml_html.fromstring(html or "<html></html>")
+    forms = _css(form_selector)(doc)
+    root = forms[0] if forms else doc
+    fields: Dict[str, str] = {}
+    for el in _css("input[name], select[name], textarea[name]")(root):
+        name = el.get("name")
+        if el.tag == "input":
+            kind = (el.get("type") or "text").lower()
+            if kind in _skip_input_types:
+                continue
+            if kind in ("checkbox", "radio") and el.get("checked") is None:
+                continue
+            fields[name] = el.get("value") or ""
+        elif el.tag == "select":
+            chosen = el.xpath(".//option[@selected]") or el.xpath(".//option")
+            fields[name] = (chosen[0].get("value") or chosen[0].text_content()) if chosen else ""
+        else:
+            fields[name] = el.text_content()
+    return fields
+
+
+_postback_re = re.compile(r"__doPostBack\(\s*['\"]([^'\"]*)['\"]\s*,\s*['\"]([^'\"]*)['\"]\s*\)")
+
+
+def postback_target(href: Optional[str]) -> Optional[Dict[str, str]]:
+    m = _postback_re.search(href or "")
+    if not m:
+        return None
+    return {"__EVENTTARGET": m.group(1), "__EVENTARGUMENT": m.group(2)}
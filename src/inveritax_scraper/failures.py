@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import random
+from typing import Optional, Tuple
+
+# failure classes, set on ScrapeResult.failure and NormalizedTaxRecord.failure_class
+TRANSIENT = "transient"  # timeouts, dropped connections, throttling: worth another attempt later in the run
+SITE_DOWN = "site_down"  # the portal is unreachable or refusing service
+NOT_FOUND = "not_found"  # the portal answered, but has nothing for this parcel
+ERROR = "error"  # anything else (selector drift, recipe bugs); retrying won't help
+
+# matched against the lowercased error text; Playwright reports network failures as net::ERR_*
+_SITE_DOWN_MARKERS = (
+    "err_name_not_resolved",
+    "err_connection_refused",
+    "err_address_unreachable",
+    "err_internet_disconnected",
+    "err_cert_",
+    "err_ssl_",
+    "name or service not known",
+    "nodename nor servname",
+    "connection refused",
+    "certificate verify failed",
+)
+_NOT_FOUND_MARKERS = ("no fixture", "not found", "no results", "no records", "no data extracted")
+_TRANSIENT_MARKERS = (
+    "timeout",
+    "timed out",
+    "err_connection_reset",
+    "err_connection_closed",
+    "err_empty_response",
+    "err_network_changed",
+    "err_http2_protocol_error",
+    "ns_error_net_reset",
+    "ns_error_net_interrupt",
+    "connection reset",
+    "server disconnected",
+    "remote protocol",
+    "navigation interrupted",
+)
+
+
+def classify_status(status: int) -> str:
+    if status in (404, 410):
+        return NOT_FOUND
+    if status in (408, 425, 429, 500, 502, 504):
+        return TRANSIENT
+    if status >= 500:
+        return SITE_DOWN
+    return ERROR
+
+
+def classify_error(error: Optional[str]) -> str:
+    text = (error or "").lower()
+    for markers, failure in ((_SITE_DOWN_MARKERS, SITE_DOWN), (_NOT_FOUND_MARKERS, NOT_FOUND), (_TRANSIENT_MARKERS, TRANSIENT)):
+        if any(m in text for m in markers):
+            return failure
+    return ERROR
+
+
+def classify_exception(e: BaseException) -> str:
+    # duck-typed so this module doesn't need playwright or httpx: httpx.HTTPStatusError has .response,
+    # and both libraries name their timeout errors *Timeout*
+    status = getattr(getattr(e, "response", None), "status_code", None)
+    if isinstance(status, int):
+        return classify_status(status)
+    name = type(e).__name__
+    if name == "ConnectError":
+        return SITE_DOWN
+    if "Timeout" in name or name in ("ReadError", "WriteError", "RemoteProtocolError"):
+        return TRANSIENT
+    return classify_error(str(e))
+
+
+class RetryPolicy:
+    # failures in `retry_on` are re-queued behind the rest of the run, up to `max_attempts` fetches per
+    # parcel. Retry n waits base_s * 2**(n-1) (capped at max_s), with the upper half jittered.
+    def __init__(
+        self,
+        *,
+        max_attempts: int = 3,
+        base_s: float = 2.0,
+        max_s: float = 60.0,
+        retry_on: Tuple[str, ...] = (TRANSIENT,),
+        seed: Optional[int] = None,
+    ):
+        self.max_attempts = max_attempts
+        self.base_s = base_s
+        self.max_s = max_s
+        self.retry_on = retry_on
+        self._rng = random.Random(seed)
+
+    def should_retry(self, failure: Optional[str], attempt: int) -> bool:
+        return failure in self.retry_on and attempt < self.max_attempts
+
+    def delay(self, retry: int) -> float:
+        cap = min(self.max_s, self.base_s * 2 ** (retry - 1))
+        return self._rng.uniform(cap / 2, cap)
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import json
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from .config import CountyConfig, RefreshPolicy, RefreshRule
+from .models import NormalizedTaxRecord, ParcelInput
+from .writers import read_records
+
+# normalized values compared for the delta; provenance (timestamps, urls, raw payloads) is not a change
+DIFF_FIELDS = (
+    "delinquent_status",
+    "delinquent_amount",
+    "delinquent_tax_years",
+    "delinquent_installments",
+    "penalties_interest",
+    "current_year_total_tax",
+    "installments",
+)
+
+Key = Tuple[str, str]
+
+
+def record_key(county: str, parcel_number: str) -> Key:
+    return (county.lower(), parcel_number)
+
+
+def load_previous(path: Path, keep: Optional[Callable[[NormalizedTaxRecord], bool]] = None) -> Dict[Key, NormalizedTaxRecord]:
+    # last record per parcel wins, same as the output of a run with duplicate input rows
+    return {record_key(r.county, r.parcel_number): r for r in read_records(path) if keep is None or keep(r)}
+
+
+def _fetched_at(rec: NormalizedTaxRecord) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat((rec.scrape_timestamp_utc or "").rstrip("Z")).replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+
+
+def _last_window(mm_dd: str, now: datetime) -> datetime:
+    # the most recent MM-DD on or before now; Feb 29 falls back to Feb 28 in other years
+    month, day = (int(x) for x in mm_dd.split("-"))
+    for year in (now.year, now.year - 1):
+        try:
+            at = datetime(year, month, day, tzinfo=timezone.utc)
+        except ValueError:
+            at = datetime(year, month, day - 1, tzinfo=timezone.utc)
+        if at <= now:
+            return at
+    return at
+
+
+def stale_reason(rule: Union[RefreshRule, RefreshPolicy], fetched: datetime, now: datetime) -> Optional[str]:
+    if rule.max_age_days is not None and now - fetched > timedelta(days=rule.max_age_days):
+        return f"older than {rule.max_age_days:g} days"
+    for window in rule.windows:
+        if _last_window(window, now) > fetched:
+            return f"window {window}"
+    return None
+
+
+def due_reason(prev: Optional[NormalizedTaxRecord], policy: RefreshPolicy, now: datetime) -> Optional[str]:
+    # None means the previous record is still fresh
+    if prev is None:
+        return "new"
+    if prev.errors:
+        return "failed last time"
+    fetched = _fetched_at(prev)
+    if fetched is None:
+        return "no timestamp"
+    reason = stale_reason(policy, fetched, now)
+    if reason:
+        return reason
+    for field, rule in policy.fields.items():
+        if rule.when_set and not getattr(prev, field, None):
+            continue
+        reason = stale_reason(rule, fetched, now)
+        if reason:
+            return f"{field} {reason}"
+    return None
+
+
+def diff_records(old: Optional[NormalizedTaxRecord], new: NormalizedTaxRecord) -> Dict[str, Dict[str, Any]]:
+    before = old.model_dump(mode="json", include=set(DIFF_FIELDS)) if old else {}
+    after = new.model_dump(mode="json", include=set(DIFF_FIELDS))
+    return {f: {"old": before.get(f), "new": after[f]} for f in DIFF_FIELDS if before.get(f) != after[f]}
+
+
+def _delta(rec: NormalizedTaxRecord, change: str, **extra: Any) -> str:
+    return json.dumps({"county": rec.county, "parcel_number": rec.parcel_number, "change": change, **extra}, default=str)
+
+
+class IncrementalRun:
+    # filters the input down to parcels due for a refresh and merges fresh records over the previous
+    # snapshot. Fresh parcels skip the engine entirely: their previous record goes straight to the output.
+    def __init__(
+        self,
+        previous: Dict[Key, NormalizedTaxRecord],
+        county_configs: Dict[str, CountyConfig],
+        *,
+        now: Optional[datetime] = None,
+    ):
+        self.previous = previous
+        self.county_configs = county_configs
+        self.now = now or datetime.now(timezone.utc)
+        self.seen: Set[Key] = set()
+        self.due: Counter = Counter()
+        self.carried = 0
+        self.changed = 0
+        self.kept = 0
+
+    def select(self, parcels: Iterable[ParcelInput], carry: Callable[[NormalizedTaxRecord], None]) -> Iterator[ParcelInput]:
+        default = RefreshPolicy()
+        for parcel in parcels:
+            key = record_key(parcel.county, parcel.parcel_number)
+            if key in self.seen:
+                continue
+            self.seen.add(key)
+            cfg = self.county_configs.get(key[0])
+            prev = self.previous.get(key)
+            reason = due_reason(prev, cfg.refresh if cfg else default, self.now)
+            if reason is None and prev is not None:
+                self.carried += 1
+                carry(prev)
+                continue
+            self.due[reason] += 1
+            yield parcel
+
+    def merge(self, rec: NormalizedTaxRecord) -> Tuple[NormalizedTaxRecord, Optional[str]]:
+        # (record for the full snapshot, delta line or None when nothing changed)
+        prev = self.previous.get(record_key(rec.county, rec.parcel_number))
+        if rec.errors:
+            if prev is not None and not prev.errors:
+                # keep the last good values; the parcel is still due, so the next run tries again
+                self.kept += 1
+                return prev, _delta(rec, "refresh_failed", errors=rec.errors)
+            return rec, _delta(rec, "failed", errors=rec.errors)
+        fields = diff_records(None if prev is None or prev.errors else prev, rec)
+        if prev is not None and not prev.errors and not fields:
+            return rec, None
+        self.changed += 1
+        return rec, _delta(rec, "added" if prev is None else "changed", fields=fields)
+
+    def removed(self) -> List[str]:
+        # parcels in the previous snapshot that are no longer in the input
+        return [_delta(r, "removed") for key, r in self.previous.items() if key not in self.seen]
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "due": dict(self.due),
+            "carried": self.carried,
+            "changed": self.changed,
+            "kept": self.kept,
+            "removed": sum(1 for key in self.previous if key not in self.seen),
+        }
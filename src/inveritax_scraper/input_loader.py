@@ -1,33 +1,126 @@
 from __future__ import annotations
 
+import csv
+import time
 from pathlib import Path
-from typing import List
-import pandas as pd
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 from .models import ParcelInput
 
 
 SHEET_HINTS = ["Records"]
 
+# expected columns: County, Parcel Number, Owner Name, Property Address
+COLUMNS = ["County", "Parcel Number", "Owner Name", "Property Address"]
+
+
+class LoadStats:
+    def __init__(self) -> None:
+        self.rows = 0
+        self.parcels = 0
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def rows_per_s(self) -> float:
+        return self.rows / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def _cell(val: Any) -> Optional[str]:
+    if val is None:
+        return None
+    if isinstance(val, float) and val != val:  # NaN from parquet/pandas-written files
+        return None
+    s = str(val).strip()
+    return s or None
+
+
+def _to_parcel(row: Dict[str, Any]) -> Optional[ParcelInput]:
+    county = _cell(row.get("County"))
+    parcel = _cell(row.get("Parcel Number"))
+    if not county or not parcel or parcel.lower() == "nan":
+        return None
+    return ParcelInput(
+        county=county,
+        parcel_number=parcel,
+        owner_name=_cell(row.get("Owner Name")),
+        property_address=_cell(row.get("Property Address")),
+    )
+
+
+def _xlsx_rows(path: Path) -> Iterator[Dict[str, Any]]:
+    from openpyxl import load_workbook
+
+    # read-only mode streams rows from the sheet XML instead of building the whole workbook
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        for sheet in wb.sheetnames:
+            if not any(h in sheet for h in SHEET_HINTS):
+                continue
+            rows = wb[sheet].iter_rows(values_only=True)
+            header = next(rows, None)
+            if not header:
+                continue
+            names = [str(h).strip() if h is not None else "" for h in header]
+            for values in rows:
+                yield dict(zip(names, values))
+    finally:
+        wb.close()
+
+
+def _csv_rows(path: Path) -> Iterator[Dict[str, Any]]:
+    with open(path, newline="", encoding="utf-8-sig") as fh:
+        for row in csv.DictReader(fh):
+            yield {(k or "").strip(): v for k, v in row.items()}
+
+
+def _parquet_rows(path: Path) -> Iterator[Dict[str, Any]]:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError("Parquet input needs pyarrow (pip install pyarrow)") from e
+
+    pf = pq.ParquetFile(path)
+    columns = [c for c in COLUMNS if c in pf.schema_arrow.names]
+    for batch in pf.iter_batches(batch_size=10_000, columns=columns):
+        yield from batch.to_pylist()
+
+
+def iter_parcels(path: Path, stats: Optional[LoadStats] = None) -> Iterator[ParcelInput]:
+    suffix = path.suffix.lower()
+    if suffix in (".xlsx", ".xlsm"):
+        rows = _xlsx_rows(path)
+    elif suffix == ".csv":
+        rows = _csv_rows(path)
+    elif suffix == ".parquet":
+        rows = _parquet_rows(path)
+    else:
+        raise ValueError(f"Unsupported input type: {path.suffix} (expected .xlsx, .csv or .parquet)")
+
+    stats = stats or LoadStats()
+    for row in rows:
+        stats.rows += 1
+        parcel = _to_parcel(row)
+        if parcel:
+            stats.parcels += 1
+            yield parcel
+    stats.finished = time.perf_counter()
+
 
 def load_parcels_from_excel(xlsx_path: Path) -> List[ParcelInput]:
-    xl = pd.ExcelFile(xlsx_path)
-    parcels: List[ParcelInput] = []
-    for sheet in xl.sheet_names:
-        if any(h in sheet for h in SHEET_HINTS):
-            df = pd.read_excel(xlsx_path, sheet_name=sheet)
-            # expected columns: County, Parcel Number, Owner Name, Property Address
-            for _, row in df.iterrows():
-                county = str(row.get("County", "")).strip()
-                parcel = str(row.get("Parcel Number", "")).strip()
-                if not county or not parcel or parcel.lower() == "nan":
-                    continue
-                parcels.append(
-                    ParcelInput(
-                        county=county,
-                        parcel_number=parcel,
-                        owner_name=(None if pd.isna(row.get("Owner Name")) else str(row.get("Owner Name")).strip()),
-                        property_address=(None if pd.isna(row.get("Property Address")) else str(row.get("Property Address")).strip()),
-                    )
-                )
-    return parcels
+    return list(iter_parcels(xlsx_path))
+
+
+def dedupe_parcels(parcels: Iterable[ParcelInput]) -> Iterator[ParcelInput]:
+    # the same (county, parcel) can appear on several rows/sheets; fetch it once per run
+    seen: Set[Tuple[str, str]] = set()
+    for p in parcels:
+        key = (p.county.lower(), p.parcel_number)
+        if key in seen:
+            continue
+        seen.add(key)
+        yield p
@@ -2,55 +2,410 @@ from __future__ import annotations
 
 import asyncio
 import json
+import time
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, List, Optional
 import typer
 from rich.console import Console
+from rich.progress import Progress, TextColumn, TimeElapsedColumn
 
 from .county_registry import load_county_configs
-from .input_loader import load_parcels_from_excel
-from .engines_playwright import PlaywrightEngine, MockEngine
-from .orchestrator import run_scrape
+from .engine import build_engine
+from .failures import RetryPolicy
+from .incremental import IncrementalRun, load_previous
+from .input_loader import LoadStats, iter_parcels
+from .metrics import RunMetrics, serve_metrics
+from .orchestrator import iter_scrape
+from .snapshots import SnapshotStore, reextract as reextract_snapshots
+from .store import ResultStore
+from .workers import county_workers, run_sharded
+from .writers import ArrowWriter, JsonlWriter, RecordWriter, jsonl_to_json
 
 
 app = typer.Typer(add_completion=False)
 console = Console()
 
 
+def _check_format(output_format: str) -> None:
+    if output_format not in ("json", "jsonl", "parquet", "arrow"):
+        raise typer.BadParameter("--output-format must be one of: json, jsonl, parquet, arrow")
+
+
+def _jsonl_path(output: Path, output_format: str) -> Path:
+    # records are appended to JSONL as they finish; a crash keeps everything written so far.
+    # json is built from that file at the end; parquet/arrow write a row group per 5000 records.
+    return output if output_format == "jsonl" else output.with_name(output.name + ".partial.jsonl")
+
+
+def _open_writer(output: Path, output_format: str, raw_column: bool) -> RecordWriter:
+    if output_format in ("parquet", "arrow"):
+        try:
+            return ArrowWriter(output, fmt=output_format, include_raw=raw_column)
+        except RuntimeError as e:
+            raise typer.BadParameter(str(e))
+    return JsonlWriter(_jsonl_path(output, output_format))
+
+
+def _finish_output(output: Path, output_format: str) -> None:
+    if output_format == "json":
+        jsonl_path = _jsonl_path(output, output_format)
+        jsonl_to_json(jsonl_path, output)
+        jsonl_path.unlink()
+
+
 @app.command()
 def run(
-    input_xlsx: Path = typer.Option(..., "--input", exists=True, help="Input Excel file (provided by Inveritax)"),
+    input_xlsx: Path = typer.Option(..., "--input", exists=True, help="Input parcels: Excel file (provided by Inveritax), .csv or .parquet"),
     output_json: Path = typer.Option(Path("output.json"), "--output", help="Where to write normalized JSON"),
+    output_format: str = typer.Option("json", "--output-format", help="json (pretty array, built from a streamed JSONL file at the end) | jsonl | parquet | arrow"),
+    raw_column: bool = typer.Option(True, "--raw-column/--no-raw-column", help="Keep raw page payloads as a JSON column (parquet/arrow)"),
     headless: bool = typer.Option(True, "--headless/--headed", help="Run browser headless"),
-    max_concurrency: int = typer.Option(5, "--max-concurrency", min=1, max=20),
+    max_concurrency: int = typer.Option(5, "--max-concurrency", min=1, max=1000, help="Fetches in flight at once, in total across --workers"),
+    max_contexts: int = typer.Option(100, "--max-contexts", min=1, help="Max browser contexts open at once (live mode)"),
     mode: str = typer.Option("live", "--mode", help="live | mock"),
+    engine_kind: str = typer.Option("hybrid", "--engine", help="Live engine: hybrid | browser | http"),
     fixtures_json: Optional[Path] = typer.Option(None, "--fixtures", help="Mock fixtures json (only for --mode mock)"),
+    store_path: Optional[Path] = typer.Option(None, "--store", help="SQLite result store; finished parcels are recorded here"),
+    resume: bool = typer.Option(False, "--resume", help="Continue the last unfinished run for this input (needs --store)"),
+    cache_ttl_hours: Optional[float] = typer.Option(None, "--cache-ttl-hours", help="Reuse stored successes younger than this (needs --store)"),
+    workers: int = typer.Option(1, "--workers", min=1, help="Worker processes, each with its own engine and event loop"),
+    shard_by: str = typer.Option("county", "--shard-by", help="How parcels are split across --workers: county | hash"),
+    metrics_file: Optional[Path] = typer.Option(None, "--metrics-file", help="Prometheus text file, rewritten every 10s (node_exporter textfile collector)"),
+    metrics_port: Optional[int] = typer.Option(None, "--metrics-port", help="Serve Prometheus metrics on http://<metrics-host>:<port>/metrics during the run"),
+    metrics_host: str = typer.Option("127.0.0.1", "--metrics-host", help="Address for --metrics-port (unauthenticated; 0.0.0.0 exposes it to the network)"),
+    trace_path: Optional[Path] = typer.Option(None, "--trace", help="JSONL trace: per-parcel step timings, queue wait and normalize time"),
+    retries: int = typer.Option(2, "--retries", min=0, help="Re-queue transient failures (timeouts, resets) up to this many times at the end of the run"),
+    retry_backoff_s: float = typer.Option(2.0, "--retry-backoff", min=0.0, help="Base delay before a retry; doubles per attempt, with jitter"),
+    previous: Optional[Path] = typer.Option(
+        None, "--previous", exists=True, help="Previous run's output: only parcels due for a refresh (county `refresh` rules) are fetched"
+    ),
+    delta_path: Optional[Path] = typer.Option(None, "--delta", help="Changed fields per parcel, JSONL (default with --previous: <output>.delta.jsonl)"),
+    snapshots_dir: Optional[Path] = typer.Option(None, "--snapshots", help="Keep each parcel's detail page here (compressed, deduplicated) for `reextract`"),
+    recycle_pages: int = typer.Option(5000, "--recycle-pages", min=0, help="Restart the browser after this many fetches (0: never)"),
+    memory_ceiling_mb: Optional[float] = typer.Option(None, "--memory-ceiling-mb", help="Restart the browser once its RSS passes this"),
+    min_free_mb: float = typer.Option(512, "--min-free-mb", min=0, help="Open fewer browser contexts while the host has less memory available (0: off)"),
+    adaptive_timeouts: bool = typer.Option(
+        True, "--adaptive-timeouts/--fixed-timeouts", help="Size browser timeouts from each county's recent step latencies (p95)"
+    ),
 ):
     config_dir = Path(__file__).parent / "county_configs"
     county_configs = load_county_configs(config_dir)
 
-    parcels = load_parcels_from_excel(input_xlsx)
-    console.print(f"Loaded {len(parcels)} parcels from {input_xlsx}")
+    if (resume or cache_ttl_hours) and not store_path:
+        raise typer.BadParameter("--resume and --cache-ttl-hours need --store")
+    if shard_by not in ("county", "hash"):
+        raise typer.BadParameter("--shard-by must be one of: county, hash")
+    if delta_path and not previous:
+        raise typer.BadParameter("--delta needs --previous")
+    if previous and previous.resolve() == output_json.resolve():
+        raise typer.BadParameter("--previous must not be the --output file; write the new snapshot next to it")
 
-    async def _runner():
-        if mode == "mock":
-            if not fixtures_json or not fixtures_json.exists():
-                raise typer.BadParameter("mock mode requires --fixtures pointing to a fixtures json file")
-            fixtures = json.loads(fixtures_json.read_text())
-            engine = MockEngine(fixtures=fixtures)
-        else:
-            engine = PlaywrightEngine(headless=headless)
+    _check_format(output_format)
+
+    engine_opts = dict(
+        mode=mode,
+        kind=engine_kind,
+        headless=headless,
+        max_contexts=max_contexts,
+        fixtures_path=fixtures_json,
+        snapshots=snapshots_dir is not None,
+        recycle_pages=recycle_pages or None,
+        memory_ceiling_mb=memory_ceiling_mb,
+        min_free_mb=min_free_mb or None,
+        adaptive_timeouts=adaptive_timeouts,
+    )
+    try:
+        engine = build_engine(**engine_opts)
+    except ValueError as e:
+        raise typer.BadParameter(str(e))
+
+    store = ResultStore(store_path) if store_path else None
+    snapshots = SnapshotStore(snapshots_dir) if snapshots_dir and workers == 1 else None
+    ttl_s = cache_ttl_hours * 3600 if cache_ttl_hours else None
+    run = store.open_run(str(input_xlsx.resolve()), resume=resume, ttl_s=ttl_s) if store else None
+
+    # parcels stream from the input into the orchestrator; nothing is materialized up front
+    load_stats = LoadStats()
 
+    trace = JsonlWriter(trace_path) if trace_path else None
+    metrics = None
+    if metrics_file or metrics_port or trace:
+        metrics = RunMetrics(prom_path=metrics_file, trace=trace.write_line if trace else None, gauges=engine.stats)
+    server = serve_metrics(metrics, metrics_port, metrics_host) if metrics and metrics_port else None
+
+    # incremental runs: fresh parcels are carried over from the previous output, the rest fetched and diffed
+    incremental = None
+    delta = None
+    if previous:
+        try:
+            incremental = IncrementalRun(load_previous(previous), county_configs)
+        except (RuntimeError, ValueError) as e:
+            raise typer.BadParameter(f"--previous: {e}")
+        delta_path = delta_path or output_json.with_name(output_json.stem + ".delta.jsonl")
+        delta = JsonlWriter(delta_path)
+
+    async def _runner(writer: RecordWriter):
+        parcels = iter_parcels(input_xlsx, load_stats)
+        if incremental:
+            parcels = incremental.select(parcels, writer.write)
         await engine.start()
         try:
-            records = await run_scrape(parcels=parcels, county_configs=county_configs, engine=engine, max_concurrency=max_concurrency)
+            async for rec in iter_scrape(
+                parcels=parcels,
+                county_configs=county_configs,
+                engine=engine,
+                max_concurrency=max_concurrency,
+                store=run,
+                metrics=metrics,
+                retry=RetryPolicy(max_attempts=retries + 1, base_s=retry_backoff_s) if retries else None,
+                snapshots=snapshots,
+            ):
+                if incremental:
+                    rec, line = incremental.merge(rec)
+                    if line:
+                        delta.write_line(line)
+                writer.write(rec)
+            if incremental:
+                for line in incremental.removed():
+                    delta.write_line(line)
         finally:
             await engine.stop()
 
-        output_json.write_text(json.dumps([r.model_dump() for r in records], indent=2, default=str))
-        console.print(f"Wrote {len(records)} records to {output_json}")
+    if workers > 1 and shard_by == "county":
+        busy = len(county_workers((cfg.county for cfg in county_configs.values()), workers))
+        if busy < workers:
+            console.print(
+                f"[yellow]--shard-by county: the {len(county_configs)} configured counties land on {busy} of {workers} workers; "
+                "the rest will sit idle. --shard-by hash spreads every county over all workers.[/yellow]"
+            )
+
+    with _open_writer(output_json, output_format, raw_column) as writer:
+        if workers > 1:
+            spec = {
+                "workers": workers,
+                "shard_by": shard_by,
+                "config_dir": str(config_dir),
+                "input_path": str(input_xlsx),
+                "max_concurrency": max_concurrency,
+                "engine": engine_opts,
+                "store_path": str(store_path) if store_path else None,
+                "run_id": run.run_id if run else None,
+                "ttl_s": ttl_s,
+                "metrics": metrics is not None,
+                "trace": trace is not None,
+                "retries": retries,
+                "retry_backoff_s": retry_backoff_s,
+                "previous": str(previous) if previous else None,
+                "snapshots": str(snapshots_dir) if snapshots_dir else None,
+            }
+            summary: Dict[int, Dict[str, Any]] = {}
+            with Progress(TextColumn("Scraping parcels ({task.fields[workers]} workers)"), TextColumn("{task.completed}"), TimeElapsedColumn(), console=console) as progress:
+                t = progress.add_task("scrape", total=None, workers=workers)
+                for line in run_sharded(spec, summary=summary, metrics=metrics, on_delta=delta.write_line if delta else None):
+                    writer.write_line(line)
+                    progress.advance(t, 1)
+            hits = sum(s["hits"] for s in summary.values())
+            console.print(f"Loaded {sum(s['parcels'] for s in summary.values())} unique parcels from {input_xlsx} across {workers} workers")
+        else:
+            asyncio.run(_runner(writer))
+            hits = run.hits if run else 0
+            console.print(
+                f"Loaded {load_stats.parcels} parcels ({load_stats.rows} rows) from {input_xlsx} "
+                f"in {load_stats.elapsed:.2f}s ({load_stats.rows_per_s:,.0f} rows/s)"
+            )
+
+    if run:
+        run.finish()
+        store.close()
+        console.print(f"Reused {hits} stored results (run {run.run_id})")
+    if snapshots:
+        snapshots.close()
+        console.print(f"Saved {snapshots.saved} snapshots to {snapshots_dir} ({snapshots.deduped} already stored)")
+
+    if delta:
+        delta.close()
+        if workers > 1:
+            parts = [s["incremental"] for s in summary.values()]
+        else:
+            parts = [incremental.summary()]
+        due: Dict[str, int] = {}
+        for part in parts:
+            for reason, n in part["due"].items():
+                due[reason] = due.get(reason, 0) + n
+        totals = {k: sum(part[k] for part in parts) for k in ("carried", "changed", "kept", "removed")}
+        console.print(
+            f"Incremental: fetched {sum(due.values())} ({', '.join(f'{n} {r}' for r, n in sorted(due.items())) or 'none due'}), "
+            f"carried over {totals['carried']}; {totals['changed']} added/changed, {totals['kept']} kept after a failed refresh, "
+            f"{totals['removed']} removed. Delta: {delta_path}"
+        )
+
+    # browser lifecycle, for sizing hosts: per-worker stats are summed, peak RSS is the largest worker's
+    engine_stats = [s.get("engine", {}) for s in summary.values()] if workers > 1 else [engine.stats()]
+    pages = sum(s.get("pages_total", 0) for s in engine_stats)
+    if pages:
+        restarts = {r: sum(s.get(f"recycles_{r}", 0) for s in engine_stats) for r in ("pages", "memory", "crash")}
+        console.print(
+            f"Browser: {pages} fetches, {sum(restarts.values())} restarts ({', '.join(f'{n} {r}' for r, n in restarts.items())}), "
+            f"peak RSS {max(s.get('peak_browser_rss_mb', 0) for s in engine_stats):.0f} MB per worker"
+        )
+
+    if metrics:
+        metrics.flush()
+        for county, s in metrics.summary().items():
+            console.print(
+                f"{county}: {s['ok']}/{s['total']} ok ({s['success_rate']:.0%}), "
+                f"fetch p50 <= {s['p50_s']}s, p95 <= {s['p95_s']}s"
+            )
+    if trace:
+        trace.close()
+    if server:
+        server.shutdown()
+
+    _finish_output(output_json, output_format)
+    console.print(f"Wrote {writer.written} records to {output_json}")
+
+
+@app.command()
+def reextract(
+    snapshots_dir: Path = typer.Option(..., "--snapshots", exists=True, file_okay=False, help="Snapshot directory from `run --snapshots`"),
+    output_json: Path = typer.Option(Path("reextracted.json"), "--output"),
+    output_format: str = typer.Option("json", "--output-format", help="json | jsonl | parquet | arrow"),
+    raw_column: bool = typer.Option(True, "--raw-column/--no-raw-column", help="Keep raw page payloads as a JSON column (parquet/arrow)"),
+    counties: List[str] = typer.Option([], "--county", help="Only these counties (repeatable)"),
+    workers: int = typer.Option(1, "--workers", min=1, help="Extraction processes"),
+):
+    # re-runs the current YAML extract rules and normalizer over stored pages: no browser, no network.
+    # Records keep the time their page was fetched, so the output can be a later run's --previous.
+    county_configs = load_county_configs(Path(__file__).parent / "county_configs")
+    missing = [c for c in counties if c.lower() not in county_configs]
+    if missing:
+        raise typer.BadParameter(f"no county config for: {', '.join(missing)}")
+    _check_format(output_format)
+
+    store = SnapshotStore(snapshots_dir)
+    started = time.perf_counter()
+    try:
+        with _open_writer(output_json, output_format, raw_column) as writer:
+            lines = reextract_snapshots(store, {k: cfg.model_dump() for k, cfg in county_configs.items()}, counties=counties, workers=workers)
+            for line in lines:
+                writer.write_line(line)
+    finally:
+        store.close()
+    elapsed = time.perf_counter() - started
+    _finish_output(output_json, output_format)
+    console.print(f"Re-extracted {writer.written} parcels in {elapsed:.2f}s ({writer.written / elapsed if elapsed else 0:,.0f}/s); wrote {output_json}")
+
+
+@app.command()
+def serve(
+    host: str = typer.Option("127.0.0.1", "--host"),
+    port: int = typer.Option(8787, "--port"),
+    socket_path: Optional[Path] = typer.Option(None, "--socket", help="Listen on this Unix socket instead of TCP"),
+    headless: bool = typer.Option(True, "--headless/--headed", help="Run browser headless"),
+    max_concurrency: int = typer.Option(5, "--max-concurrency", min=1, max=1000, help="Shared across all jobs"),
+    max_contexts: int = typer.Option(100, "--max-contexts", min=1, help="Max browser contexts open at once (live mode)"),
+    mode: str = typer.Option("live", "--mode", help="live | mock"),
+    engine_kind: str = typer.Option("hybrid", "--engine", help="Live engine: hybrid | browser | http"),
+    fixtures_json: Optional[Path] = typer.Option(None, "--fixtures", help="Mock fixtures json (only for --mode mock)"),
+    retries: int = typer.Option(2, "--retries", min=0, help="Retries for transient failures within a job"),
+    retry_backoff_s: float = typer.Option(2.0, "--retry-backoff", min=0.0),
+    recycle_pages: int = typer.Option(5000, "--recycle-pages", min=0, help="Restart the browser after this many fetches (0: never)"),
+    memory_ceiling_mb: Optional[float] = typer.Option(None, "--memory-ceiling-mb", help="Restart the browser once its RSS passes this"),
+    min_free_mb: float = typer.Option(512, "--min-free-mb", min=0, help="Open fewer browser contexts while the host has less memory available (0: off)"),
+    adaptive_timeouts: bool = typer.Option(
+        True, "--adaptive-timeouts/--fixed-timeouts", help="Size browser timeouts from each county's recent step latencies (p95)"
+    ),
+):
+    # keeps the engine, warm browser contexts and county registry loaded between jobs:
+    #   curl -N -d '{"parcels": [{"county": "Brown", "parcel_number": "..."}]}' http://127.0.0.1:8787/scrape
+    from .daemon import ScrapeDaemon, serve_daemon
+
+    try:
+        engine = build_engine(
+            mode=mode,
+            kind=engine_kind,
+            headless=headless,
+            max_contexts=max_contexts,
+            fixtures_path=fixtures_json,
+            recycle_pages=recycle_pages or None,
+            memory_ceiling_mb=memory_ceiling_mb,
+            min_free_mb=min_free_mb or None,
+            adaptive_timeouts=adaptive_timeouts,
+        )
+    except ValueError as e:
+        raise typer.BadParameter(str(e))
+    daemon = ScrapeDaemon(
+        engine=engine,
+        county_configs=load_county_configs(Path(__file__).parent / "county_configs"),
+        max_concurrency=max_concurrency,
+        retry=RetryPolicy(max_attempts=retries + 1, base_s=retry_backoff_s) if retries else None,
+    )
+    try:
+        asyncio.run(serve_daemon(daemon, host=host, port=port, socket_path=socket_path, ready=lambda where: console.print(f"Serving on {where}")))
+    except KeyboardInterrupt:
+        pass
+
+
+@app.command()
+def bench(
+    engines: List[str] = typer.Option(["mock", "http"], "--engine", help="Engine(s) to benchmark: mock | http | browser | hybrid (repeatable)"),
+    concurrencies: List[int] = typer.Option([5, 20], "--concurrency", help="--max-concurrency value(s) to run (repeatable)"),
+    per_county: int = typer.Option(50, "--parcels-per-county", min=1),
+    latency_ms: float = typer.Option(0.0, "--latency-ms", help="Stand-in response delay"),
+    jitter_ms: float = typer.Option(0.0, "--jitter-ms"),
+    popup_rate: float = typer.Option(0.0, "--popup-rate", help="Share of landing pages that show a blocking disclaimer"),
+    failure_rate: float = typer.Option(0.0, "--failure-rate", help="Share of detail requests that answer 500"),
+    seed: Optional[int] = typer.Option(None, "--seed"),
+    headless: bool = typer.Option(True, "--headless/--headed"),
+    json_out: Optional[Path] = typer.Option(None, "--json-out", help="Write results as JSON (usable as a later --baseline)"),
+    baseline: Optional[Path] = typer.Option(None, "--baseline", exists=True, help="Fail when throughput drops against this --json-out file"),
+    max_regression: float = typer.Option(0.2, "--max-regression", help="Allowed parcels/s drop against --baseline"),
+):
+    # offline: every run goes against local stand-ins of the county portals
+    from rich.table import Table
+
+    from .bench import regressions, run_bench
+    from .standin import StandInOptions
+
+    options = StandInOptions(latency_ms=latency_ms, jitter_ms=jitter_ms, popup_rate=popup_rate, failure_rate=failure_rate, seed=seed)
+    county_configs = load_county_configs(Path(__file__).parent / "county_configs")
+    results = run_bench(engines=engines, concurrencies=concurrencies, county_configs=county_configs, per_county=per_county, options=options, headless=headless)
+
+    table = Table("engine", "concurrency", "parcels", "ok", "parcels/s", "p50 s", "p95 s", "peak RSS MB", "error")
+    for r in results:
+        table.add_row(
+            r.engine, str(r.concurrency), str(r.parcels), str(r.ok), f"{r.parcels_per_s:.1f}",
+            str(r.p50_s), str(r.p95_s), str(r.peak_rss_mb), r.error or "",
+        )
+    console.print(table)
+
+    if json_out:
+        json_out.write_text(json.dumps([r.as_dict() for r in results], indent=2))
+    if baseline:
+        found = regressions(results, json.loads(baseline.read_text()), max_drop=max_regression)
+        for line in found:
+            console.print(f"[red]regression[/red] {line}")
+        if found:
+            raise typer.Exit(1)
+
+
+@app.command()
+def standin(
+    port: int = typer.Option(8765, "--port"),
+    latency_ms: float = typer.Option(0.0, "--latency-ms"),
+    popup_rate: float = typer.Option(0.0, "--popup-rate"),
+    failure_rate: float = typer.Option(0.0, "--failure-rate"),
+):
+    # serve the stand-in portals for poking at county configs by hand
+    from .standin import STANDIN_COUNTIES, StandInOptions, StandInServer
 
-    asyncio.run(_runner())
+    server = StandInServer(StandInOptions(latency_ms=latency_ms, popup_rate=popup_rate, failure_rate=failure_rate), port=port)
+    for county, (path, _) in STANDIN_COUNTIES.items():
+        console.print(f"{county}: {server.url}{path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
 
 
 if __name__ == "__main__":
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import os
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional
+
+_PAGE_MB = os.sysconf("SC_PAGE_SIZE") / (1024 * 1024) if hasattr(os, "sysconf") else 4096 / (1024 * 1024)
+
+
+def _proc_children(pid: int) -> List[int]:
+    # Linux without psutil: walk /proc for the process tree
+    parents: Dict[int, List[int]] = {}
+    for stat in Path("/proc").glob("[0-9]*/stat"):
+        try:
+            # the command name can hold spaces and parens; ppid is the second field after the last ')'
+            fields = stat.read_text().rsplit(")", 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        parents.setdefault(int(fields[1]), []).append(int(stat.parent.name))
+    out: List[int] = []
+    todo = [pid]
+    while todo:
+        kids = parents.get(todo.pop(), [])
+        out += kids
+        todo += kids
+    return out
+
+
+def _proc_rss_mb(pid: int) -> float:
+    try:
+        return int(Path(f"/proc/{pid}/statm").read_text().split()[1]) * _PAGE_MB
+    except (OSError, IndexError, ValueError):
+        return 0.0
+
+
+def children_rss_mb(pid: Optional[int] = None) -> Optional[float]:
+    # RSS of every process below `pid` (default: this one), i.e. the Playwright driver and the browser.
+    # None when it can't be measured here (no psutil and no /proc).
+    pid = pid or os.getpid()
+    try:
+        import psutil
+    except ImportError:
+        if not Path("/proc/self/statm").exists():
+            return None
+        return sum(_proc_rss_mb(child) for child in _proc_children(pid))
+    total = 0
+    for child in psutil.Process(pid).children(recursive=True):
+        try:
+            total += child.memory_info().rss
+        except psutil.Error:
+            pass
+    return total / (1024 * 1024)
+
+
+def host_available_mb() -> Optional[float]:
+    try:
+        import psutil
+    except ImportError:
+        try:
+            for line in Path("/proc/meminfo").read_text().splitlines():
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+        except OSError:
+            pass
+        return None
+    return psutil.virtual_memory().available / (1024 * 1024)
+
+
+class MemoryGovernor:
+    # decides when to recycle the browser (after `recycle_pages` fetches, or once the browser's RSS passes
+    # `ceiling_mb`; the engine also recycles after a crash) and how many contexts may be open while the
+    # host is short of memory: the limit halves per sample while less than `min_free_mb` is available,
+    # and steps back up once twice that is free again
+    def __init__(
+        self,
+        *,
+        max_contexts: int,
+        recycle_pages: Optional[int] = None,
+        ceiling_mb: Optional[float] = None,
+        min_free_mb: Optional[float] = None,
+    ):
+        self.max_contexts = max_contexts
+        self.recycle_pages = recycle_pages
+        self.ceiling_mb = ceiling_mb
+        self.min_free_mb = min_free_mb
+        self.pages = 0
+        self.pages_total = 0
+        self.recycles: Counter = Counter()
+        self.rss_mb: Optional[float] = None
+        self.peak_rss_mb = 0.0
+        self.free_mb: Optional[float] = None
+
+    def page_done(self, n: int = 1) -> None:
+        self.pages += n
+        self.pages_total += n
+
+    def observe(self, rss_mb: Optional[float], free_mb: Optional[float]) -> None:
+        self.rss_mb = rss_mb
+        self.free_mb = free_mb
+        if rss_mb is not None:
+            self.peak_rss_mb = max(self.peak_rss_mb, rss_mb)
+
+    def recycle_reason(self) -> Optional[str]:
+        if self.recycle_pages and self.pages >= self.recycle_pages:
+            return "pages"
+        if self.ceiling_mb and self.rss_mb is not None and self.rss_mb > self.ceiling_mb:
+            return "memory"
+        return None
+
+    def recycled(self, reason: str) -> None:
+        self.recycles[reason] += 1
+        self.pages = 0
+        # the old browser's RSS is gone; the next sample measures the new one
+        self.rss_mb = None
+
+    @property
+    def under_pressure(self) -> bool:
+        return bool(self.min_free_mb) and self.free_mb is not None and self.free_mb < self.min_free_mb
+
+    def context_limit(self, current: int) -> int:
+        if not self.min_free_mb or self.free_mb is None:
+            return current
+        if self.under_pressure:
+            return max(1, current // 2)
+        if self.free_mb > 2 * self.min_free_mb and current < self.max_contexts:
+            return current + 1
+        return current
+
+    def stats(self) -> Dict[str, float]:
+        out: Dict[str, float] = {
+            "pages_since_recycle": self.pages,
+            "pages_total": self.pages_total,
+            "recycles_total": sum(self.recycles.values()),
+            "peak_browser_rss_mb": round(self.peak_rss_mb, 1),
+        }
+        for reason in ("pages", "memory", "crash"):
+            out[f"recycles_{reason}"] = self.recycles[reason]
+        if self.rss_mb is not None:
+            out["browser_rss_mb"] = round(self.rss_mb, 1)
+        if self.free_mb is not None:
+            out["host_available_mb"] = round(self.free_mb, 1)
+        return out
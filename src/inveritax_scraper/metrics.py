@@ -0,0 +1,288 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# (step name, perf_counter start, seconds)
+Span = Tuple[str, float, float]
+
+# seconds; portal fetches range from ~100ms (HTTP recipe) to a minute (slow browser workflow)
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+
+class Spans:
+    # per-fetch step timings; a perf_counter pair and a list append per step
+    def __init__(self) -> None:
+        self.items: List[Span] = []
+
+    @contextmanager
+    def step(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.items.append((name, started, time.perf_counter() - started))
+
+    def add(self, name: str, started: float) -> None:
+        self.items.append((name, started, time.perf_counter() - started))
+
+    def take(self) -> List[Span]:
+        out, self.items = self.items, []
+        return out
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, counts: List[int], total: float, count: int) -> None:
+        self.counts = [a + b for a, b in zip(self.counts, counts)]
+        self.sum += total
+        self.count += count
+
+    def quantile(self, q: float) -> Optional[float]:
+        # upper bound of the bucket holding the q-th observation
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+# metric name -> (label name for the third key part, help text)
+_HISTOGRAMS = {
+    "fetch_seconds": (None, "Engine fetch time per parcel"),
+    "queue_wait_seconds": (None, "Time a parcel waited for its county/global slot"),
+    "normalize_seconds": (None, "Normalization time per parcel"),
+    "step_seconds": ("step", "Time per engine workflow step"),
+    "wait_seconds": ("point", "Time per readiness wait point"),
+}
+
+
+class RunMetrics:
+    # aggregates per-county histograms and outcomes for a run. Exports to a Prometheus text file
+    # (`prom_path`, rewritten every `flush_every_s`) and/or a JSONL trace (`trace`, one line per fetch).
+    # Worker processes hand their snapshots to the parent through `on_flush` / `set_remote`.
+    # `gauges` (e.g. engine.stats) is read on every snapshot and exported as engine_* gauges.
+    def __init__(
+        self,
+        *,
+        prom_path: Optional[Path] = None,
+        trace: Optional[Callable[[str], None]] = None,
+        on_flush: Optional[Callable[[Dict[str, Any]], None]] = None,
+        flush_every_s: float = 10.0,
+        gauges: Optional[Callable[[], Dict[str, float]]] = None,
+    ):
+        self.prom_path = prom_path
+        self.trace = trace
+        self.on_flush = on_flush
+        self.flush_every_s = flush_every_s
+        self.gauges = gauges
+        self.counts: Dict[Tuple[str, str], int] = {}
+        self.hists: Dict[Tuple[str, str, str], Histogram] = {}
+        # (worker, gauge name) -> value; worker is "" for this process
+        self.gauge_values: Dict[Tuple[str, str], float] = {}
+        self.remote: Dict[int, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def _observe(self, name: str, county: str, label: str, value: float) -> None:
+        key = (name, county, label)
+        hist = self.hists.get(key)
+        if hist is None:
+            hist = self.hists[key] = Histogram()
+        hist.observe(value)
+
+    def record(
+        self,
+        county: str,
+        parcel_number: str,
+        *,
+        ok: bool,
+        fetch_s: float,
+        queue_wait_s: float = 0.0,
+        normalize_s: float = 0.0,
+        spans: Optional[List[Span]] = None,
+        timings: Optional[Dict[str, float]] = None,
+        started: Optional[float] = None,
+        error: Optional[str] = None,
+        failure: Optional[str] = None,
+    ) -> None:
+        county = county.lower()
+        with self._lock:
+            key = (county, "ok" if ok else "error")
+            self.counts[key] = self.counts.get(key, 0) + 1
+            self._observe("fetch_seconds", county, "", fetch_s)
+            self._observe("queue_wait_seconds", county, "", queue_wait_s)
+            self._observe("normalize_seconds", county, "", normalize_s)
+            for name, _, seconds in spans or ():
+                self._observe("step_seconds", county, name, seconds)
+            for point, seconds in (timings or {}).items():
+                self._observe("wait_seconds", county, point, seconds)
+
+        if self.trace:
+            origin = started if started is not None else (spans[0][1] if spans else 0.0)
+            self.trace(json.dumps({
+                "county": county,
+                "parcel_number": parcel_number,
+                "ok": ok,
+                "error": error,
+                "failure": failure,
+                "queue_wait_s": round(queue_wait_s, 6),
+                "fetch_s": round(fetch_s, 6),
+                "normalize_s": round(normalize_s, 6),
+                # offsets are relative to the start of the fetch
+                "steps": [{"step": n, "start_s": round(s - origin, 6), "seconds": round(d, 6)} for n, s, d in spans or ()],
+                "waits": {k: round(v, 6) for k, v in (timings or {}).items()},
+            }))
+
+        if time.monotonic() - self._last_flush >= self.flush_every_s:
+            self.flush()
+
+    def flush(self) -> None:
+        self._last_flush = time.monotonic()
+        if self.on_flush:
+            self.on_flush(self.snapshot())
+        if self.prom_path:
+            write_prometheus(self, self.prom_path)
+
+    def snapshot(self) -> Dict[str, Any]:
+        gauges = self.gauges() if self.gauges else {}
+        with self._lock:
+            return {
+                "counts": [[c, o, n] for (c, o), n in self.counts.items()],
+                "hists": [[name, c, label, list(h.counts), h.sum, h.count] for (name, c, label), h in self.hists.items()],
+                "gauges": gauges,
+            }
+
+    def set_remote(self, worker: int, snapshot: Dict[str, Any]) -> None:
+        # snapshots are cumulative, so the latest one per worker replaces the previous
+        with self._lock:
+            self.remote[worker] = snapshot
+        if self.prom_path:
+            write_prometheus(self, self.prom_path)
+
+    def merged(self) -> "RunMetrics":
+        out = RunMetrics()
+        local = self.snapshot()
+        with self._lock:
+            remote = [(str(worker), snap) for worker, snap in self.remote.items()]
+        for worker, snap in [("", local), *remote]:
+            for name, value in snap.get("gauges", {}).items():
+                out.gauge_values[(worker, name)] = value
+            for county, outcome, n in snap["counts"]:
+                out.counts[(county, outcome)] = out.counts.get((county, outcome), 0) + n
+            for name, county, label, counts, total, count in snap["hists"]:
+                key = (name, county, label)
+                if key not in out.hists:
+                    out.hists[key] = Histogram()
+                out.hists[key].merge(counts, total, count)
+        return out
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        # per county: totals, success rate and approximate fetch latency quantiles
+        m = self.merged()
+        out: Dict[str, Dict[str, Any]] = {}
+        for county in sorted({c for c, _ in m.counts}):
+            ok = m.counts.get((county, "ok"), 0)
+            total = ok + m.counts.get((county, "error"), 0)
+            hist = m.hists.get(("fetch_seconds", county, ""))
+            out[county] = {
+                "total": total,
+                "ok": ok,
+                "success_rate": ok / total if total else 0.0,
+                "p50_s": hist.quantile(0.5) if hist else None,
+                "p95_s": hist.quantile(0.95) if hist else None,
+            }
+        return out
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: str) -> str:
+    parts = ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items() if v != "")
+    return "{" + parts + "}" if parts else ""
+
+
+def prometheus_text(metrics: RunMetrics, prefix: str = "inveritax_") -> str:
+    m = metrics.merged()
+    lines = [f"# HELP {prefix}fetches_total Finished parcels by outcome", f"# TYPE {prefix}fetches_total counter"]
+    for (county, outcome), n in sorted(m.counts.items()):
+        lines.append(f"{prefix}fetches_total{_labels(county=county, outcome=outcome)} {n}")
+
+    for name, (label_name, help_text) in _HISTOGRAMS.items():
+        keys = sorted(k for k in m.hists if k[0] == name)
+        if not keys:
+            continue
+        metric = prefix + name
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} histogram"]
+        for key in keys:
+            _, county, label = key
+            hist = m.hists[key]
+            base = {"county": county, **({label_name: label} if label_name else {})}
+            cumulative = 0
+            for bound, n in zip(hist.buckets + (float("inf"),), hist.counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{metric}_bucket{_labels(**base, le=le)} {cumulative}")
+            lines.append(f"{metric}_sum{_labels(**base)} {hist.sum}")
+            lines.append(f"{metric}_count{_labels(**base)} {hist.count}")
+
+    for name in sorted({n for _, n in m.gauge_values}):
+        metric = f"{prefix}engine_{name}"
+        lines.append(f"# TYPE {metric} gauge")
+        for (worker, n), value in sorted(m.gauge_values.items()):
+            if n == name:
+                lines.append(f"{metric}{_labels(worker=worker)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(metrics: RunMetrics, path: Path) -> None:
+    # node_exporter's textfile collector may read at any moment, so replace the file atomically
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(prometheus_text(metrics), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def serve_metrics(metrics: RunMetrics, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    # /metrics for a Prometheus scrape while the run is going; call .shutdown() when done.
+    # There is no auth, so it only listens on loopback unless the caller picks a wider host.
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # noqa: N802
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = prometheus_text(metrics).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args: Any) -> None:
+            return None
+
+    server = ThreadingHTTPServer((host, port), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -38,3 +38,6 @@ class NormalizedTaxRecord(BaseModel):
     scrape_timestamp_utc: Optional[str] = None
     raw: Dict[str, Any] = Field(default_factory=dict)
     errors: List[str] = Field(default_factory=list)
+    failure_class: Optional[str] = None  # transient | site_down | not_found | error
+    attempts: int = 1
+    retry_errors: List[str] = Field(default_factory=list)  # errors from earlier attempts, oldest first
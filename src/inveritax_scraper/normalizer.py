@@ -1,13 +1,14 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Any, Dict, Optional, List
+from typing import Any, Dict, Iterable, Optional, List, Sequence, Tuple
 import re
 
 from .models import NormalizedTaxRecord, Installment
 
 
 _money_re = re.compile(r"[-+]?\$?\s*([0-9]{1,3}(?:,[0-9]{3})*(?:\.[0-9]+)?|[0-9]+(?:\.[0-9]+)?)")
+_years_split_re = re.compile(r"[;,\s]+")
 
 
 def _parse_money(val: Any) -> Optional[float]:
@@ -23,36 +24,133 @@ def _parse_money(val: Any) -> Optional[float]:
         return None
 
 
-def normalize_raw(county: str, parcel_number: str, raw: Dict[str, Any], source_url: Optional[str]) -> NormalizedTaxRecord:
-    rec = NormalizedTaxRecord(county=county, parcel_number=parcel_number)
-    rec.source_url = source_url
-    rec.scrape_timestamp_utc = datetime.utcnow().isoformat(timespec="seconds") + "Z"
-    rec.raw = raw
+# normalized field -> raw keys tried in order; the first truthy value wins (same as `a or b or c`).
+# These are intentionally heuristic, because each county labels fields differently; a county's
+# field_mapping puts its own page fields in front of them.
+DEFAULT_ALIASES: Dict[str, Tuple[str, ...]] = {
+    "delinquent_status": ("delinquent_status", "status", "tax_status"),
+    "delinquent_amount": ("delinquent_amount", "amount_delinquent", "delinquent"),
+    "penalties_interest": ("penalties_interest", "interest", "penalty"),
+    "delinquent_tax_years": ("delinquent_years", "tax_years_delinquent"),
+    "current_year_total_tax": ("current_year_total_tax", "current_year_tax", "total_tax"),
+}
+DEFAULT_INSTALLMENTS: Tuple[str, ...] = ("first_half_amount", "second_half_amount", "installment_1", "installment_2")
 
-    # These are intentionally heuristic, because each county labels fields differently.
-    # In production you'd tighten these via per-county field_mapping.
-    status = raw.get("delinquent_status") or raw.get("status") or raw.get("tax_status")
-    if status:
-        rec.delinquent_status = str(status).strip().lower()
+MONEY_FIELDS = ("delinquent_amount", "penalties_interest", "current_year_total_tax")
+# valid field_mapping targets
+NORMALIZED_FIELDS = tuple(DEFAULT_ALIASES) + ("installments",)
 
-    rec.delinquent_amount = _parse_money(raw.get("delinquent_amount") or raw.get("amount_delinquent") or raw.get("delinquent"))
-    rec.penalties_interest = _parse_money(raw.get("penalties_interest") or raw.get("interest") or raw.get("penalty"))
 
-    years = raw.get("delinquent_years") or raw.get("tax_years_delinquent")
-    if years:
-        if isinstance(years, list):
-            rec.delinquent_tax_years = [str(y).strip() for y in years if str(y).strip()]
+class NormalizePlan:
+    def __init__(self, aliases: Dict[str, Tuple[str, ...]], installments: Tuple[str, ...]):
+        self.aliases = aliases
+        # (raw key, label) pairs in output order
+        self.installment_labels = tuple((k, k.replace("_", " ")) for k in installments)
+
+
+_plans: Dict[Tuple[Tuple[str, str], ...], NormalizePlan] = {}
+
+
+def compile_plan(field_mapping: Optional[Dict[str, str]] = None) -> NormalizePlan:
+    # field_mapping is {page field: normalized field}; compiled once per distinct mapping
+    key = tuple((field_mapping or {}).items())
+    plan = _plans.get(key)
+    if plan is None:
+        mapped: Dict[str, List[str]] = {}
+        for page_field, target in key:
+            if target not in NORMALIZED_FIELDS:
+                raise ValueError(f"field_mapping: unknown normalized field {target!r} for {page_field!r}")
+            mapped.setdefault(target, []).append(page_field)
+        aliases = {f: tuple(mapped.get(f, ())) + tuple(k for k in keys if k not in mapped.get(f, ())) for f, keys in DEFAULT_ALIASES.items()}
+        installments = tuple(mapped.get("installments", ())) + tuple(k for k in DEFAULT_INSTALLMENTS if k not in mapped.get("installments", ()))
+        plan = _plans[key] = NormalizePlan(aliases, installments)
+    return plan
+
+
+def _first(raw: Dict[str, Any], keys: Tuple[str, ...]) -> Any:
+    val = None
+    for k in keys:
+        val = raw.get(k)
+        if val:
+            return val
+    return val
+
+
+def _money_column(values: Iterable[Any], cache: Dict[str, Optional[float]]) -> List[Optional[float]]:
+    # tax pages repeat the same few amounts ("0.00", "$0.00", ...) so each distinct string is parsed once
+    out: List[Optional[float]] = []
+    for val in values:
+        if val is None:
+            out.append(None)
+            continue
+        s = str(val)
+        if s not in cache:
+            cache[s] = _parse_money(s)
+        out.append(cache[s])
+    return out
+
+
+def _years_column(values: Iterable[Any]) -> List[List[str]]:
+    out: List[List[str]] = []
+    for years in values:
+        if not years:
+            out.append([])
+        elif isinstance(years, list):
+            out.append([str(y).strip() for y in years if str(y).strip()])
         else:
-            rec.delinquent_tax_years = [y.strip() for y in re.split(r"[;,\s]+", str(years)) if y.strip()]
+            out.append([y.strip() for y in _years_split_re.split(str(years)) if y.strip()])
+    return out
+
+
+def normalize_batch(
+    items: Sequence[Tuple[str, str, Dict[str, Any], Optional[str]]],
+    field_mapping: Optional[Dict[str, str]] = None,
+) -> List[NormalizedTaxRecord]:
+    # items are (county, parcel_number, raw, source_url); fields are resolved column by column over the batch
+    plan = compile_plan(field_mapping)
+    raws = [raw for _, _, raw, _ in items]
+    columns = {field: [_first(raw, keys) for raw in raws] for field, keys in plan.aliases.items()}
+
+    cache: Dict[str, Optional[float]] = {}
+    money = {field: _money_column(columns[field], cache) for field in MONEY_FIELDS}
+    years = _years_column(columns["delinquent_tax_years"])
+    statuses = [str(s).strip().lower() if s else None for s in columns["delinquent_status"]]
 
-    rec.current_year_total_tax = _parse_money(raw.get("current_year_total_tax") or raw.get("current_year_tax") or raw.get("total_tax"))
+    stamp = datetime.utcnow().isoformat(timespec="seconds") + "Z"
+    records: List[NormalizedTaxRecord] = []
+    for i, (county, parcel_number, raw, source_url) in enumerate(items):
+        installments = []
+        for k, label in plan.installment_labels:
+            if k in raw and raw.get(k) is not None:
+                installments.append(Installment.model_construct(label=label, amount=_money_column((raw[k],), cache)[0]))
+        # values are already typed above, so skip per-record validation. Every list field is passed
+        # explicitly: model_construct resolving a default_factory costs ~0.3ms of signature inspection each.
+        records.append(
+            NormalizedTaxRecord.model_construct(
+                county=county,
+                parcel_number=parcel_number,
+                delinquent_status=statuses[i],
+                delinquent_amount=money["delinquent_amount"][i],
+                delinquent_tax_years=years[i],
+                delinquent_installments=[],
+                penalties_interest=money["penalties_interest"][i],
+                current_year_total_tax=money["current_year_total_tax"][i],
+                installments=installments,
+                source_url=source_url,
+                scrape_timestamp_utc=stamp,
+                raw=raw,
+                errors=[],
+                retry_errors=[],
+            )
+        )
+    return records
 
-    # Installments
-    installments: List[Installment] = []
-    for k in ["first_half_amount", "second_half_amount", "installment_1", "installment_2"]:
-        if k in raw and raw.get(k) is not None:
-            label = k.replace("_", " ")
-            installments.append(Installment(label=label, amount=_parse_money(raw.get(k))))
-    rec.installments = installments
 
-    return rec
+def normalize_raw(
+    county: str,
+    parcel_number: str,
+    raw: Dict[str, Any],
+    source_url: Optional[str],
+    field_mapping: Optional[Dict[str, str]] = None,
+) -> NormalizedTaxRecord:
+    return normalize_batch([(county, parcel_number, raw, source_url)], field_mapping)[0]
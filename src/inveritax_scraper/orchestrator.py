@@ -1,52 +1,314 @@
 from __future__ import annotations
 
 import asyncio
-from collections import defaultdict
-from typing import Dict, List, Tuple
+import time
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Set, Tuple
 
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, BarColumn, TextColumn, TimeElapsedColumn
 
 from .models import ParcelInput, NormalizedTaxRecord
-from .engine import ScrapeEngine
+from .engine import ScrapeEngine, ScrapeResult
 from .config import CountyConfig
-from .normalizer import normalize_raw
+from .failures import ERROR, SITE_DOWN, TRANSIENT, RetryPolicy, classify_error
+from .input_loader import dedupe_parcels
+from .metrics import RunMetrics
+from .normalizer import normalize_batch, normalize_raw
+from .scheduler import CountyQueues
+from .snapshots import SnapshotStore
+from .store import StoreRun
+from .throttle import FETCH, PROBE, SHED, CircuitBreaker, CountyThrottle
 
 
 console = Console()
 
 
-async def run_scrape(
+async def iter_scrape(
     *,
-    parcels: List[ParcelInput],
+    parcels: Iterable[ParcelInput],
     county_configs: Dict[str, CountyConfig],
     engine: ScrapeEngine,
     max_concurrency: int = 5,
-) -> List[NormalizedTaxRecord]:
-    # group by county
-    groups: Dict[str, List[ParcelInput]] = defaultdict(list)
-    for p in parcels:
-        groups[p.county.lower()].append(p)
+    store: Optional[StoreRun] = None,
+    show_progress: bool = True,
+    metrics: Optional[RunMetrics] = None,
+    retry: Optional[RetryPolicy] = None,
+    throttles: Optional[Dict[str, CountyThrottle]] = None,
+    slots: Optional[asyncio.Semaphore] = None,
+    snapshots: Optional[SnapshotStore] = None,
+    breakers: Optional[Dict[str, CircuitBreaker]] = None,
+) -> AsyncIterator[NormalizedTaxRecord]:
+    # yields each record as soon as its parcel finishes, so callers can stream output.
+    # `parcels` is consumed lazily, so fetching starts while a large input is still being read.
+    # With `retry`, failures it covers are re-queued once every other parcel has had its first
+    # attempt; the parcel's record is only emitted when it settles.
+    # A long-running caller (the serve daemon) passes its own `throttles`, `slots` and `breakers` so
+    # concurrent calls share one per-county and global budget, and one view of which portals are down.
+    # With `snapshots`, the documents an engine kept on its results are saved for `reextract`.
+    sem = slots or asyncio.Semaphore(max_concurrency)
+    done: asyncio.Queue[Optional[NormalizedTaxRecord]] = asyncio.Queue()
 
-    sem = asyncio.Semaphore(max_concurrency)
-    out: List[NormalizedTaxRecord] = []
+    # each county gets its own concurrency/rate budget so one slow portal can't take every slot
+    if throttles is None:
+        throttles = {}
+    if breakers is None:
+        breakers = {}
+    cfg_dicts: Dict[str, Dict[str, Any]] = {}
 
-    async def _one(parcel: ParcelInput) -> None:
-        async with sem:
-            cfg = county_configs.get(parcel.county.lower())
+    def _throttle(key: str) -> CountyThrottle:
+        if key not in throttles:
+            throttles[key] = CountyThrottle.from_cfg(county_configs[key].limits.model_dump(), default_max=max_concurrency)
+        if key not in cfg_dicts:
+            cfg_dicts[key] = county_configs[key].model_dump()
+        return throttles[key]
+
+    def _breaker(key: str) -> Optional[CircuitBreaker]:
+        if key not in breakers:
+            cfg = county_configs.get(key)
             if not cfg:
-                rec = NormalizedTaxRecord(county=parcel.county, parcel_number=parcel.parcel_number, errors=[f"No county config for {parcel.county}"])
-                out.append(rec)
-                return
-            res = await engine.fetch(base_url=cfg.base_url, cfg=cfg.model_dump(), parcel=parcel)
-            if not res.ok:
-                rec = NormalizedTaxRecord(county=parcel.county, parcel_number=parcel.parcel_number, source_url=res.source_url, errors=[res.error or "Unknown error"])
-                out.append(rec)
-                return
-            rec = normalize_raw(parcel.county, parcel.parcel_number, res.data, res.source_url)
-            out.append(rec)
-
-    tasks = []
+                return None
+            breakers[key] = CircuitBreaker.from_cfg(cfg.breaker.model_dump())
+        return breakers[key]
+
+    def _failure(res: ScrapeResult) -> Optional[str]:
+        return None if res.ok else res.failure or classify_error(res.error)
+
+    def _congested(res: ScrapeResult) -> bool:
+        # AIMD backs off on timeouts and outages, not on parcels the portal simply doesn't have
+        return _failure(res) in (TRANSIENT, SITE_DOWN)
+
+    def _keep(parcel: ParcelInput, res: ScrapeResult) -> None:
+        if snapshots and res.snapshot:
+            snapshots.save(parcel.county, parcel.parcel_number, res.snapshot, source=res.snapshot_source or "browser", source_url=res.source_url)
+            res.snapshot = None
+
+    def _error(parcel: ParcelInput, res: ScrapeResult) -> NormalizedTaxRecord:
+        error = res.error or "Unknown error"
+        if res.step:
+            error = f"{res.step}: {error}"
+        return NormalizedTaxRecord(
+            county=parcel.county, parcel_number=parcel.parcel_number, source_url=res.source_url, errors=[error], failure_class=_failure(res)
+        )
+
+    async def _one(parcel: ParcelInput) -> NormalizedTaxRecord:
+        key = parcel.county.lower()
+        cfg = county_configs.get(key)
+        if not cfg:
+            return NormalizedTaxRecord(
+                county=parcel.county, parcel_number=parcel.parcel_number, errors=[f"No county config for {parcel.county}"], failure_class=ERROR
+            )
+        throttle = _throttle(key)
+        queued = time.perf_counter()
+        async with throttle.slot():
+            async with sem:
+                started = time.perf_counter()
+                res = await engine.fetch(base_url=cfg.base_url, cfg=cfg_dicts[key], parcel=parcel)
+            fetch_s = time.perf_counter() - started
+            await throttle.record(not _congested(res), fetch_s)
+        _keep(parcel, res)
+        normalized = time.perf_counter()
+        rec = normalize_raw(parcel.county, parcel.parcel_number, res.data, res.source_url, cfg.field_mapping) if res.ok else _error(parcel, res)
+        if metrics:
+            metrics.record(
+                key,
+                parcel.parcel_number,
+                ok=res.ok,
+                fetch_s=fetch_s,
+                queue_wait_s=started - queued,
+                normalize_s=time.perf_counter() - normalized,
+                spans=res.spans,
+                timings=res.timings,
+                started=started,
+                error=res.error,
+                failure=_failure(res),
+            )
+        return rec
+
+    # re-queued parcels wait for this: set once the input is read and every first attempt has settled
+    drain = asyncio.Event()
+    first_pass = 0
+    feeding = True
+    tasks: Set[asyncio.Task] = set()
+
+    def _ready(key: str) -> bool:
+        breaker = breakers.get(key)
+        if breaker and breaker.state != breaker.CLOSED:
+            return breaker.ready()
+        throttle = throttles.get(key)
+        return throttle is None or throttle.limiter.in_use < throttle.limiter.limit
+
+    def _priority(key: str) -> int:
+        cfg = county_configs.get(key)
+        return cfg.limits.priority if cfg else 0
+
+    # read-ahead is bounded so memory stays flat however large the input is; counties are interleaved
+    # across whatever has been read ahead, which covers a whole typical county-sorted input file
+    queues = CountyQueues(max(10_000, 100 * max_concurrency), ready=_ready, priority=_priority)
+
+    async def _requeue(parcel: ParcelInput, attempt: int, history: Tuple[str, ...]) -> None:
+        await drain.wait()
+        await asyncio.sleep(retry.delay(attempt - 1))
+        await queues.put(parcel.county.lower(), (parcel, attempt, history), block=False)
+
+    def _settle(parcel: ParcelInput, rec: NormalizedTaxRecord, attempt: int, history: Tuple[str, ...]) -> None:
+        # every parcel must emit exactly one record or the consumer below would wait forever
+        if rec.errors and retry and retry.should_retry(rec.failure_class, attempt):
+            task = asyncio.create_task(_requeue(parcel, attempt + 1, history + (rec.errors[0],)))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            return
+        rec.attempts = attempt
+        rec.retry_errors = list(history)
+        if store:
+            store.save(rec)
+        done.put_nowait(rec)
+
+    async def _wrapped(parcel: ParcelInput, attempt: int, history: Tuple[str, ...]) -> NormalizedTaxRecord:
+        try:
+            rec = await _one(parcel)
+        except Exception as e:
+            rec = NormalizedTaxRecord(county=parcel.county, parcel_number=parcel.parcel_number, errors=[f"Unhandled error: {e}"], failure_class=ERROR)
+        _settle(parcel, rec, attempt, history)
+        return rec
+
+    async def _wrapped_batch(key: str, todo: List[ParcelInput]) -> List[NormalizedTaxRecord]:
+        # search-loop counties: one warm page runs many searches back to back, holding a
+        # single county/global slot for the whole batch. Emits exactly len(todo) records.
+        cfg = county_configs[key]
+        try:
+            throttle = _throttle(key)
+            queued = time.perf_counter()
+            async with throttle.slot():
+                async with sem:
+                    started = time.perf_counter()
+                    results = await engine.fetch_batch(base_url=cfg.base_url, cfg=cfg_dicts[key], parcels=todo)
+                # AIMD sees the per-parcel latency so batch size doesn't look like congestion
+                fetch_s = (time.perf_counter() - started) / len(todo)
+                await throttle.record(not any(_congested(r) for r in results), fetch_s)
+            for p, r in zip(todo, results):
+                _keep(p, r)
+            normalized_at = time.perf_counter()
+            ok = [(p.county, p.parcel_number, r.data, r.source_url) for p, r in zip(todo, results) if r.ok]
+            normalized = iter(normalize_batch(ok, cfg.field_mapping))
+            recs = [next(normalized) if r.ok else _error(p, r) for p, r in zip(todo, results)]
+            if metrics:
+                normalize_s = (time.perf_counter() - normalized_at) / len(todo)
+                for p, r in zip(todo, results):
+                    metrics.record(
+                        key,
+                        p.parcel_number,
+                        ok=r.ok,
+                        fetch_s=fetch_s,
+                        queue_wait_s=started - queued,
+                        normalize_s=normalize_s,
+                        spans=r.spans,
+                        timings=r.timings,
+                        error=r.error,
+                        failure=_failure(r),
+                    )
+        except Exception as e:
+            recs = [
+                NormalizedTaxRecord(county=p.county, parcel_number=p.parcel_number, errors=[f"Unhandled error: {e}"], failure_class=ERROR)
+                for p in todo
+            ]
+        # retries of batched parcels go through the single-parcel path
+        for parcel, rec in zip(todo, recs):
+            _settle(parcel, rec, 1, ())
+        return recs
+
+    def _shed(breaker: CircuitBreaker, item: Any) -> None:
+        # the county's breaker is open: settle without a fetch
+        error = f"circuit open: {breaker.failures} timeouts/outages in a row, not fetched"
+        for parcel, attempt, history in [(p, 1, ()) for p in item] if isinstance(item, list) else [item]:
+            rec = NormalizedTaxRecord(county=parcel.county, parcel_number=parcel.parcel_number, errors=[error], failure_class=SITE_DOWN)
+            _settle(parcel, rec, attempt, history)
+
+    def _trip(key: str, breaker: CircuitBreaker, recs: List[NormalizedTaxRecord], probe: bool) -> None:
+        was = breaker.state
+        # a batch counts as healthy when the portal answered any of it
+        breaker.record(any(r.failure_class not in (TRANSIENT, SITE_DOWN) for r in recs), probe=probe)
+        tripped = was == breaker.CLOSED and breaker.state == breaker.OPEN
+        recovered = was != breaker.CLOSED and breaker.state == breaker.CLOSED
+        if not show_progress or not (tripped or recovered):
+            return
+        county = county_configs[key].county
+        if recovered:
+            console.print(f"[green]{county}: portal is answering again, resuming[/green]")
+        else:
+            action = "failing its parcels fast" if breaker.on_open == "fail" else "parking its parcels"
+            console.print(f"[yellow]{county}: {breaker.failures} timeouts/outages in a row; {action} and probing in {breaker.cooldown_s:g}s[/yellow]")
+
+    async def _worker() -> None:
+        # a work item is a batch (search-loop counties) or (parcel, attempt, retry history)
+        nonlocal first_pass
+        while True:
+            key, item = await queues.get()
+            breaker = _breaker(key)
+            # decided before any await, so only one worker takes a half-open breaker's probe
+            admit = breaker.admit() if breaker else FETCH
+            if admit == SHED:
+                _shed(breaker, item)
+            else:
+                finished = False
+                try:
+                    recs = await _wrapped_batch(key, item) if isinstance(item, list) else [await _wrapped(*item)]
+                    finished = True
+                finally:
+                    # a cancelled probe (a daemon client hung up) would leave a shared breaker half-open for good
+                    if admit == PROBE and not finished:
+                        breaker.abandon()
+                if breaker:
+                    _trip(key, breaker, recs, admit == PROBE)
+            first = isinstance(item, list) or item[1] == 1
+            if first:
+                first_pass -= 1
+                if not first_pass and not feeding:
+                    drain.set()
+            # the county slot this item held is free again
+            await queues.wake()
+
+    submitted = 0
+
+    def _batch_size(key: str) -> int:
+        cfg = county_configs.get(key)
+        return engine.batch_size(cfg.model_dump()) if cfg else 0
+
+    async def _put(key: str, item: Any) -> None:
+        nonlocal first_pass
+        first_pass += 1
+        await queues.put(key, item)
+
+    async def _feed() -> None:
+        nonlocal submitted, feeding
+        batch_sizes: Dict[str, int] = {}
+        pending: Dict[str, List[ParcelInput]] = {}
+        try:
+            for parcel in dedupe_parcels(parcels):
+                submitted += 1
+                if submitted % 500 == 0:
+                    # let fetches get going while the rest of the input is read
+                    await asyncio.sleep(0)
+                cached = store.lookup(parcel.county, parcel.parcel_number) if store else None
+                if cached:
+                    done.put_nowait(cached)
+                    continue
+                key = parcel.county.lower()
+                if key not in batch_sizes:
+                    batch_sizes[key] = _batch_size(key)
+                if batch_sizes[key] > 1:
+                    pending.setdefault(key, []).append(parcel)
+                    if len(pending[key]) >= batch_sizes[key]:
+                        await _put(key, pending.pop(key))
+                else:
+                    await _put(key, (parcel, 1, ()))
+            for key, batch in pending.items():
+                await _put(key, batch)
+        finally:
+            feeding = False
+            if not first_pass:
+                drain.set()
+            done.put_nowait(None)
+
     with Progress(
         SpinnerColumn(),
         TextColumn("[progress.description]{task.description}"),
@@ -54,14 +316,58 @@ async def run_scrape(
         TextColumn("{task.completed}/{task.total}"),
         TimeElapsedColumn(),
         console=console,
+        disable=not show_progress,
     ) as progress:
-        total = len(parcels)
-        t = progress.add_task("Scraping parcels", total=total)
-        for parcel in parcels:
-            async def _wrapped(p=parcel):
-                await _one(p)
-                progress.advance(t, 1)
-            tasks.append(asyncio.create_task(_wrapped()))
-        await asyncio.gather(*tasks)
-
-    return out
+        t = progress.add_task("Scraping parcels", total=None)
+        workers = [asyncio.create_task(_worker()) for _ in range(max(1, max_concurrency))]
+        feeder = asyncio.create_task(_feed())
+        fed = False
+        emitted = 0
+        shown = time.monotonic()
+        try:
+            while not (fed and emitted == submitted):
+                rec = await done.get()
+                if rec is None:
+                    fed = True
+                    progress.update(t, total=submitted, completed=emitted)
+                    continue
+                emitted += 1
+                # Rich re-renders on every update; a few times a second is plenty for a 200k-parcel run
+                if show_progress and time.monotonic() - shown >= 0.2:
+                    shown = time.monotonic()
+                    progress.update(t, completed=emitted)
+                yield rec
+            progress.update(t, completed=emitted)
+            await feeder
+        finally:
+            feeder.cancel()
+            for task in workers + list(tasks):
+                task.cancel()
+
+
+async def run_scrape(
+    *,
+    parcels: Iterable[ParcelInput],
+    county_configs: Dict[str, CountyConfig],
+    engine: ScrapeEngine,
+    max_concurrency: int = 5,
+    store: Optional[StoreRun] = None,
+    metrics: Optional[RunMetrics] = None,
+    retry: Optional[RetryPolicy] = None,
+    snapshots: Optional[SnapshotStore] = None,
+    breakers: Optional[Dict[str, CircuitBreaker]] = None,
+) -> List[NormalizedTaxRecord]:
+    return [
+        rec
+        async for rec in iter_scrape(
+            parcels=parcels,
+            county_configs=county_configs,
+            engine=engine,
+            max_concurrency=max_concurrency,
+            store=store,
+            metrics=metrics,
+            retry=retry,
+            snapshots=snapshots,
+            breakers=breakers,
+        )
+    ]
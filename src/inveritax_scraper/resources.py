@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, List, Optional
+
+from playwright.async_api import BrowserContext, Route
+
+
+# Asset types extraction never reads. Stylesheets stay allowed because visibility checks depend on layout.
+DEFAULT_BLOCK_RESOURCES: List[str] = ["image", "font", "media"]
+
+# Analytics, tag managers and map tiles seen on the GCS / Ascent / LandNav portals.
+DEFAULT_BLOCK_URL_PATTERNS: List[str] = [
+    r"google-analytics\.com",
+    r"googletagmanager\.com",
+    r"doubleclick\.net",
+    r"connect\.facebook\.net",
+    r"hotjar\.com",
+    r"clarity\.ms",
+    r"nr-data\.net",
+    r"js-agent\.newrelic\.com",
+    r"arcgisonline\.com",
+    r"tile\.openstreetmap\.org",
+    r"/MapServer/(tile|export)",
+]
+
+
+class ResourceBlocker:
+    def __init__(
+        self,
+        *,
+        block_resources: Optional[List[str]] = None,
+        block_url_patterns: Optional[List[str]] = None,
+        allow_url_patterns: Optional[List[str]] = None,
+    ):
+        self.block_resources = set(DEFAULT_BLOCK_RESOURCES if block_resources is None else block_resources)
+        patterns = DEFAULT_BLOCK_URL_PATTERNS if block_url_patterns is None else block_url_patterns
+        self.block_url = re.compile("|".join(patterns)) if patterns else None
+        self.allow_url = re.compile("|".join(allow_url_patterns)) if allow_url_patterns else None
+        self.blocked = 0
+
+    @classmethod
+    def from_cfg(cls, cfg: Dict[str, Any]) -> "ResourceBlocker":
+        policy = cfg.get("resources") or {}
+        return cls(
+            block_resources=policy.get("block_resources"),
+            block_url_patterns=policy.get("block_url_patterns"),
+            allow_url_patterns=policy.get("allow_url_patterns"),
+        )
+
+    @property
+    def active(self) -> bool:
+        return bool(self.block_resources or self.block_url)
+
+    def should_block(self, resource_type: str, url: str) -> bool:
+        if self.allow_url and self.allow_url.search(url):
+            return False
+        if resource_type in self.block_resources:
+            return True
+        return bool(self.block_url and self.block_url.search(url))
+
+    async def install(self, context: BrowserContext) -> None:
+        if self.active:
+            await context.route("**/*", self._handle)
+
+    async def _handle(self, route: Route) -> None:
+        request = route.request
+        if self.should_block(request.resource_type, request.url):
+            self.blocked += 1
+            await route.abort()
+        else:
+            await route.continue_()
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+
+class CountyQueues:
+    # bounded work queue for the orchestrator's worker pool, one FIFO per county. get() takes one item
+    # per county per round, higher `priority` counties first in each round, and passes over counties
+    # whose `ready` check fails (their throttle is full) so a saturated portal doesn't park a worker.
+    # put() blocks once `maxsize` items are waiting, unless block=False (retries, which must not wait
+    # behind the input reader).
+    def __init__(
+        self,
+        maxsize: int,
+        *,
+        ready: Optional[Callable[[str], bool]] = None,
+        priority: Optional[Callable[[str], int]] = None,
+        poll_s: float = 0.05,
+    ):
+        self.maxsize = max(1, maxsize)
+        self._ready = ready or (lambda county: True)
+        self._priority = priority or (lambda county: 0)
+        # budgets shared with other runs free up without telling us; re-check every poll_s while waiting
+        self._poll_s = poll_s
+        self._queues: Dict[str, Deque[Any]] = {}
+        self._ring: List[str] = []
+        self._next = 0
+        self._size = 0
+        self._cond = asyncio.Condition()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _add(self, county: str, item: Any) -> None:
+        if county not in self._queues:
+            self._queues[county] = deque()
+            # stable sort: equal priorities keep first-seen order
+            self._ring.append(county)
+            self._ring.sort(key=lambda c: -self._priority(c))
+            self._next = 0
+        self._queues[county].append(item)
+        self._size += 1
+
+    def _pop(self) -> Optional[Tuple[str, Any]]:
+        n = len(self._ring)
+        for i in range(n):
+            idx = (self._next + i) % n
+            county = self._ring[idx]
+            q = self._queues[county]
+            if q and self._ready(county):
+                # a new round starts once the ring wraps, so the highest priority county goes first again
+                self._next = (idx + 1) % n
+                self._size -= 1
+                return county, q.popleft()
+        return None
+
+    async def put(self, county: str, item: Any, *, block: bool = True) -> None:
+        async with self._cond:
+            if block:
+                await self._cond.wait_for(lambda: self._size < self.maxsize)
+            self._add(county, item)
+            self._cond.notify_all()
+
+    async def get(self) -> Tuple[str, Any]:
+        async with self._cond:
+            while True:
+                got = self._pop()
+                if got:
+                    self._cond.notify_all()
+                    return got
+                try:
+                    await asyncio.wait_for(self._cond.wait(), self._poll_s if self._size else None)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def wake(self) -> None:
+        # call when a county slot frees up, so waiting workers re-check the counties they passed over
+        async with self._cond:
+            self._cond.notify_all()
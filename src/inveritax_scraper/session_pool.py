@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from playwright.async_api import Browser, BrowserContext, Page
+
+from .waits import Waiter
+
+
+class BrowserSession:
+    def __init__(self, county: str, context: BrowserContext, page: Page):
+        self.county = county
+        self.context = context
+        self.page = page
+        self.uses = 0
+        # when it was last returned to the pool; the longest-idle context is evicted first
+        self.idle_since = 0.0
+        # URL of the search form once setup (popups, guest login, redirects) is done
+        self.search_url: Optional[str] = None
+        self.waiter: Optional[Waiter] = None
+
+    async def close(self) -> None:
+        # closing the context closes its pages (popups included); a failed page close must not skip it
+        try:
+            await self.context.close()
+        except Exception:
+            pass
+
+
+SessionSetup = Callable[[BrowserSession, Dict[str, Any]], Awaitable[None]]
+
+
+# Warm browser contexts per county, set up once and reused across fetches. `max_open` (read on every
+# acquire, since the memory governor moves it) caps contexts open at once, idle ones included: a county
+# that needs a new context takes the place of the longest-idle one.
+class SessionPool:
+    def __init__(
+        self,
+        browser: Browser,
+        *,
+        setup: SessionSetup,
+        context_options: Optional[Dict[str, Any]] = None,
+        max_open: Optional[Callable[[], int]] = None,
+    ):
+        self.browser = browser
+        self.setup = setup
+        self.context_options = context_options or {}
+        self.max_open = max_open
+        self._idle: Dict[str, List[BrowserSession]] = defaultdict(list)
+        # checked out by a fetch; close() waits for these
+        self._busy: Set[BrowserSession] = set()
+        self._lock = asyncio.Lock()
+        self._released = asyncio.Condition(self._lock)
+        self.closed = False
+        self.created = 0
+        self.recycled = 0
+        self.evicted = 0
+        # contexts open right now, idle or in use
+        self.open = 0
+
+    @property
+    def idle_count(self) -> int:
+        return sum(len(idle) for idle in self._idle.values())
+
+    async def _close(self, session: BrowserSession) -> None:
+        self.open -= 1
+        await session.close()
+
+    def _evict(self, cap: int) -> List[BrowserSession]:
+        # idle contexts to close so a new one fits under `cap`; called with the lock held
+        evict: List[BrowserSession] = []
+        while self.open - len(evict) >= cap:
+            oldest = min((idle for idle in self._idle.values() if idle), key=lambda idle: idle[0].idle_since, default=None)
+            if oldest is None:
+                break
+            evict.append(oldest.pop(0))
+        self.evicted += len(evict)
+        return evict
+
+    async def acquire(self, cfg: Dict[str, Any]) -> BrowserSession:
+        county = cfg["county"].lower()
+        async with self._lock:
+            if self.closed:
+                raise RuntimeError("session pool is closed")
+            idle = self._idle[county]
+            if idle:
+                session = idle.pop()
+                self._busy.add(session)
+                return session
+            evict = self._evict(self.max_open()) if self.max_open else []
+        for s in evict:
+            await self._close(s)
+
+        context = await self.browser.new_context(**self.context_options)
+        self.open += 1
+        try:
+            session = BrowserSession(county, context, await context.new_page())
+            await self.setup(session, cfg)
+        except BaseException:
+            # includes cancellation mid-setup: the context would otherwise stay open for the browser's life
+            self.open -= 1
+            try:
+                await context.close()
+            except Exception:
+                pass
+            raise
+        self.created += 1
+        async with self._lock:
+            self._busy.add(session)
+        return session
+
+    async def release(self, session: BrowserSession, cfg: Dict[str, Any], *, healthy: bool, uses: int = 1) -> None:
+        session.uses += uses
+        policy = cfg.get("session") or {}
+        max_uses = policy.get("max_uses", 50)
+        max_idle = policy.get("max_idle")
+        async with self._lock:
+            if session not in self._busy:
+                return  # force-closed by close()
+            self._busy.discard(session)
+            self._released.notify_all()
+            idle = self._idle[session.county]
+            keep = not self.closed and healthy and session.uses < max_uses and (max_idle is None or len(idle) < max_idle)
+            # over the cap (the governor lowered it): close instead of keeping it warm
+            keep = keep and (self.max_open is None or self.open <= self.max_open())
+            if keep:
+                session.idle_since = time.monotonic()
+                idle.append(session)
+                return
+        if not self.closed:
+            self.recycled += 1
+        await self._close(session)
+
+    async def close_idle(self) -> None:
+        # warm contexts are a cache: drop them without touching the ones fetches are using
+        async with self._lock:
+            sessions = [s for idle in self._idle.values() for s in idle]
+            self._idle.clear()
+        for s in sessions:
+            await self._close(s)
+
+    async def close(self, grace_s: float = 10.0) -> None:
+        # closes every context: idle ones now, checked-out ones as their fetches release them, and
+        # any still out after grace_s (a hung fetch) regardless
+        async with self._lock:
+            self.closed = True
+        await self.close_idle()
+        async with self._lock:
+            try:
+                await asyncio.wait_for(self._released.wait_for(lambda: not self._busy), grace_s)
+            except asyncio.TimeoutError:
+                pass
+            stuck = list(self._busy)
+            self._busy.clear()
+        for s in stuck:
+            await self._close(s)
@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import multiprocessing as mp
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from itertools import groupby
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .extraction import extract_html, extract_json, missing_fields
+from .failures import ERROR, NOT_FOUND
+from .models import NormalizedTaxRecord
+from .normalizer import normalize_batch
+
+# which extract rules produced a snapshot's data: the county's `selectors.extract` (browser) or `http.extract`
+BROWSER = "browser"
+HTTP = "http"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    county TEXT NOT NULL,
+    parcel_number TEXT NOT NULL,
+    source TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    source_url TEXT,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (county, parcel_number)
+);
+"""
+
+# (county, parcel_number, source, digest, source_url, fetched_at)
+Entry = Tuple[str, str, str, str, Optional[str], float]
+
+
+def _object_path(root: Path, digest: str) -> Path:
+    return root / "objects" / digest[:2] / f"{digest[2:]}.gz"
+
+
+def read_document(root: Path, digest: str) -> str:
+    return gzip.decompress(_object_path(root, digest).read_bytes()).decode()
+
+
+class SnapshotStore:
+    # the last document each parcel's data was extracted from (the detail page DOM, or the recipe's final
+    # response), gzipped and stored once per distinct content under its sha256, plus a SQLite index of the
+    # latest snapshot per parcel. Worker processes can share one directory.
+    def __init__(self, root: Path, *, level: int = 6):
+        root.mkdir(parents=True, exist_ok=True)
+        self.root = root
+        self.level = level
+        self._db = sqlite3.connect(str(root / "index.sqlite"), timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        self.saved = 0
+        self.deduped = 0
+
+    def put(self, document: str) -> str:
+        data = document.encode()
+        digest = hashlib.sha256(data).hexdigest()
+        path = _object_path(self.root, digest)
+        if path.exists():
+            self.deduped += 1
+            return digest
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # write-then-rename, so a reader (or a second writer of the same page) never sees half a file
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(gzip.compress(data, self.level, mtime=0))
+        os.replace(tmp, path)
+        return digest
+
+    def save(self, county: str, parcel_number: str, document: str, *, source: str, source_url: Optional[str] = None) -> None:
+        digest = self.put(document)
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO snapshots (county, parcel_number, source, digest, source_url, fetched_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (county.lower(), parcel_number, source, digest, source_url, time.time()),
+            )
+        self.saved += 1
+
+    def read(self, digest: str) -> str:
+        return read_document(self.root, digest)
+
+    def entries(self, counties: Optional[Sequence[str]] = None) -> Iterator[Entry]:
+        sql = "SELECT county, parcel_number, source, digest, source_url, fetched_at FROM snapshots"
+        args: List[str] = []
+        if counties:
+            sql += f" WHERE county IN ({', '.join('?' * len(counties))})"
+            args = [c.lower() for c in counties]
+        yield from self._db.execute(sql + " ORDER BY county, parcel_number", args)
+
+    def close(self) -> None:
+        self._db.close()
+
+
+def extract_snapshot(cfg: Dict[str, Any], source: str, document: str) -> Tuple[Dict[str, Any], Optional[str], Optional[str]]:
+    # (data, error, failure class): the same rules and empty-result checks as the engine that saved it
+    if source == HTTP:
+        recipe = cfg.get("http") or {}
+        rules = recipe.get("extract", {})
+        data = extract_json(json.loads(document), rules) if recipe.get("format") == "json" else extract_html(document, rules)
+        missing = missing_fields(data, recipe.get("required", []))
+        if missing:
+            return data, f"http recipe missing fields: {', '.join(missing)}", ERROR
+        return data, None, None
+    rules = (cfg.get("selectors") or {}).get("extract", {})
+    data = extract_html(document, rules)
+    if rules and not any(data.values()):
+        return data, "no data extracted (parcel not found?)", NOT_FOUND
+    return data, None, None
+
+
+def _stamp(fetched_at: float) -> str:
+    # the record keeps the fetch time, not the re-extraction time, so incremental runs age it correctly
+    return datetime.fromtimestamp(fetched_at, timezone.utc).replace(tzinfo=None).isoformat(timespec="seconds") + "Z"
+
+
+def reextract_entries(root: Path, cfg: Dict[str, Any], entries: Sequence[Entry]) -> List[NormalizedTaxRecord]:
+    # one county's snapshots -> records, in order; extraction is per document, normalization per batch
+    ok: List[Tuple[str, str, Dict[str, Any], Optional[str]]] = []
+    outcome: List[Optional[NormalizedTaxRecord]] = []
+    for county, parcel_number, source, digest, source_url, _ in entries:
+        try:
+            data, error, failure = extract_snapshot(cfg, source, read_document(root, digest))
+        except Exception as e:
+            # a missing object, or a Playwright-only selector (:has-text) that lxml can't run
+            data, error, failure = {}, f"reextract failed: {e}", ERROR
+        if error:
+            outcome.append(
+                NormalizedTaxRecord(
+                    county=cfg.get("county", county), parcel_number=parcel_number, source_url=source_url, errors=[f"extract: {error}"], failure_class=failure
+                )
+            )
+        else:
+            ok.append((cfg.get("county", county), parcel_number, data, source_url))
+            outcome.append(None)
+    normalized = iter(normalize_batch(ok, cfg.get("field_mapping")))
+    records = [rec or next(normalized) for rec in outcome]
+    for rec, entry in zip(records, entries):
+        rec.scrape_timestamp_utc = _stamp(entry[5])
+    return records
+
+
+_worker_state: Dict[str, Any] = {}
+
+
+def _init_worker(root: str, cfg_dicts: Dict[str, Dict[str, Any]]) -> None:
+    _worker_state["root"] = Path(root)
+    _worker_state["cfgs"] = cfg_dicts
+
+
+def _reextract_chunk(county: str, entries: List[Entry]) -> List[str]:
+    records = reextract_entries(_worker_state["root"], _worker_state["cfgs"][county], entries)
+    return [rec.model_dump_json() for rec in records]
+
+
+def _chunks(entries: Iterable[Entry], cfg_dicts: Dict[str, Dict[str, Any]], size: int) -> Iterator[Tuple[str, List[Entry]]]:
+    for county, group in groupby(entries, key=lambda e: e[0]):
+        if county not in cfg_dicts:
+            continue
+        chunk: List[Entry] = []
+        for entry in group:
+            chunk.append(entry)
+            if len(chunk) >= size:
+                yield county, chunk
+                chunk = []
+        if chunk:
+            yield county, chunk
+
+
+def reextract(
+    store: SnapshotStore,
+    cfg_dicts: Dict[str, Dict[str, Any]],
+    *,
+    counties: Optional[Sequence[str]] = None,
+    workers: int = 1,
+    chunk_size: int = 500,
+) -> Iterator[str]:
+    # re-runs the current YAML extract rules and the normalizer over stored snapshots, no browser or network.
+    # Yields records as JSON lines, chunk by chunk; counties without a config are skipped.
+    chunks = _chunks(store.entries(counties), cfg_dicts, chunk_size)
+    if workers <= 1:
+        _init_worker(str(store.root), cfg_dicts)
+        for county, chunk in chunks:
+            yield from _reextract_chunk(county, chunk)
+        return
+    with ProcessPoolExecutor(workers, mp_context=mp.get_context("spawn"), initializer=_init_worker, initargs=(str(store.root), cfg_dicts)) as pool:
+        # a bounded window of chunks in flight keeps memory flat on large stores
+        pending = []
+        for county, chunk in chunks:
+            pending.append(pool.submit(_reextract_chunk, county, chunk))
+            if len(pending) >= 4 * workers:
+                yield from pending.pop(0).result()
+        for future in pending:
+            yield from future.result()
@@ -0,0 +1,390 @@
+from __future__ import annotations
+
+import html
+import json
+import multiprocessing as mp
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from .config import CountyConfig, HttpRecipe
+from .models import ParcelInput
+
+# Local stand-ins for the three portal platforms in county_configs/. The pages keep the ids,
+# texts and navigation of the real workflows (GCS postbacks, Ascent's script-rendered grid,
+# LandNav's guest sign-in) so the YAML selectors run unchanged against them, offline.
+
+POPUP = """<div id="standinPopup" style="position:fixed;inset:0;background:rgba(0,0,0,.4);z-index:999">
+<div style="background:#fff;margin:20% auto;width:300px;padding:20px">Disclaimer
+<button id="btnAccept" onclick="document.getElementById('standinPopup').remove()">I Accept</button></div></div>"""
+
+
+class StandInOptions:
+    def __init__(
+        self,
+        *,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        popup_rate: float = 0.0,
+        failure_rate: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        # every response is delayed by latency_ms +/- jitter_ms; popup_rate of landing pages show a
+        # blocking disclaimer; failure_rate of detail requests answer 500
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.popup_rate = popup_rate
+        self.failure_rate = failure_rate
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def as_kwargs(self) -> Dict[str, Any]:
+        return {
+            "latency_ms": self.latency_ms,
+            "jitter_ms": self.jitter_ms,
+            "popup_rate": self.popup_rate,
+            "failure_rate": self.failure_rate,
+            "seed": self.seed,
+        }
+
+    def roll(self, rate: float) -> bool:
+        if rate <= 0:
+            return False
+        with self._lock:
+            return self.rng.random() < rate
+
+    def delay(self) -> None:
+        if self.latency_ms or self.jitter_ms:
+            with self._lock:
+                jitter = self.rng.uniform(-self.jitter_ms, self.jitter_ms)
+            time.sleep(max(0.0, self.latency_ms + jitter) / 1000)
+
+
+def parcel_taxes(parcel_number: str) -> Dict[str, str]:
+    # deterministic amounts so benchmarks can check what came back
+    cents = zlib.crc32(parcel_number.encode()) % 900_000 + 10_000
+    total = cents / 100
+    delinquent = total / 4 if cents % 5 == 0 else 0.0
+    return {"total": f"{total:,.2f}", "due": f"{total / 2:,.2f}", "delinquent": f"{delinquent:,.2f}"}
+
+
+def _page(title: str, body: str, head: str = "") -> str:
+    return f"<!DOCTYPE html><html><head><title>{title}</title>{head}</head><body>{body}</body></html>"
+
+
+# --- GCS (Brown): ASP.NET postback form -> grid -> parcel -> Current tab -> Taxes -------------
+
+_GCS_FORM = """<form method="post" action="/gcs/Search.aspx" id="aspnetForm">
+<input type="hidden" name="__VIEWSTATE" value="{vs}"/>
+<input type="hidden" name="__EVENTTARGET" value=""/>
+<input type="hidden" name="__EVENTARGUMENT" value=""/>
+<input type="text" id="mtxtParcelNumber" name="mtxtParcelNumber" value=""/>
+<input type="submit" id="ButtonParcelSearch" name="ButtonParcelSearch" value="Search"/>
+{body}</form>
+<script>function __doPostBack(t, a) {{ var f = document.getElementById('aspnetForm');
+f.__EVENTTARGET.value = t; f.__EVENTARGUMENT.value = a; f.submit(); }}</script>"""
+
+
+def _gcs(handler: "StandInHandler", method: str, path: str, query: Dict[str, List[str]], form: Dict[str, List[str]]) -> Tuple[int, str, str]:
+    if path == "/gcs/Search.aspx" and method == "POST":
+        target = form.get("__EVENTTARGET", [""])[0]
+        state = form.get("__VIEWSTATE", [""])[0]
+        if "LinkButtonParcelNumber" in target and state.startswith("vs-results:"):
+            if handler.options.roll(handler.options.failure_rate):
+                return 500, "text/html", _page("Error", "Server Error in '/' Application.")
+            parcel = state.split(":", 1)[1]
+            body = (
+                f"<h2>Parcel <span id='LabelTitleParcelNum'>{html.escape(parcel)}</span></h2>"
+                f"<a href='/gcs/Parcel.aspx?id={parcel}&amp;tab=current'>Current</a> <a href='#'>History</a>"
+            )
+            return 200, "text/html", _page("Parcel", body)
+        parcel = form.get("mtxtParcelNumber", [""])[0].strip()
+        if not parcel:
+            return 200, "text/html", _page("Search", _GCS_FORM.format(vs="vs-search", body="Enter a parcel number"))
+        grid = (
+            "<table id='ctl00_cphMainApp_GridViewParcelResults'><tr><th>Parcel</th></tr><tr><td>"
+            "<a id='ctl00_cphMainApp_GridViewParcelResults_ctl02_LinkButtonParcelNumber' "
+            "href=\"javascript:__doPostBack('ctl00$cphMainApp$GridViewParcelResults$ctl02$LinkButtonParcelNumber','')\">"
+            f"{html.escape(parcel)}</a></td></tr></table>"
+        )
+        return 200, "text/html", _page("Search", _GCS_FORM.format(vs=f"vs-results:{html.escape(parcel)}", body=grid))
+    if path == "/gcs/Search.aspx":
+        return 200, "text/html", _page("Search", handler.popup() + _GCS_FORM.format(vs="vs-search", body=""))
+    if path == "/gcs/Parcel.aspx":
+        parcel = query.get("id", [""])[0]
+        body = f"<h2>Parcel <span id='LabelTitleParcelNum'>{html.escape(parcel)}</span></h2><a id='lnkTaxes' href='/gcs/Taxes.aspx?id={parcel}'>Taxes</a>"
+        return 200, "text/html", _page("Parcel", body)
+    if path == "/gcs/Taxes.aspx":
+        parcel = query.get("id", [""])[0]
+        t = parcel_taxes(parcel)
+        body = (
+            f"<span id='LabelTitleParcelNum'>{html.escape(parcel)}</span>"
+            f"<table><tr><td>Gross Tax</td><td><span id='lblGrossTax'>${t['total']}</span></td></tr>"
+            f"<tr><td>Total Due</td><td><span id='lblTotalDue'>${t['due']}</span></td></tr>"
+            f"<tr><td>Net Tax Due</td><td><span id='lblNetTaxDue'>${t['due']}</span></td></tr>"
+            "<tr><td>Interest</td><td><span id='lblInterestDue'>$0.00</span></td></tr>"
+            "<tr><td>Penalty</td><td><span id='lblPenaltyDue'>$0.00</span></td></tr>"
+            "<tr><td>Utility</td><td><span id='lblDelinquentUtilityDue'>$0.00</span></td></tr></table>"
+        )
+        return 200, "text/html", _page("Taxes", body)
+    return 404, "text/html", _page("Not found", "Not found")
+
+
+# --- Ascent (Green Lake): script-rendered grid over a JSON API, AngularJS-style pending requests ------
+
+_ASCENT_APP = """<div ng-app="landRecords">
+<div id="search"><label>Owner <input type="text" name="owner"/></label>
+<label>Parcel ID <input type="text" name="parcelId" id="parcelId"/></label>
+<button id="btnFindNow" onclick="findNow()">Find Now</button></div>
+<div id="view"></div></div>
+<script>
+// enough of angular for the "$http pending requests" readiness check
+window.__pending = [];
+window.angular = {element: function () { return {injector: function () { return {get: function () {
+  return {pendingRequests: window.__pending}; }}; }}; }};
+function api(url) {
+  var token = {}; window.__pending.push(token);
+  return fetch(url).then(function (r) { if (!r.ok) throw new Error(r.status); return r.json(); })
+    .finally(function () { window.__pending.splice(window.__pending.indexOf(token), 1); });
+}
+function findNow() {
+  var id = document.getElementById('parcelId').value;
+  api('/ascent/api/search?parcel=' + encodeURIComponent(id)).then(function (rows) {
+    document.getElementById('view').innerHTML = '<table><tbody>' + rows.map(function (r) {
+      return '<tr><td><a href="#/Parcel/' + r.id + '" onclick="openParcel(\\'' + r.id + '\\')">' + r.id + '</a></td><td>' + r.owner + '</td></tr>';
+    }).join('') + '</tbody></table>';
+  });
+}
+function openParcel(id) {
+  api('/ascent/api/parcel/' + encodeURIComponent(id)).then(function (p) {
+    document.getElementById('search').remove();
+    document.getElementById('view').innerHTML = '<table><tr><td>' + p.id + '</td><td>Real Estate</td></tr></table>' +
+      '<p>Total Tax: <span ng-bind="parcel.TotalTax">' + p.TotalTax + '</span></p>' +
+      '<p>Delinquent: <span ng-bind="parcel.DelinquentAmount">' + p.DelinquentAmount + '</span></p>';
+  }).catch(function () { document.getElementById('view').innerHTML = '<p class="error">Request failed</p>'; });
+}
+</script>"""
+
+
+def _ascent(handler: "StandInHandler", method: str, path: str, query: Dict[str, List[str]], form: Dict[str, List[str]]) -> Tuple[int, str, str]:
+    if path == "/ascent/api/search":
+        parcel = query.get("parcel", [""])[0]
+        rows = [{"id": parcel, "owner": "STAND-IN OWNER"}] if parcel else []
+        return 200, "application/json", json.dumps(rows)
+    if path.startswith("/ascent/api/parcel/"):
+        if handler.options.roll(handler.options.failure_rate):
+            return 500, "application/json", json.dumps({"error": "server error"})
+        parcel = path.rsplit("/", 1)[1]
+        t = parcel_taxes(parcel)
+        return 200, "application/json", json.dumps({"id": parcel, "TotalTax": f"${t['total']}", "DelinquentAmount": f"${t['delinquent']}"})
+    if path.startswith("/ascent/"):
+        popup = handler.popup() or ("<a href='#' onclick='this.remove()'>Previous Page</a>" if handler.options.roll(handler.options.popup_rate) else "")
+        return 200, "text/html", _page("Land Records", popup + _ASCENT_APP)
+    return 404, "text/html", _page("Not found", "Not found")
+
+
+# --- LandNav (La Crosse): guest sign-in cookie -> GET search form -> results -> parcel -------------
+
+
+def _landnav(handler: "StandInHandler", method: str, path: str, query: Dict[str, List[str]], form: Dict[str, List[str]]) -> Tuple[int, str, str]:
+    if path == "/landnav/Home":
+        body = "<form method='post' action='/landnav/Account/Guest'><button type='submit'>Accept and Sign in</button></form>"
+        return 200, "text/html", _page("LandNav", handler.popup() + body)
+    if path == "/landnav/Account/Guest":
+        handler.extra_headers.append(("Set-Cookie", "landnav_guest=1; Path=/landnav"))
+        return 303, "text/html", "/landnav/Search/RealEstate/Search"
+    if "landnav_guest=1" not in (handler.headers.get("Cookie") or ""):
+        return 303, "text/html", "/landnav/Home"
+    if path == "/landnav/Search/RealEstate/Search":
+        parcel = query.get("MinUserDefinedId", [""])[0].strip()
+        results = ""
+        if parcel:
+            results = f"<table><tr><th>Parcel</th></tr><tr><td><a href='/landnav/Parcel/{parcel}'>{html.escape(parcel)}</a></td></tr></table>"
+        body = (
+            "<form method='get'><input name='MinUserDefinedId' type='text'/>"
+            f"<button type='submit'>Search</button></form>{results}"
+        )
+        return 200, "text/html", _page("Search", body)
+    if path.startswith("/landnav/Parcel/"):
+        if handler.options.roll(handler.options.failure_rate):
+            return 500, "text/html", _page("Error", "An error occurred")
+        parcel = path.rsplit("/", 1)[1]
+        t = parcel_taxes(parcel)
+        body = (
+            f"<div id='ParcelId'>{html.escape(parcel)}</div>"
+            f"<span id='TotalTax'>${t['total']}</span> <span id='DelinquentAmount'>${t['delinquent']}</span>"
+            "<table><tr><td>Class</td><td>Residential</td></tr></table>"
+        )
+        return 200, "text/html", _page("Parcel", body)
+    return 404, "text/html", _page("Not found", "Not found")
+
+
+_ROUTES = {"gcs": _gcs, "ascent": _ascent, "landnav": _landnav}
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    options = StandInOptions()
+    protocol_version = "HTTP/1.1"
+    # headers and body go out as separate writes; without this, Nagle + delayed ACK add ~40ms per response
+    disable_nagle_algorithm = True
+
+    def do_GET(self) -> None:  # noqa: N802
+        self._handle("GET", {})
+
+    def do_POST(self) -> None:  # noqa: N802
+        length = int(self.headers.get("Content-Length") or 0)
+        self._handle("POST", parse_qs(self.rfile.read(length).decode()))
+
+    def popup(self) -> str:
+        return POPUP if self.options.roll(self.options.popup_rate) else ""
+
+    def _handle(self, method: str, form: Dict[str, List[str]]) -> None:
+        url = urlparse(self.path)
+        self.extra_headers: List[Tuple[str, str]] = []
+        route = _ROUTES.get(url.path.strip("/").split("/", 1)[0])
+        self.options.delay()
+        if route is None:
+            status, content_type, body = 404, "text/html", _page("Not found", "Not found")
+        else:
+            status, content_type, body = route(self, method, url.path, parse_qs(url.query), form)
+        if status in (301, 302, 303):
+            self.extra_headers.append(("Location", body))
+            body = ""
+        raw = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(raw)))
+        for name, value in self.extra_headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def log_message(self, *args: Any) -> None:
+        return None
+
+
+class StandInServer:
+    def __init__(self, options: Optional[StandInOptions] = None, *, host: str = "127.0.0.1", port: int = 0):
+        handler = type("Handler", (StandInHandler,), {"options": options or StandInOptions()})
+        # the stdlib default backlog of 5 drops connections once a benchmark opens more than that at once
+        server_cls = type("Server", (ThreadingHTTPServer,), {"request_queue_size": 256})
+        self._server = server_cls((host, port), handler)
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def serve_forever(self) -> None:
+        self._server.serve_forever()
+
+    def start(self) -> "StandInServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StandInServer":
+        return self.start()
+
+    def __exit__(self, *exc: object) -> None:
+        self.stop()
+
+
+def _serve_child(kwargs: Dict[str, Any], port: int, out: Any) -> None:
+    server = StandInServer(StandInOptions(**kwargs), port=port)
+    out.put(server.url)
+    server.serve_forever()
+
+
+class StandInProcess:
+    # the stand-in server in its own process, so serving pages doesn't compete with the
+    # engine under test for this process's GIL
+    def __init__(self, options: Optional[StandInOptions] = None, *, port: int = 0):
+        self.options = options or StandInOptions()
+        self.port = port
+        self.url = ""
+        self._proc: Optional[Any] = None
+
+    def __enter__(self) -> "StandInProcess":
+        ctx = mp.get_context("spawn")
+        out = ctx.Queue()
+        self._proc = ctx.Process(target=_serve_child, args=(self.options.as_kwargs(), self.port, out), daemon=True)
+        self._proc.start()
+        self.url = out.get(timeout=30)
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        if self._proc is not None:
+            self._proc.terminate()
+            self._proc.join(timeout=5)
+
+
+# county key -> (stand-in path, HTTP recipe for the http/hybrid engines)
+STANDIN_COUNTIES: Dict[str, Tuple[str, Dict[str, Any]]] = {
+    "brown": (
+        "/gcs/Search.aspx",
+        {
+            "steps": [
+                {"url": "{base_url}"},
+                {"replay_form": True, "form": {"mtxtParcelNumber": "{parcel_number}", "ButtonParcelSearch": "Search"}},
+                {"replay_form": True, "postback_from": {"css": "a[id*='LinkButtonParcelNumber']"}},
+                {"url_from": {"css": "a[href*='tab=current']"}},
+                {"url_from": {"css": "#lnkTaxes"}},
+            ],
+            "extract": {"parcel_number": {"css": "#LabelTitleParcelNum"}, "current_year_total_tax": {"css": "#lblGrossTax"}},
+            "required": ["current_year_total_tax"],
+        },
+    ),
+    "green lake": (
+        "/ascent/LandRecords/PropertyListing/RealEstateTaxParcel#/Search",
+        {
+            "format": "json",
+            "steps": [{"url": "/ascent/api/parcel/{parcel_number}"}],
+            "extract": {"parcel_number": {"jsonpath": "$.id"}, "current_year_total_tax": {"jsonpath": "$.TotalTax"}},
+            "required": ["current_year_total_tax"],
+        },
+    ),
+    "la crosse": (
+        "/landnav/Home",
+        {
+            "steps": [
+                {"method": "POST", "url": "/landnav/Account/Guest"},
+                {"url": "/landnav/Search/RealEstate/Search", "params": {"MinUserDefinedId": "{parcel_number}"}},
+                {"url_from": {"css": "table tr td a"}},
+            ],
+            "extract": {"parcel_number": {"css": "#ParcelId"}, "current_year_total_tax": {"css": "#TotalTax"}},
+            "required": ["current_year_total_tax"],
+        },
+    ),
+}
+
+
+def standin_configs(base: str, county_configs: Dict[str, CountyConfig]) -> Dict[str, CountyConfig]:
+    # the real county configs (selectors, waits, limits) pointed at the stand-in server
+    out: Dict[str, CountyConfig] = {}
+    for key, (path, recipe) in STANDIN_COUNTIES.items():
+        if key in county_configs:
+            cfg = county_configs[key]
+            out[key] = cfg.model_copy(update={"base_url": base + path, "http": cfg.http or HttpRecipe.model_validate(recipe)})
+    return out
+
+
+def standin_parcels(per_county: int) -> List[ParcelInput]:
+    # parcel numbers shaped like each platform's real ones, interleaved across counties
+    out: List[ParcelInput] = []
+    for i in range(per_county):
+        out.append(ParcelInput(county="Brown", parcel_number=f"1-{1000 + i}-1"))
+        out.append(ParcelInput(county="Green Lake", parcel_number=f"{6000350000 + i:012d}"))
+        out.append(ParcelInput(county="La Crosse", parcel_number=f"01-{i:05d}-010"))
+    return out
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import sqlite3
+import time
+import uuid
+from pathlib import Path
+from typing import Optional
+
+from .models import NormalizedTaxRecord
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    input_key TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE TABLE IF NOT EXISTS results (
+    county TEXT NOT NULL,
+    parcel_number TEXT NOT NULL,
+    run_id TEXT NOT NULL,
+    ok INTEGER NOT NULL,
+    finished_at REAL NOT NULL,
+    record TEXT NOT NULL,
+    PRIMARY KEY (county, parcel_number, run_id)
+);
+CREATE INDEX IF NOT EXISTS results_by_parcel ON results (county, parcel_number, ok, finished_at);
+"""
+
+
+class ResultStore:
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # worker processes share the file, so wait on locks rather than failing
+        self._db = sqlite3.connect(str(path), timeout=30)
+        # WAL + NORMAL keeps per-record commits cheap while still surviving a process crash
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+
+    def open_run(self, input_key: str, *, resume: bool = False, ttl_s: Optional[float] = None) -> "StoreRun":
+        run_id = None
+        if resume:
+            row = self._db.execute(
+                "SELECT run_id FROM runs WHERE input_key = ? AND finished_at IS NULL ORDER BY started_at DESC LIMIT 1",
+                (input_key,),
+            ).fetchone()
+            run_id = row[0] if row else None
+        if run_id is None:
+            run_id = uuid.uuid4().hex
+            with self._db:
+                self._db.execute("INSERT INTO runs (run_id, input_key, started_at) VALUES (?, ?, ?)", (run_id, input_key, time.time()))
+        return StoreRun(self, run_id, ttl_s=ttl_s)
+
+    def attach_run(self, run_id: str, *, ttl_s: Optional[float] = None) -> "StoreRun":
+        # join a run opened by another process (sharded workers)
+        return StoreRun(self, run_id, ttl_s=ttl_s)
+
+    def close(self) -> None:
+        self._db.close()
+
+
+class StoreRun:
+    def __init__(self, store: ResultStore, run_id: str, *, ttl_s: Optional[float] = None):
+        self.store = store
+        self.run_id = run_id
+        self.ttl_s = ttl_s
+        self.hits = 0
+
+    def lookup(self, county: str, parcel_number: str) -> Optional[NormalizedTaxRecord]:
+        # successful results from this run (resume) or, with a TTL, from any recent run
+        db = self.store._db
+        key = (county.lower(), parcel_number)
+        row = db.execute(
+            "SELECT record FROM results WHERE county = ? AND parcel_number = ? AND run_id = ? AND ok = 1",
+            (*key, self.run_id),
+        ).fetchone()
+        if row is None and self.ttl_s:
+            row = db.execute(
+                "SELECT record, rowid FROM results WHERE county = ? AND parcel_number = ? AND ok = 1 AND finished_at >= ? "
+                "ORDER BY finished_at DESC LIMIT 1",
+                (*key, time.time() - self.ttl_s),
+            ).fetchone()
+            if row is not None:
+                # carry the reused result into this run with its original timestamp so the TTL still ages it
+                with db:
+                    db.execute(
+                        "INSERT OR IGNORE INTO results SELECT county, parcel_number, ?, ok, finished_at, record FROM results WHERE rowid = ?",
+                        (self.run_id, row[1]),
+                    )
+        if row is None:
+            return None
+        self.hits += 1
+        return NormalizedTaxRecord.model_validate_json(row[0])
+
+    def save(self, rec: NormalizedTaxRecord) -> None:
+        with self.store._db:
+            self.store._db.execute(
+                "INSERT OR REPLACE INTO results (county, parcel_number, run_id, ok, finished_at, record) VALUES (?, ?, ?, ?, ?, ?)",
+                (rec.county.lower(), rec.parcel_number, self.run_id, int(not rec.errors), time.time(), rec.model_dump_json()),
+            )
+
+    def finish(self) -> None:
+        with self.store._db:
+            self.store._db.execute("UPDATE runs SET finished_at = ? WHERE run_id = ?", (time.time(), self.run_id))
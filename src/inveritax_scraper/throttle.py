@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        # the lock keeps waiters in FIFO order so one caller cannot starve the rest
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class AdjustableLimiter:
+    # semaphore whose limit can move while slots are held
+    def __init__(self, limit: int):
+        self.limit = max(1, limit)
+        self.in_use = 0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_use < self.limit)
+            self.in_use += 1
+
+    async def release(self) -> None:
+        async with self._cond:
+            self.in_use -= 1
+            self._cond.notify_all()
+
+    async def set_limit(self, limit: int) -> None:
+        async with self._cond:
+            self.limit = max(1, limit)
+            self._cond.notify_all()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        await self.acquire()
+        try:
+            yield
+        finally:
+            await self.release()
+
+
+class AimdController:
+    # additive increase while fetches are healthy, multiplicative decrease on errors/slow responses
+    def __init__(
+        self,
+        limiter: AdjustableLimiter,
+        *,
+        min_limit: int,
+        max_limit: int,
+        target_latency_s: float,
+        decrease_factor: float = 0.5,
+    ):
+        self.limiter = limiter
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_latency_s = target_latency_s
+        self.decrease_factor = decrease_factor
+        self._healthy_streak = 0
+        self._last_decrease = 0.0
+
+    async def record(self, ok: bool, latency_s: float) -> None:
+        limit = self.limiter.limit
+        if not ok or latency_s > 2 * self.target_latency_s:
+            self._healthy_streak = 0
+            now = time.monotonic()
+            # requests already in flight when trouble started shouldn't each halve the limit again
+            if now - self._last_decrease < self.target_latency_s:
+                return
+            self._last_decrease = now
+            await self.limiter.set_limit(max(self.min_limit, int(limit * self.decrease_factor)))
+        elif latency_s <= self.target_latency_s:
+            self._healthy_streak += 1
+            # one step up per "round" of healthy completions at the current limit
+            if self._healthy_streak >= limit and limit < self.max_limit:
+                self._healthy_streak = 0
+                await self.limiter.set_limit(limit + 1)
+
+
+class CountyThrottle:
+    def __init__(
+        self,
+        *,
+        max_concurrency: int = 4,
+        min_concurrency: int = 1,
+        initial_concurrency: Optional[int] = None,
+        requests_per_second: Optional[float] = None,
+        burst: int = 1,
+        target_latency_s: float = 20.0,
+        adaptive: bool = True,
+    ):
+        start = initial_concurrency or max(min_concurrency, max_concurrency // 2)
+        self.limiter = AdjustableLimiter(start if adaptive else max_concurrency)
+        self.bucket = TokenBucket(requests_per_second, burst) if requests_per_second else None
+        self.controller = (
+            AimdController(self.limiter, min_limit=min_concurrency, max_limit=max_concurrency, target_latency_s=target_latency_s)
+            if adaptive
+            else None
+        )
+
+    @classmethod
+    def from_cfg(cls, limits: Dict[str, Any], *, default_max: int) -> "CountyThrottle":
+        # priority is the scheduler's, not the throttle's
+        limits = {k: v for k, v in limits.items() if k != "priority"}
+        return cls(**{**limits, "max_concurrency": limits.get("max_concurrency") or default_max})
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        async with self.limiter.slot():
+            if self.bucket:
+                await self.bucket.acquire()
+            yield
+
+    async def record(self, ok: bool, latency_s: float) -> None:
+        if self.controller:
+            await self.controller.record(ok, latency_s)
+
+
+# CircuitBreaker.admit(): fetch normally, send the one probe of a half-open breaker, or fail without fetching
+FETCH = "fetch"
+PROBE = "probe"
+SHED = "shed"
+
+
+class CircuitBreaker:
+    # closed -> open after `failures` consecutive timeouts/outages. While open the county's queued parcels
+    # are parked (on_open="park") or failed fast ("fail"); parked ones fail fast too once the county has
+    # been down for give_up_s. Every cooldown_s one probe fetch goes out (half-open): success closes the
+    # breaker, failure reopens it with the cooldown doubled up to max_cooldown_s.
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        *,
+        failures: int = 10,
+        cooldown_s: float = 30.0,
+        max_cooldown_s: float = 600.0,
+        on_open: str = "park",
+        give_up_s: Optional[float] = 1800.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failures = failures
+        self.cooldown_s = cooldown_s
+        self.max_cooldown_s = max_cooldown_s
+        self.on_open = on_open
+        self.give_up_s = give_up_s
+        self.clock = clock
+        self.state = self.CLOSED
+        self.streak = 0
+        self.trips = 0
+        self._cooldown = cooldown_s
+        self._opened_at = 0.0
+        # first trip of the current outage; probes that fail don't reset it
+        self._down_since = 0.0
+
+    @classmethod
+    def from_cfg(cls, policy: Dict[str, Any]) -> "CircuitBreaker":
+        return cls(**policy)
+
+    def _probe_due(self) -> bool:
+        return self.state == self.OPEN and self.clock() - self._opened_at >= self._cooldown
+
+    def shedding(self) -> bool:
+        if self.state == self.CLOSED:
+            return False
+        return self.on_open == "fail" or (self.give_up_s is not None and self.clock() - self._down_since >= self.give_up_s)
+
+    def ready(self) -> bool:
+        # whether a queued item may be dispatched at all; parked counties wait for their next probe
+        return self.state == self.CLOSED or self._probe_due() or self.shedding()
+
+    def admit(self) -> str:
+        # called as an item is dispatched
+        if self.state == self.CLOSED:
+            return FETCH
+        if self._probe_due():
+            self.state = self.HALF_OPEN
+            return PROBE
+        return SHED
+
+    def record(self, ok: bool, *, probe: bool = False) -> None:
+        if ok:
+            # the portal answered, whether or not this was the probe
+            self.state = self.CLOSED
+            self.streak = 0
+            self._cooldown = self.cooldown_s
+        elif probe and self.state == self.HALF_OPEN:
+            self._cooldown = min(self.max_cooldown_s, self._cooldown * 2)
+            self._open()
+        elif self.state == self.CLOSED:
+            # failures of fetches already in flight when the breaker opened don't count again
+            self.streak += 1
+            if self.failures and self.streak >= self.failures:
+                self.trips += 1
+                self._down_since = self.clock()
+                self._open()
+
+    def abandon(self) -> None:
+        # the probe never finished (its fetch was cancelled): back to open, with the probe still due
+        if self.state == self.HALF_OPEN:
+            self.state = self.OPEN
+
+    def _open(self) -> None:
+        self.state = self.OPEN
+        self._opened_at = self.clock()
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from collections import deque
+from typing import Deque, Dict, Iterable, Optional
+
+from .metrics import Span
+
+
+class StepLatencies:
+    # recent step durations for one county and the timeouts they imply: `multiplier` x the step's p95 over
+    # the last `window` samples, at least floor_ms and never longer than the fixed timeout the step had.
+    # A step keeps its fixed timeout until it has min_samples. Learning only shortens timeouts: a slower
+    # portal gets back up to the fixed timeout at most.
+    def __init__(self, *, window: int = 200, min_samples: int = 20, multiplier: float = 3.0, floor_ms: int = 2000):
+        self.window = window
+        self.min_samples = min_samples
+        self.multiplier = multiplier
+        self.floor_ms = floor_ms
+        self._samples: Dict[str, Deque[float]] = {}
+        # p95 per step, dropped when the step gets a new sample
+        self._p95: Dict[str, float] = {}
+
+    def add(self, step: str, seconds: float) -> None:
+        if step not in self._samples:
+            self._samples[step] = deque(maxlen=self.window)
+        self._samples[step].append(seconds)
+        self._p95.pop(step, None)
+
+    def observe(self, spans: Iterable[Span]) -> None:
+        for name, _, seconds in spans:
+            self.add(name, seconds)
+
+    def p95(self, step: str) -> Optional[float]:
+        if step in self._p95:
+            return self._p95[step]
+        samples = self._samples.get(step)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        self._p95[step] = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+        return self._p95[step]
+
+    def timeout_ms(self, step: str, default_ms: int) -> int:
+        p95 = self.p95(step)
+        if p95 is None:
+            return default_ms
+        return int(min(default_ms, max(self.floor_ms, self.multiplier * p95 * 1000)))
+
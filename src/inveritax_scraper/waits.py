@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import asyncio
+import re
+import time
+from contextlib import AsyncExitStack
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, ContextManager, Dict, List, Optional, Union
+
+from .metrics import Span, Spans
+from .timeouts import StepLatencies
+
+if TYPE_CHECKING:
+    # config validation imports this module; only the engine needs Playwright
+    from playwright.async_api import Page
+
+
+WaitSpec = Union[str, Dict[str, Any]]
+
+DEFAULT_WAIT_TIMEOUT_MS = 5000
+
+# Readiness waits used when a county does not configure its own under `selectors.waits`.
+# Every wait is best-effort: a timeout moves on, exactly like the fixed sleeps these replace.
+DEFAULT_WAITS: Dict[str, WaitSpec] = {
+    "after_goto": "network_idle",
+    "after_popup": "network_idle",
+    "after_guest_accept": "network_idle",
+    "after_search_redirect": "network_idle",
+    "before_search_input": "angular_stable",
+    "after_search": "network_idle",
+    "after_details": "network_idle",
+    "after_detail_tab": "network_idle",
+    "after_taxes": "network_idle",
+    "after_back": "network_idle",
+}
+
+# wait points the browser engine runs, beyond the defaults above
+WAIT_POINTS = (*DEFAULT_WAITS, "after_tab", "before_search_button", "results_fallback")
+
+WAIT_TYPES = ("network_idle", "load", "domcontentloaded", "selector", "response", "angular_stable", "sleep")
+
+# AngularJS ($http pending requests) and Angular 2+ (testabilities); plain pages just need readyState.
+ANGULAR_STABLE_JS = """
+() => {
+  if (document.readyState !== 'complete') return false;
+  if (window.getAllAngularTestabilities) {
+    return window.getAllAngularTestabilities().every(t => t.isStable());
+  }
+  if (window.angular) {
+    const root = document.querySelector('[ng-app],[data-ng-app],.ng-scope') || document.body;
+    const injector = window.angular.element(root).injector();
+    if (!injector) return true;
+    return injector.get('$http').pendingRequests.length === 0;
+  }
+  return true;
+}
+"""
+
+
+def _as_specs(raw: Optional[Union[WaitSpec, List[WaitSpec]]]) -> List[Dict[str, Any]]:
+    if raw is None:
+        return []
+    items = raw if isinstance(raw, list) else [raw]
+    return [{"type": i} if isinstance(i, str) else dict(i) for i in items]
+
+
+def check_waits(waits: Any) -> None:
+    # run when county configs load: a typo would otherwise make a wait a silent no-op
+    if not isinstance(waits, dict):
+        raise ValueError("selectors.waits must map wait points to waits")
+    for point, raw in waits.items():
+        if point not in WAIT_POINTS:
+            raise ValueError(f"unknown wait point {point!r} (expected one of {', '.join(WAIT_POINTS)})")
+        for spec in _as_specs(raw):
+            kind = spec.get("type")
+            if kind not in WAIT_TYPES:
+                raise ValueError(f"unknown wait type {kind!r} at {point!r} (expected one of {', '.join(WAIT_TYPES)})")
+            needs = {"selector": "selector", "response": "url"}.get(kind)
+            if needs and not spec.get(needs):
+                raise ValueError(f"{kind} wait at {point!r} needs `{needs}`")
+
+
+def _timed_out(e: BaseException) -> bool:
+    # duck-typed like failures.classify_exception: Playwright's and asyncio's are both named TimeoutError
+    return "Timeout" in type(e).__name__
+
+
+class Waiter:
+    def __init__(self, page: Page, waits: Optional[Dict[str, Any]] = None, *, timeout_ms: int = DEFAULT_WAIT_TIMEOUT_MS):
+        self.page = page
+        self.waits = {**DEFAULT_WAITS, **(waits or {})}
+        self.timeout_ms = timeout_ms
+        # seconds spent per wait point; repeated points accumulate
+        self.timings: Dict[str, float] = {}
+        # workflow steps (goto, search, extract, ...) for the current fetch
+        self.spans = Spans()
+        # the county's learned step latencies, when the engine tracks them
+        self.timeouts: Optional[StepLatencies] = None
+
+    def take_timings(self) -> Dict[str, float]:
+        out, self.timings = self.timings, {}
+        return out
+
+    def step(self, name: str) -> ContextManager[None]:
+        return self.spans.step(name)
+
+    def take_spans(self) -> List[Span]:
+        return self.spans.take()
+
+    def timeout(self, step: str, default_ms: int) -> int:
+        return self.timeouts.timeout_ms(step, default_ms) if self.timeouts else default_ms
+
+    async def run(self, point: str, action: Optional[Callable[[], Awaitable[Any]]] = None) -> None:
+        specs = _as_specs(self.waits.get(point))
+        armed = [s for s in specs if s["type"] == "response"]
+        after = [s for s in specs if s["type"] != "response"]
+
+        if action is not None:
+            if not armed:
+                await action()
+            else:
+                # response waits must be registered before the action that triggers the request
+                started = time.perf_counter()
+                acted = False
+                try:
+                    async with AsyncExitStack() as stack:
+                        for s in armed:
+                            await stack.enter_async_context(self.page.expect_response(
+                                _url_matcher(s["url"]), timeout=s.get("timeout_ms", self.timeout_ms)
+                            ))
+                        await action()
+                        acted = True
+                except Exception as e:
+                    # a response that never came is best-effort like every other wait; a failed action is not
+                    if not acted or not _timed_out(e):
+                        raise
+                self._record(point, started)
+
+        if after:
+            started = time.perf_counter()
+            for s in after:
+                try:
+                    await self._wait(s)
+                except Exception as e:
+                    if not _timed_out(e):
+                        raise
+            self._record(point, started)
+
+    async def _wait(self, spec: Dict[str, Any]) -> None:
+        kind = spec["type"]
+        timeout = spec.get("timeout_ms", self.timeout_ms)
+        if kind == "network_idle":
+            await self.page.wait_for_load_state("networkidle", timeout=timeout)
+        elif kind in ("load", "domcontentloaded"):
+            await self.page.wait_for_load_state(kind, timeout=timeout)
+        elif kind == "selector":
+            await self.page.wait_for_selector(spec["selector"], state=spec.get("state", "visible"), timeout=timeout)
+        elif kind == "angular_stable":
+            await self.page.wait_for_function(ANGULAR_STABLE_JS, timeout=timeout, polling=100)
+        elif kind == "sleep":
+            # explicit fixed delay, only for pages with no usable readiness signal
+            await asyncio.sleep(spec.get("ms", 1000) / 1000)
+        else:
+            raise ValueError(f"Unknown wait type: {kind}")
+
+    def _record(self, point: str, started: float) -> None:
+        self.timings[point] = self.timings.get(point, 0.0) + time.perf_counter() - started
+
+
+def _url_matcher(pattern: str) -> Callable[[Any], bool]:
+    rx = re.compile(pattern)
+    return lambda response: bool(rx.search(response.url))
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import multiprocessing as mp
+import queue
+import traceback
+import zlib
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Set, Tuple
+
+from .config import CountyConfig
+from .input_loader import LoadStats, dedupe_parcels, iter_parcels
+from .metrics import RunMetrics
+from .models import ParcelInput
+
+
+def shard_of(parcel: ParcelInput, workers: int, by: str = "county") -> int:
+    # crc32 rather than hash(): it has to agree across processes
+    key = parcel.county.lower() if by == "county" else f"{parcel.county.lower()}::{parcel.parcel_number}"
+    return zlib.crc32(key.encode()) % workers
+
+
+def county_workers(counties: Iterable[str], workers: int) -> Set[int]:
+    # the workers --shard-by county gives any county to; the rest sit idle
+    return {shard_of(ParcelInput(county=c, parcel_number="-"), workers, "county") for c in counties}
+
+
+def _scale_limits(county_configs: Dict[str, CountyConfig], workers: int, max_concurrency: int) -> Dict[str, CountyConfig]:
+    # hash sharding spreads every county over all workers, so each worker gets a slice of its budget
+    scaled: Dict[str, CountyConfig] = {}
+    for key, cfg in county_configs.items():
+        limits = cfg.limits
+        scaled[key] = cfg.model_copy(update={"limits": limits.model_copy(update={
+            "max_concurrency": math.ceil((limits.max_concurrency or max_concurrency) / workers),
+            "requests_per_second": limits.requests_per_second / workers if limits.requests_per_second else None,
+        })})
+    return scaled
+
+
+def worker_budget(
+    county_configs: Dict[str, CountyConfig], *, index: int, workers: int, shard_by: str, max_concurrency: int
+) -> Tuple[Dict[str, CountyConfig], int]:
+    # (county configs, global cap) for worker `index`; the caps add up to --max-concurrency across workers.
+    # County sharding gives each county to exactly one worker, which keeps that county's whole `limits`
+    # and takes the global cap in proportion to the counties it owns (idle workers don't take a share).
+    # Hash sharding spreads every county across all workers, so each worker gets a slice of both.
+    if shard_by == "hash":
+        return _scale_limits(county_configs, workers, max_concurrency), max(1, math.ceil(max_concurrency / workers))
+    owned = sum(shard_of(ParcelInput(county=c.county, parcel_number="-"), workers, "county") == index for c in county_configs.values())
+    return county_configs, max(1, max_concurrency * owned // max(1, len(county_configs)))
+
+
+def _worker_main(index: int, spec: Dict[str, Any], out: Any) -> None:
+    from .county_registry import load_county_configs
+    from .engine import build_engine
+    from .failures import RetryPolicy
+    from .incremental import IncrementalRun, load_previous
+    from .orchestrator import iter_scrape
+    from .snapshots import SnapshotStore
+    from .store import ResultStore
+
+    try:
+        workers = spec["workers"]
+        county_configs, max_concurrency = worker_budget(
+            load_county_configs(Path(spec["config_dir"])),
+            index=index,
+            workers=workers,
+            shard_by=spec["shard_by"],
+            max_concurrency=spec["max_concurrency"],
+        )
+        stats = LoadStats()
+        mine = 0
+
+        def _mine() -> Iterator[ParcelInput]:
+            # every worker reads the input and keeps its own shard, so parcels never cross processes
+            nonlocal mine
+            for p in dedupe_parcels(iter_parcels(Path(spec["input_path"]), stats)):
+                if shard_of(p, workers, spec["shard_by"]) == index:
+                    mine += 1
+                    yield p
+
+        parcels = _mine()
+        incremental = None
+        if spec.get("previous"):
+            # only this worker's shard of the previous snapshot
+            previous = load_previous(
+                Path(spec["previous"]),
+                keep=lambda r: shard_of(ParcelInput(county=r.county, parcel_number=r.parcel_number), workers, spec["shard_by"]) == index,
+            )
+            incremental = IncrementalRun(previous, county_configs)
+            parcels = incremental.select(parcels, lambda rec: out.put(("record", rec.model_dump_json())))
+        engine = build_engine(**spec["engine"])
+        metrics = None
+        if spec.get("metrics"):
+            # the parent owns the exporters; this worker ships snapshots and trace lines to it
+            metrics = RunMetrics(
+                trace=(lambda line: out.put(("trace", line))) if spec.get("trace") else None,
+                on_flush=lambda snap: out.put(("metrics", index, snap)),
+                gauges=engine.stats,
+            )
+        retries = spec.get("retries", 0)
+        store = ResultStore(Path(spec["store_path"])) if spec.get("store_path") else None
+        run = store.attach_run(spec["run_id"], ttl_s=spec.get("ttl_s")) if store else None
+        snapshots = SnapshotStore(Path(spec["snapshots"])) if spec.get("snapshots") else None
+
+        async def _run() -> None:
+            await engine.start()
+            try:
+                async for rec in iter_scrape(
+                    parcels=parcels,
+                    county_configs=county_configs,
+                    engine=engine,
+                    max_concurrency=max_concurrency,
+                    store=run,
+                    show_progress=False,
+                    metrics=metrics,
+                    retry=RetryPolicy(max_attempts=retries + 1, base_s=spec.get("retry_backoff_s", 2.0)) if retries else None,
+                    snapshots=snapshots,
+                ):
+                    if incremental:
+                        rec, line = incremental.merge(rec)
+                        if line:
+                            out.put(("delta", line))
+                    out.put(("record", rec.model_dump_json()))
+                if incremental:
+                    for line in incremental.removed():
+                        out.put(("delta", line))
+            finally:
+                await engine.stop()
+
+        asyncio.run(_run())
+        if metrics:
+            metrics.flush()
+        if store:
+            store.close()
+        if snapshots:
+            snapshots.close()
+        done = {"parcels": mine, "rows": stats.rows, "hits": run.hits if run else 0, "engine": engine.stats()}
+        if incremental:
+            done["incremental"] = incremental.summary()
+        out.put(("done", index, done))
+    except BaseException:
+        out.put(("error", index, traceback.format_exc()))
+
+
+class WorkerError(RuntimeError):
+    pass
+
+
+def run_sharded(
+    spec: Dict[str, Any],
+    *,
+    summary: Optional[Dict[int, Dict[str, Any]]] = None,
+    metrics: Optional[RunMetrics] = None,
+    on_delta: Optional[Callable[[str], None]] = None,
+    poll_s: float = 1.0,
+) -> Iterator[str]:
+    # yields each record as a JSON line, in completion order, from `spec["workers"]` processes;
+    # per-worker totals land in `summary` as workers finish, worker metrics are merged into `metrics`,
+    # and incremental runs hand their delta lines to `on_delta`
+    ctx = mp.get_context("spawn")
+    out = ctx.Queue()
+    procs = [ctx.Process(target=_worker_main, args=(i, spec, out), daemon=True) for i in range(spec["workers"])]
+    for proc in procs:
+        proc.start()
+
+    pending = set(range(len(procs)))
+    try:
+        while pending:
+            try:
+                msg = out.get(timeout=poll_s)
+            except queue.Empty:
+                # workers always report done/error before a clean exit; a non-zero exit code means it was killed
+                dead = [i for i in pending if procs[i].exitcode not in (None, 0)]
+                if dead:
+                    raise WorkerError(f"worker(s) {dead} died (exit codes {[procs[i].exitcode for i in dead]})")
+                continue
+            if msg[0] == "record":
+                yield msg[1]
+            elif msg[0] == "trace":
+                if metrics and metrics.trace:
+                    metrics.trace(msg[1])
+            elif msg[0] == "delta":
+                if on_delta:
+                    on_delta(msg[1])
+            elif msg[0] == "metrics":
+                if metrics:
+                    metrics.set_remote(msg[1], msg[2])
+            elif msg[0] == "done":
+                pending.discard(msg[1])
+                if summary is not None:
+                    summary[msg[1]] = msg[2]
+            else:
+                raise WorkerError(f"worker {msg[1]} failed:\n{msg[2]}")
+    finally:
+        for proc in procs:
+            if proc.is_alive():
+                proc.terminate()
+            proc.join(timeout=5)
@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import json
+import os
+import textwrap
+import time
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from .models import NormalizedTaxRecord
+
+
+class JsonlWriter:
+    def __init__(self, path: Path, *, append: bool = False, flush_every: int = 100, fsync_every_s: float = 5.0):
+        self.path = path
+        self.flush_every = flush_every
+        self.fsync_every_s = fsync_every_s
+        self.written = 0
+        self._fh = open(path, "a" if append else "w", encoding="utf-8")
+        self._last_fsync = time.monotonic()
+
+    def write(self, rec: NormalizedTaxRecord) -> None:
+        self.write_line(rec.model_dump_json())
+
+    def write_line(self, line: str) -> None:
+        # an already-serialized record (e.g. from a worker process)
+        self._fh.write(line)
+        self._fh.write("\n")
+        self.written += 1
+        if self.written % self.flush_every == 0:
+            self._fh.flush()
+        # fsync on a timer so a crash loses seconds of output, not the run
+        if time.monotonic() - self._last_fsync >= self.fsync_every_s:
+            self.sync()
+
+    def sync(self) -> None:
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+        self._last_fsync = time.monotonic()
+
+    def close(self) -> None:
+        if not self._fh.closed:
+            self.sync()
+            self._fh.close()
+
+    def __enter__(self) -> "JsonlWriter":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+def _arrow_schema(include_raw: bool) -> Any:
+    import pyarrow as pa
+
+    fields = [
+        ("county", pa.string()),
+        ("parcel_number", pa.string()),
+        ("delinquent_status", pa.string()),
+        ("delinquent_amount", pa.float64()),
+        ("delinquent_tax_years", pa.list_(pa.string())),
+        ("delinquent_installments", pa.list_(pa.string())),
+        ("penalties_interest", pa.float64()),
+        ("current_year_total_tax", pa.float64()),
+        (
+            "installments",
+            pa.list_(pa.struct([("label", pa.string()), ("amount", pa.float64()), ("due_date", pa.date32())])),
+        ),
+        ("source_url", pa.string()),
+        ("scrape_timestamp_utc", pa.timestamp("s", tz="UTC")),
+        ("errors", pa.list_(pa.string())),
+        ("failure_class", pa.string()),
+        ("attempts", pa.int32()),
+        ("retry_errors", pa.list_(pa.string())),
+    ]
+    if include_raw:
+        # page payloads vary per county, so they are kept as JSON text in their own column
+        fields.append(("raw", pa.string()))
+    return pa.schema(fields)
+
+
+def _arrow_row(d: Dict[str, Any], include_raw: bool) -> Dict[str, Any]:
+    row = dict(d)
+    ts = row.get("scrape_timestamp_utc")
+    if isinstance(ts, str):
+        try:
+            row["scrape_timestamp_utc"] = datetime.fromisoformat(ts.rstrip("Z")).replace(tzinfo=timezone.utc)
+        except ValueError:
+            row["scrape_timestamp_utc"] = None
+    row["installments"] = [
+        {**i, "due_date": date.fromisoformat(i["due_date"]) if isinstance(i.get("due_date"), str) else i.get("due_date")}
+        for i in row.get("installments") or []
+    ]
+    raw = row.pop("raw", None)
+    if include_raw:
+        row["raw"] = json.dumps(raw, default=str) if raw else None
+    return row
+
+
+class ArrowWriter:
+    # columnar output: Parquet (row group per flush) or an Arrow IPC file (record batch per flush).
+    # Unlike JSONL, the file is only readable once close() has written the footer.
+    def __init__(
+        self,
+        path: Path,
+        *,
+        fmt: str = "parquet",
+        include_raw: bool = True,
+        row_group_size: int = 5000,
+        compression: str = "zstd",
+    ):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise RuntimeError(f"{fmt} output needs pyarrow (pip install pyarrow)") from e
+        if fmt not in ("parquet", "arrow"):
+            raise ValueError(f"unknown columnar format {fmt!r}")
+
+        self.path = path
+        self.include_raw = include_raw
+        self.row_group_size = row_group_size
+        self.written = 0
+        self._pa = pa
+        self._schema = _arrow_schema(include_raw)
+        self._rows: List[Dict[str, Any]] = []
+        if fmt == "parquet":
+            self._writer = pq.ParquetWriter(str(path), self._schema, compression=compression)
+        else:
+            options = pa.ipc.IpcWriteOptions(compression=compression)
+            self._writer = pa.ipc.new_file(str(path), self._schema, options=options)
+        self._closed = False
+
+    def write(self, rec: NormalizedTaxRecord) -> None:
+        self._add(rec.model_dump())
+
+    def write_line(self, line: str) -> None:
+        # an already-serialized record (e.g. from a worker process)
+        self._add(json.loads(line))
+
+    def _add(self, d: Dict[str, Any]) -> None:
+        self._rows.append(_arrow_row(d, self.include_raw))
+        self.written += 1
+        if len(self._rows) >= self.row_group_size:
+            self.sync()
+
+    def sync(self) -> None:
+        if self._rows:
+            batch = self._pa.RecordBatch.from_pylist(self._rows, schema=self._schema)
+            self._writer.write_batch(batch)
+            self._rows = []
+
+    def close(self) -> None:
+        if not self._closed:
+            self.sync()
+            self._writer.close()
+            self._closed = True
+
+    def __enter__(self) -> "ArrowWriter":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+RecordWriter = Union[JsonlWriter, ArrowWriter]
+
+
+def jsonl_to_json(src: Path, dst: Path, *, indent: Optional[int] = 2) -> int:
+    # streams JSONL into a JSON array laid out like json.dumps(records, indent=2), one record in memory at a time
+    count = 0
+    pad = " " * (indent or 0)
+    with open(src, encoding="utf-8") as fin, open(dst, "w", encoding="utf-8") as fout:
+        fout.write("[")
+        for line in fin:
+            if not line.strip():
+                continue
+            text = json.dumps(json.loads(line), indent=indent, default=str)
+            fout.write(("\n" if count == 0 else ",\n") if indent is not None else ("" if count == 0 else ", "))
+            fout.write(textwrap.indent(text, pad) if indent is not None else text)
+            count += 1
+        fout.write("\n]" if count and indent is not None else "]")
+    return count
+
+
+def read_records(path: Path) -> Iterator[NormalizedTaxRecord]:
+    # reads back any --output-format; the format is taken from the file extension
+    suffix = path.suffix.lower()
+    if suffix in (".parquet", ".arrow", ".feather"):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise RuntimeError(f"reading {path.name} needs pyarrow (pip install pyarrow)") from e
+        if suffix == ".parquet":
+            batches = pq.ParquetFile(str(path)).iter_batches()
+        else:
+            reader = pa.ipc.open_file(str(path))
+            batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        for batch in batches:
+            for row in batch.to_pylist():
+                ts = row.get("scrape_timestamp_utc")
+                if isinstance(ts, datetime):
+                    row["scrape_timestamp_utc"] = ts.astimezone(timezone.utc).replace(tzinfo=None).isoformat(timespec="seconds") + "Z"
+                raw = row.get("raw")
+                row["raw"] = json.loads(raw) if raw else {}
+                yield NormalizedTaxRecord.model_validate(row)
+        return
+
+    with open(path, encoding="utf-8") as fh:
+        if suffix == ".json":
+            for d in json.load(fh):
+                yield NormalizedTaxRecord.model_validate(d)
+            return
+        for line in fh:
+            if line.strip():
+                yield NormalizedTaxRecord.model_validate_json(line)
@@ -0,0 +1,28 @@
+from pathlib import Path
+
+from inveritax_scraper.bench import regressions, run_bench
+from inveritax_scraper.county_registry import load_county_configs
+from inveritax_scraper.standin import StandInOptions
+
+CONFIGS = load_county_configs(Path(__file__).parents[1] / "src" / "inveritax_scraper" / "county_configs")
+
+
+def test_bench_http_against_standins():
+    results = run_bench(engines=["mock", "http"], concurrencies=[2], county_configs=CONFIGS, per_county=3, server_process=False)
+    assert [(r.engine, r.parcels, r.ok, r.error) for r in results] == [("mock", 9, 9, None), ("http", 9, 9, None)]
+    assert results[1].p50_s is not None and results[1].parcels_per_s > 0
+
+
+def test_bench_failure_injection():
+    (result,) = run_bench(
+        engines=["http"], concurrencies=[2], county_configs=CONFIGS, per_county=2,
+        options=StandInOptions(failure_rate=1.0, seed=1), server_process=False,
+    )
+    assert result.parcels == 6 and result.ok == 0
+
+
+def test_regressions():
+    (result,) = run_bench(engines=["mock"], concurrencies=[1], county_configs=CONFIGS, per_county=2, server_process=False)
+    fast = [{"engine": "mock", "concurrency": 1, "parcels_per_s": result.parcels_per_s * 10}]
+    slow = [{"engine": "mock", "concurrency": 1, "parcels_per_s": result.parcels_per_s / 10}]
+    assert regressions([result], fast) and not regressions([result], slow)
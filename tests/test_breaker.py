@@ -0,0 +1,183 @@
+import asyncio
+
+from inveritax_scraper.config import BreakerPolicy, CountyConfig
+from inveritax_scraper.daemon import ScrapeDaemon
+from inveritax_scraper.engine import ScrapeEngine, ScrapeResult
+from inveritax_scraper.engines_playwright import AsyncPlaywrightEngine
+from inveritax_scraper.failures import SITE_DOWN, TRANSIENT
+from inveritax_scraper.models import ParcelInput
+from inveritax_scraper.orchestrator import run_scrape
+from inveritax_scraper.throttle import FETCH, PROBE, SHED, CircuitBreaker
+from inveritax_scraper.timeouts import StepLatencies
+from inveritax_scraper.waits import Waiter
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_breaker_trips_probes_and_backs_off():
+    clock = Clock()
+    breaker = CircuitBreaker(failures=3, cooldown_s=10, max_cooldown_s=25, give_up_s=100, clock=clock)
+    for _ in range(2):
+        breaker.record(False)
+    breaker.record(True)
+    for _ in range(3):
+        assert breaker.admit() == FETCH
+        breaker.record(False)
+    assert breaker.state == breaker.OPEN and not breaker.ready()
+    assert breaker.admit() == SHED
+
+    clock.now = 10
+    assert breaker.ready() and breaker.admit() == PROBE
+    # one probe at a time; a late failure from before the trip doesn't count as the probe's
+    assert not breaker.ready()
+    breaker.record(False)
+    assert breaker.state == breaker.HALF_OPEN
+    breaker.record(False, probe=True)
+    clock.now = 29
+    assert not breaker.ready()  # cooldown doubled to 20
+    clock.now = 30
+    assert breaker.admit() == PROBE
+    breaker.record(False, probe=True)
+    clock.now = 54
+    assert not breaker.ready()  # capped at 25
+    clock.now = 100
+    # down for give_up_s: parked parcels fail fast, probes still go out
+    assert breaker.shedding()
+    assert breaker.admit() == PROBE
+    breaker.record(True, probe=True)
+    assert breaker.state == breaker.CLOSED and not breaker.shedding() and breaker.trips == 1
+
+
+class FlakyPortal(ScrapeEngine):
+    # Brown's portal times out for its first `down` fetches
+    def __init__(self, down):
+        self.down = down
+        self.calls = []
+
+    async def start(self):
+        return None
+
+    async def stop(self):
+        return None
+
+    async def fetch(self, *, base_url, cfg, parcel):
+        self.calls.append(parcel.county)
+        await asyncio.sleep(0)
+        if parcel.county == "Brown" and self.calls.count("Brown") <= self.down:
+            return ScrapeResult(False, error="Timeout 30000ms exceeded", failure=TRANSIENT)
+        return ScrapeResult(True, data={"current_year_total_tax": "100.00"})
+
+
+def _configs(**breaker):
+    return {
+        c.lower(): CountyConfig(county=c, platform="GCS", base_url=f"http://{c.lower()}.test", breaker=BreakerPolicy(**breaker))
+        for c in ("Brown", "Dane")
+    }
+
+
+def _parcels():
+    return [ParcelInput(county=c, parcel_number=str(i)) for c in ("Brown", "Dane") for i in range(20)]
+
+
+def test_open_circuit_parks_a_county_until_a_probe_gets_through():
+    engine = FlakyPortal(down=5)
+    recs = asyncio.run(run_scrape(parcels=_parcels(), county_configs=_configs(failures=3, cooldown_s=0.02), engine=engine, max_concurrency=1))
+    # three failures trip it, two probes fail and the third recovers the county
+    assert engine.calls.count("Brown") == 20
+    assert sum(r.failure_class == TRANSIENT for r in recs) == 5
+    first_probe = [i for i, c in enumerate(engine.calls) if c == "Brown"][3]
+    # Dane kept going while Brown was parked
+    assert engine.calls[:first_probe].count("Dane") == 20
+
+
+def test_open_circuit_fails_the_rest_fast():
+    engine = FlakyPortal(down=100)
+    recs = asyncio.run(
+        run_scrape(parcels=_parcels(), county_configs=_configs(failures=3, cooldown_s=60, on_open="fail"), engine=engine, max_concurrency=1)
+    )
+    assert engine.calls.count("Brown") == 3
+    shed = [r for r in recs if r.errors and r.errors[0].startswith("circuit open")]
+    assert len(shed) == 17 and {r.failure_class for r in shed} == {"site_down"}
+    assert all(r.current_year_total_tax == 100.0 for r in recs if r.county == "Dane")
+
+
+class HangingPortal(ScrapeEngine):
+    # the first fetch never comes back; the rest succeed
+    def __init__(self):
+        self.calls = 0
+
+    async def start(self):
+        return None
+
+    async def stop(self):
+        return None
+
+    async def fetch(self, *, base_url, cfg, parcel):
+        self.calls += 1
+        if self.calls == 1:
+            await asyncio.Event().wait()
+        return ScrapeResult(True, data={"current_year_total_tax": "100.00"})
+
+
+def test_cancelled_probe_lets_the_next_job_probe_again():
+    engine = HangingPortal()
+    daemon = ScrapeDaemon(engine=engine, county_configs=_configs())
+    breaker = daemon.breakers["brown"] = CircuitBreaker(failures=1, cooldown_s=0)
+    breaker.record(False)
+
+    async def scenario():
+        records = []
+        job = asyncio.create_task(daemon.run_job([ParcelInput(county="Brown", parcel_number="1")], records.append))
+        while not engine.calls:
+            await asyncio.sleep(0)
+        assert breaker.state == breaker.HALF_OPEN
+        # the client went away mid-probe
+        job.cancel()
+        await asyncio.gather(job, return_exceptions=True)
+        assert breaker.state == breaker.OPEN and breaker.ready()
+        await daemon.run_job([ParcelInput(county="Brown", parcel_number="2")], records.append)
+        return records
+
+    records = asyncio.run(scenario())
+    assert [r.parcel_number for r in records] == ["2"] and records[0].current_year_total_tax == 100.0
+    assert breaker.state == breaker.CLOSED and engine.calls == 2
+
+
+def test_learned_timeouts_follow_p95():
+    latencies = StepLatencies(min_samples=20, multiplier=3, floor_ms=2000)
+    for _ in range(19):
+        latencies.add("search", 1.0)
+    # too few samples: the fixed timeout stands
+    assert latencies.timeout_ms("search", 15000) == 15000
+    latencies.observe([("search", 0.0, 2.0)])
+    assert latencies.timeout_ms("search", 15000) == 6000
+    assert latencies.timeout_ms("search", 5000) == 5000  # never longer than the fixed one
+    for _ in range(200):
+        latencies.add("search", 0.1)
+    assert latencies.timeout_ms("search", 15000) == 2000  # floor
+
+    waiter = Waiter(page=None)
+    assert waiter.timeout("search", 15000) == 15000
+    waiter.timeouts = latencies
+    assert waiter.timeout("search", 15000) == 2000 and waiter.timeout("results", 15000) == 15000
+    for _ in range(200):
+        latencies.add("search", 10.0)
+    # a portal that slows down gets its timeout back, but only up to the fixed one
+    assert latencies.timeout_ms("search", 15000) == 15000
+
+
+def test_engine_learns_from_timeouts_but_not_outages():
+    engine = AsyncPlaywrightEngine()
+    cfg = {"county": "Brown"}
+    engine._learn(cfg, [ScrapeResult(False, spans=[("goto", 0.0, 0.01)], failure=SITE_DOWN)], 0.01)
+    for _ in range(20):
+        engine._learn(cfg, [ScrapeResult(False, spans=[("search", 0.0, 4.0)], failure=TRANSIENT)], 4.5)
+    latencies = engine._latency("brown")
+    assert latencies.p95("goto") is None
+    assert (latencies.timeout_ms("search", 15000), latencies.timeout_ms("fetch", 30000)) == (12000, 13500)
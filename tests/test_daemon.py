@@ -0,0 +1,40 @@
+import asyncio
+import json
+
+import httpx
+
+from inveritax_scraper.config import CountyConfig
+from inveritax_scraper.daemon import ScrapeDaemon, serve_daemon
+from inveritax_scraper.engine import MockEngine
+
+
+def test_daemon_streams_jobs_on_one_warm_engine():
+    configs = {"brown": CountyConfig(county="Brown", platform="GCS", base_url="http://brown.test")}
+    fixtures = {f"brown::{n}": {"current_year_total_tax": n} for n in "123"}
+    daemon = ScrapeDaemon(engine=MockEngine(fixtures=fixtures), county_configs=configs)
+
+    async def run():
+        stop = asyncio.Event()
+        ready = asyncio.get_running_loop().create_future()
+        server = asyncio.create_task(serve_daemon(daemon, port=0, ready=ready.set_result, stop=stop))
+        url = await ready
+        async with httpx.AsyncClient(base_url=url) as client:
+            jobs = [
+                client.post("/scrape", json={"parcels": [{"county": "Brown", "parcel_number": n} for n in "12"]}),
+                client.post("/scrape", json=[{"county": "Brown", "parcel_number": "3"}, {"county": "Brown", "parcel_number": "9"}]),
+            ]
+            responses = await asyncio.gather(*jobs)
+            bad = await client.post("/scrape", content=b'{"parcels": []}')
+            health = (await client.get("/health")).json()
+        stop.set()
+        await server
+        return responses, bad, health
+
+    responses, bad, health = asyncio.run(run())
+    lines = [[json.loads(line) for line in r.text.splitlines()] for r in responses]
+    assert sorted(d["parcel_number"] for d in lines[0]) == ["1", "2"]
+    assert {d["parcel_number"]: d["errors"] for d in lines[1]} == {"3": [], "9": ["No fixture for brown::9"]}
+    assert bad.status_code == 400
+    assert (health["jobs"], health["parcels"]) == (2, 4)
+    # both jobs went through the same county budget
+    assert list(daemon.throttles) == ["brown"]
@@ -0,0 +1,65 @@
+import pytest
+from pydantic import ValidationError
+
+from inveritax_scraper.config import CountyConfig
+from inveritax_scraper.extraction import compile_rules, extract_html, jsonpath_get
+
+
+PAGE = """<html><body>
+<span id="lblGrossTax"> $3,207.13 </span>
+<a id="lnk" href="/detail?id=1">Details</a>
+<table id="installments">
+  <tr><td>First half</td><td>$1,603.57</td></tr>
+  <tr><td>Second half</td><td>$1,603.56</td></tr>
+</table>
+</body></html>"""
+
+
+def test_rule_shapes_offline():
+    data = extract_html(PAGE, {
+        "current_year_total_tax": "#lblGrossTax",
+        "detail_href": {"selector": "#lnk", "attr": "href"},
+        "amounts": {"selector": "#installments td:nth-child(2)", "all": True},
+        "installments": {"rows": "#installments tr", "columns": {"label": "td:nth-child(1)", "amount": "td:nth-child(2)"}},
+        "missing": {"selector": "#nope"},
+    })
+    assert data["current_year_total_tax"] == "$3,207.13"
+    assert data["detail_href"] == "/detail?id=1"
+    assert data["amounts"] == ["$1,603.57", "$1,603.56"]
+    assert data["installments"][1] == {"label": "Second half", "amount": "$1,603.56"}
+    assert data["missing"] is None
+
+
+def test_compile_rules_produces_one_plan_entry_per_field():
+    plan = compile_rules({
+        "a": "#a",
+        "b": {"selector": "#b", "attr": "href"},
+        "c": {"rows": "tr", "columns": {"x": "td", "y": {"xpath": "./td[2]"}}},
+        "d": {"css": "#d"},
+        "e": {"xpath": "//td", "all": True},
+    })
+    assert [(p["key"], p["kind"]) for p in plan] == [("a", "one"), ("b", "one"), ("c", "table"), ("d", "one"), ("e", "all")]
+    assert plan[2]["columns"][1]["xpath"] == "./td[2]" and plan[3]["selector"] == "#d" and plan[4]["xpath"] == "//td"
+
+
+@pytest.mark.parametrize(
+    "rule, message",
+    [
+        ({"jsonpath": "$.TotalTax"}, "jsonpath only applies to JSON"),
+        ({"attr": "href"}, "needs one of selector, css, xpath or rows"),
+        ({"rows": "tr", "columns": {"x": {"jsonpath": "$.x"}}}, "'tax.x': jsonpath"),
+        (["#a"], "must be a selector string or a mapping"),
+    ],
+)
+def test_browser_rules_the_page_cannot_run_fail_at_load(rule, message):
+    with pytest.raises(ValueError, match=message):
+        compile_rules({"tax": rule})
+    with pytest.raises(ValidationError, match=message):
+        CountyConfig(county="Brown", platform="GCS", base_url="http://brown.test", selectors={"extract": {"tax": rule}})
+
+
+def test_jsonpath_subset():
+    doc = {"parcel": {"taxes": [{"total": 10}], "owner name": "X"}}
+    assert jsonpath_get(doc, "$.parcel.taxes[0].total") == 10
+    assert jsonpath_get(doc, "$.parcel['owner name']") == "X"
+    assert jsonpath_get(doc, "$.parcel.taxes[3].total") is None
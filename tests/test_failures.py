@@ -0,0 +1,67 @@
+import asyncio
+
+import httpx
+
+from inveritax_scraper.config import CountyConfig
+from inveritax_scraper.engine import ScrapeResult
+from inveritax_scraper.engines_playwright import MockEngine
+from inveritax_scraper.failures import NOT_FOUND, SITE_DOWN, TRANSIENT, RetryPolicy, classify_error, classify_exception
+from inveritax_scraper.models import ParcelInput
+from inveritax_scraper.orchestrator import run_scrape
+
+
+def test_classify():
+    assert classify_error("Timeout 30000ms exceeded.") == TRANSIENT
+    assert classify_error("page.goto: net::ERR_CONNECTION_RESET at https://x") == TRANSIENT
+    assert classify_error("page.goto: net::ERR_NAME_NOT_RESOLVED at https://x") == SITE_DOWN
+    assert classify_error("No fixture for brown::1") == NOT_FOUND
+    assert classify_error("selector is not a string") == "error"
+
+    request = httpx.Request("GET", "http://x.test")
+    for status, failure in ((404, NOT_FOUND), (429, TRANSIENT), (502, TRANSIENT), (503, SITE_DOWN)):
+        e = httpx.HTTPStatusError("boom", request=request, response=httpx.Response(status, request=request))
+        assert classify_exception(e) == failure
+    assert classify_exception(httpx.ReadTimeout("slow", request=request)) == TRANSIENT
+    assert classify_exception(httpx.ConnectError("refused", request=request)) == SITE_DOWN
+
+
+def test_retry_policy_backoff():
+    policy = RetryPolicy(max_attempts=3, base_s=1.0, max_s=3.0, seed=1)
+    assert policy.should_retry(TRANSIENT, 2) and not policy.should_retry(TRANSIENT, 3)
+    assert not policy.should_retry(NOT_FOUND, 1)
+    assert 0.5 <= policy.delay(1) <= 1.0
+    assert 1.5 <= policy.delay(3) <= 3.0  # 4s capped at max_s
+
+
+class FlakyEngine(MockEngine):
+    def __init__(self, fixtures, flaky):
+        super().__init__(fixtures=fixtures)
+        self.flaky = dict(flaky)
+        self.calls = []
+
+    async def fetch(self, *, base_url, cfg, parcel):
+        self.calls.append(parcel.parcel_number)
+        if self.flaky.get(parcel.parcel_number):
+            self.flaky[parcel.parcel_number] -= 1
+            return ScrapeResult(False, error="Timeout 30000ms exceeded.", step="taxes")
+        return await super().fetch(base_url=base_url, cfg=cfg, parcel=parcel)
+
+
+def test_transient_failures_are_requeued_at_the_end():
+    configs = {"brown": CountyConfig(county="Brown", platform="GCS", base_url="http://brown.test")}
+    fixtures = {f"brown::{n}": {"current_year_total_tax": n} for n in "1234"}
+    engine = FlakyEngine(fixtures, {"1": 1, "2": 5})
+    parcels = [ParcelInput(county="Brown", parcel_number=n) for n in "12345"]
+
+    records = asyncio.run(
+        run_scrape(parcels=parcels, county_configs=configs, engine=engine, max_concurrency=1, retry=RetryPolicy(base_s=0.01))
+    )
+
+    # retries only start once every parcel had its first attempt
+    assert engine.calls[:5] == list("12345")
+    by_pn = {r.parcel_number: r for r in records}
+    assert (by_pn["1"].attempts, by_pn["1"].errors, by_pn["1"].retry_errors) == (2, [], ["taxes: Timeout 30000ms exceeded."])
+    assert (by_pn["2"].attempts, by_pn["2"].failure_class, len(by_pn["2"].retry_errors)) == (3, TRANSIENT, 2)
+    # not-found parcels are not retried
+    assert (by_pn["5"].attempts, by_pn["5"].failure_class) == (1, NOT_FOUND)
+    assert engine.calls.count("5") == 1
@@ -0,0 +1,167 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from inveritax_scraper.config import CountyConfig
+from inveritax_scraper.engine import ScrapeEngine, ScrapeResult
+from inveritax_scraper.engines_http import HttpEngine, HybridEngine
+from inveritax_scraper.models import ParcelInput
+
+
+SEARCH_FORM = """<html><body><form method="post" action="Search.aspx">
+<input type="hidden" name="__VIEWSTATE" value="{vs}"/>
+<input type="text" name="mtxtParcelNumber" value=""/>
+<input type="submit" name="ButtonParcelSearch" value="Search"/>
+{body}</form></body></html>"""
+
+
+class StandInPortal(BaseHTTPRequestHandler):
+    # tiny GCS-style postback portal plus a JSON endpoint
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/api/parcel":
+            parcel = parse_qs(url.query)["id"][0]
+            self._send(json.dumps({"parcel": {"id": parcel, "taxes": [{"total": "1,850.42"}]}}), "application/json")
+        else:
+            self._send(SEARCH_FORM.format(vs="vs-search", body=""))
+
+    def do_POST(self):
+        form = parse_qs(self.rfile.read(int(self.headers["Content-Length"])).decode())
+        if form.get("__EVENTTARGET") == ["grid$LinkButtonParcelNumber_0"] and form.get("__VIEWSTATE") == ["vs-results"]:
+            self._send("<html><body><span id='lblGrossTax'>$3,207.13</span></body></html>")
+        elif form.get("__VIEWSTATE") == ["vs-search"] and form.get("mtxtParcelNumber") == ["1-1360-1"]:
+            link = "<a id='LinkButtonParcelNumber_0' href=\"javascript:__doPostBack('grid$LinkButtonParcelNumber_0','')\">1-1360-1</a>"
+            self._send(SEARCH_FORM.format(vs="vs-results", body=link))
+        else:
+            self._send(SEARCH_FORM.format(vs="vs-search", body="No parcels found"))
+
+    def _send(self, body, content_type="text/html"):
+        raw = body.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def log_message(self, *args):
+        pass
+
+
+def _serve():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInPortal)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+POSTBACK_RECIPE = {
+    "steps": [
+        {"url": "/Search.aspx"},
+        {"replay_form": True, "form": {"mtxtParcelNumber": "{parcel_number}", "ButtonParcelSearch": "Search"}},
+        {"replay_form": True, "postback_from": {"css": "a[id*='LinkButtonParcelNumber']"}, "url": "Search.aspx"},
+    ],
+    "extract": {"current_year_total_tax": {"css": "#lblGrossTax"}},
+}
+
+
+def _cfg(base_url, recipe):
+    return CountyConfig(county="Brown", platform="GCS", base_url=base_url, http=recipe).model_dump()
+
+
+async def _fetch(engine, cfg, parcel_number):
+    await engine.start()
+    try:
+        return await engine.fetch(base_url=cfg["base_url"], cfg=cfg, parcel=ParcelInput(county="Brown", parcel_number=parcel_number))
+    finally:
+        await engine.stop()
+
+
+def test_viewstate_postback_recipe():
+    server, base = _serve()
+    try:
+        res = asyncio.run(_fetch(HttpEngine(), _cfg(f"{base}/Search.aspx", POSTBACK_RECIPE), "1-1360-1"))
+    finally:
+        server.shutdown()
+    assert res.ok, res.error
+    assert res.data == {"current_year_total_tax": "$3,207.13"}
+
+
+def test_json_recipe():
+    recipe = {
+        "steps": [{"url": "/api/parcel", "params": {"id": "{parcel_number}"}}],
+        "format": "json",
+        "extract": {"parcel_number": {"jsonpath": "$.parcel.id"}, "current_year_total_tax": {"jsonpath": "$.parcel.taxes[0].total"}},
+    }
+    server, base = _serve()
+    try:
+        res = asyncio.run(_fetch(HttpEngine(), _cfg(base, recipe), "6000350000"))
+    finally:
+        server.shutdown()
+    assert res.ok, res.error
+    assert res.data == {"parcel_number": "6000350000", "current_year_total_tax": "1,850.42"}
+
+
+class _FallbackBrowser(ScrapeEngine):
+    def __init__(self):
+        self.started = False
+        self.calls = 0
+
+    async def start(self):
+        self.started = True
+
+    async def stop(self):
+        self.started = False
+
+    async def fetch(self, *, base_url, cfg, parcel):
+        self.calls += 1
+        return ScrapeResult(True, data={"current_year_total_tax": "from browser"}, source_url=base_url)
+
+
+def test_hybrid_falls_back_to_browser_when_recipe_misses():
+    browser = _FallbackBrowser()
+    server, base = _serve()
+    try:
+        res = asyncio.run(_fetch(HybridEngine(http=HttpEngine(), browser=browser), _cfg(f"{base}/Search.aspx", POSTBACK_RECIPE), "9-9999"))
+    finally:
+        server.shutdown()
+    assert res.ok
+    assert res.data == {"current_year_total_tax": "from browser"}
+    assert browser.calls == 1
+
+
+def test_hybrid_falls_back_when_the_recipe_no_longer_fits_the_page():
+    # an HTML page where the recipe expects JSON, and an XPath lxml can't evaluate
+    json_recipe = {"steps": [{"url": "/Search.aspx"}], "format": "json", "extract": {"current_year_total_tax": {"jsonpath": "$.total"}}}
+    xpath_recipe = {"steps": [{"url": "/Search.aspx"}], "extract": {"current_year_total_tax": {"xpath": "//span[@id='lblGrossTax'"}}}
+    server, base = _serve()
+    try:
+        for recipe in (json_recipe, xpath_recipe):
+            failed = asyncio.run(_fetch(HttpEngine(), _cfg(base, recipe), "1-1360-1"))
+            assert not failed.ok and failed.step == "extract" and failed.failure == "error"
+            assert failed.error.startswith("http recipe extract failed")
+
+            browser = _FallbackBrowser()
+            res = asyncio.run(_fetch(HybridEngine(http=HttpEngine(), browser=browser), _cfg(base, recipe), "1-1360-1"))
+            assert res.ok and browser.calls == 1
+    finally:
+        server.shutdown()
+
+
+def test_hybrid_falls_back_when_a_link_selector_is_broken():
+    steps = POSTBACK_RECIPE["steps"]
+    broken = [
+        {**POSTBACK_RECIPE, "steps": steps[:2] + [{**steps[2], "postback_from": {"css": "a[id*='LinkButton"}}]},
+        {**POSTBACK_RECIPE, "steps": steps[:2] + [{"url_from": {"xpath": "//a[@id='LinkButtonParcelNumber'"}}]},
+    ]
+    server, base = _serve()
+    try:
+        for recipe in broken:
+            failed = asyncio.run(_fetch(HttpEngine(), _cfg(base, recipe), "1-1360-1"))
+            assert not failed.ok and failed.step == "http_step_2" and failed.error.startswith("http recipe failed")
+
+            browser = _FallbackBrowser()
+            res = asyncio.run(_fetch(HybridEngine(http=HttpEngine(), browser=browser), _cfg(base, recipe), "1-1360-1"))
+            assert res.ok and browser.calls == 1
+    finally:
+        server.shutdown()
@@ -0,0 +1,97 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+
+from inveritax_scraper.config import CountyConfig, RefreshPolicy
+from inveritax_scraper.engines_playwright import MockEngine
+from inveritax_scraper.incremental import IncrementalRun, due_reason, load_previous, record_key
+from inveritax_scraper.models import NormalizedTaxRecord, ParcelInput
+from inveritax_scraper.orchestrator import iter_scrape
+from inveritax_scraper.writers import JsonlWriter
+
+NOW = datetime(2025, 3, 10, tzinfo=timezone.utc)
+POLICY = RefreshPolicy.model_validate({
+    "max_age_days": 91,
+    "windows": ["12-15"],
+    "fields": {
+        "delinquent_status": {"windows": ["02-01"]},
+        "delinquent_amount": {"max_age_days": 6, "when_set": True},
+    },
+})
+
+
+def _rec(pn, stamp, **kw):
+    return NormalizedTaxRecord(county="Brown", parcel_number=pn, scrape_timestamp_utc=stamp, **kw)
+
+
+def test_due_reason():
+    assert due_reason(None, POLICY, NOW) == "new"
+    assert due_reason(_rec("1", "2025-03-05T00:00:00Z", errors=["x"]), POLICY, NOW) == "failed last time"
+    assert due_reason(_rec("1", "2025-03-05T00:00:00Z"), POLICY, NOW) is None
+    # the Feb 1 window passed since this was fetched
+    assert due_reason(_rec("1", "2025-01-20T00:00:00Z"), POLICY, NOW) == "delinquent_status window 02-01"
+    # last year's December window
+    assert due_reason(_rec("1", "2024-12-12T00:00:00Z"), POLICY, NOW) == "window 12-15"
+    # open delinquencies go stale after 6 days, clean parcels don't
+    assert due_reason(_rec("1", "2025-03-02T00:00:00Z", delinquent_amount=12.5), POLICY, NOW) == "delinquent_amount older than 6 days"
+    assert due_reason(_rec("1", "2025-03-02T00:00:00Z", delinquent_amount=None), POLICY, NOW) is None
+
+
+def test_refresh_defaults_follow_the_tax_calendar():
+    default = CountyConfig(county="Brown", platform="GCS", base_url="http://brown.test").refresh
+    assert default.windows == ["12-15"] and default.fields["delinquent_amount"].when_set
+    assert due_reason(_rec("1", "2025-01-20T00:00:00Z"), default, NOW) == "delinquent_status window 02-01"
+    # a county block only overrides what it names
+    custom = CountyConfig(county="Dane", platform="GCS", base_url="http://dane.test", refresh={"windows": ["11-30"]}).refresh
+    assert custom.windows == ["11-30"] and custom.fields == default.fields
+
+
+class CountingEngine(MockEngine):
+    def __init__(self, fixtures):
+        super().__init__(fixtures=fixtures)
+        self.calls = []
+
+    async def fetch(self, *, base_url, cfg, parcel):
+        self.calls.append(parcel.parcel_number)
+        return await super().fetch(base_url=base_url, cfg=cfg, parcel=parcel)
+
+
+def test_incremental_run_fetches_due_parcels_and_emits_delta(tmp_path):
+    prev_path = tmp_path / "prev.jsonl"
+    with JsonlWriter(prev_path) as w:
+        w.write(_rec("fresh", "2025-03-05T00:00:00Z", current_year_total_tax=100.0))
+        w.write(_rec("same", "2025-01-20T00:00:00Z", current_year_total_tax=200.0))
+        w.write(_rec("moved", "2025-01-20T00:00:00Z", current_year_total_tax=300.0))
+        w.write(_rec("broken", "2025-01-20T00:00:00Z", current_year_total_tax=400.0))
+        w.write(_rec("gone", "2025-03-05T00:00:00Z"))
+    configs = {"brown": CountyConfig(county="Brown", platform="GCS", base_url="http://brown.test", refresh=POLICY)}
+    fixtures = {
+        "brown::same": {"current_year_total_tax": "200"},
+        "brown::moved": {"current_year_total_tax": "350"},
+        "brown::new": {"current_year_total_tax": "50"},
+    }
+    engine = CountingEngine(fixtures)
+    inc = IncrementalRun(load_previous(prev_path), configs, now=NOW)
+    parcels = [ParcelInput(county="Brown", parcel_number=n) for n in ("fresh", "same", "moved", "broken", "new")]
+    snapshot, delta = [], []
+
+    async def run():
+        async for rec in iter_scrape(parcels=inc.select(parcels, snapshot.append), county_configs=configs, engine=engine, show_progress=False):
+            rec, line = inc.merge(rec)
+            snapshot.append(rec)
+            if line:
+                delta.append(json.loads(line))
+        delta.extend(json.loads(line) for line in inc.removed())
+
+    asyncio.run(run())
+
+    assert sorted(engine.calls) == ["broken", "moved", "new", "same"]
+    by_pn = {r.parcel_number: r for r in snapshot}
+    assert set(by_pn) == {"fresh", "same", "moved", "broken", "new"}
+    # a failed refresh keeps the last good values
+    assert by_pn["broken"].current_year_total_tax == 400.0 and not by_pn["broken"].errors
+    changes = {d["parcel_number"]: d for d in delta}
+    assert set(changes) == {"moved", "new", "broken", "gone"}
+    assert changes["moved"]["fields"] == {"current_year_total_tax": {"old": 300.0, "new": 350.0}}
+    assert [changes[pn]["change"] for pn in ("new", "broken", "gone")] == ["added", "refresh_failed", "removed"]
+    assert inc.summary()["carried"] == 1 and record_key("Brown", "gone") in inc.previous
@@ -8,3 +8,31 @@ def test_load_parcels():
         return
     parcels = load_parcels_from_excel(xlsx)
     assert len(parcels) > 0
+
+
+def test_csv_and_parquet_inputs_match(tmp_path):
+    from inveritax_scraper.input_loader import LoadStats, iter_parcels
+
+    csv_path = tmp_path / "parcels.csv"
+    csv_path.write_text(
+        "County,Parcel Number,Owner Name,Property Address\n"
+        "Green Lake,006000350000,\"KASUBOSKI, JAMIE\",\n"
+        "Brown,,NOBODY,\n"
+        "Brown,1-2047,BACH ALLI,1029 ROCKDALE ST\n"
+    )
+    stats = LoadStats()
+    parcels = list(iter_parcels(csv_path, stats))
+    assert [p.parcel_number for p in parcels] == ["006000350000", "1-2047"]
+    assert parcels[0].owner_name == "KASUBOSKI, JAMIE" and parcels[0].property_address is None
+    assert (stats.rows, stats.parcels) == (3, 2)
+
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        return
+    table = pa.Table.from_pylist([p.model_dump() for p in parcels]).rename_columns(
+        ["County", "Parcel Number", "Owner Name", "Property Address"]
+    )
+    pq.write_table(table, tmp_path / "parcels.parquet")
+    assert list(iter_parcels(tmp_path / "parcels.parquet")) == parcels
@@ -0,0 +1,190 @@
+import asyncio
+
+import pytest
+
+from inveritax_scraper.engine import ScrapeResult
+from inveritax_scraper.engines_playwright import AsyncPlaywrightEngine
+from inveritax_scraper.memory import MemoryGovernor, children_rss_mb, host_available_mb
+from inveritax_scraper.models import ParcelInput
+from inveritax_scraper.session_pool import SessionPool
+from inveritax_scraper.throttle import AdjustableLimiter
+
+
+def test_governor_recycles_and_sheds_contexts_under_pressure():
+    gov = MemoryGovernor(max_contexts=8, recycle_pages=100, ceiling_mb=2000, min_free_mb=500)
+    gov.page_done(99)
+    assert gov.recycle_reason() is None
+    gov.observe(2500, 4000)
+    assert gov.recycle_reason() == "memory"
+    gov.recycled("memory")
+    gov.page_done(1)
+    assert gov.recycle_reason() is None
+    gov.page_done(99)
+    assert gov.recycle_reason() == "pages"
+
+    gov.observe(300, 400)
+    assert gov.context_limit(8) == 4
+    assert gov.context_limit(1) == 1
+    gov.observe(300, 800)  # between the thresholds: hold
+    assert gov.context_limit(4) == 4
+    gov.observe(300, 1200)
+    assert gov.context_limit(4) == 5
+    assert gov.context_limit(8) == 8
+    stats = gov.stats()
+    assert stats["recycles_memory"] == 1 and stats["peak_browser_rss_mb"] == 2500 and stats["pages_total"] == 199
+
+
+def test_memory_probes_run_here():
+    assert (children_rss_mb() or 0) >= 0
+    assert host_available_mb() is None or host_available_mb() > 0
+
+
+def test_recycle_waits_for_in_flight_fetches():
+    async def scenario():
+        engine = AsyncPlaywrightEngine(recycle_pages=3, min_free_mb=None)
+        events = []
+        in_flight = 0
+
+        async def fetch(*, base_url, cfg, parcel):
+            nonlocal in_flight
+            in_flight += 1
+            events.append(("fetch", parcel.parcel_number))
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return ScrapeResult(True)
+
+        async def relaunch():
+            events.append(("launch", in_flight))
+            engine._browser = object()
+
+        async def close_browser():
+            events.append(("close", in_flight))
+            engine._browser = None
+            await asyncio.sleep(0.03)
+
+        async def later(parcel):
+            # arrives while the old browser is being closed
+            await asyncio.sleep(0.02)
+            return await engine.fetch(base_url="", cfg={}, parcel=parcel)
+
+        engine._fetch = fetch
+        engine._launch = relaunch
+        engine._close_browser = close_browser
+        engine._browser = object()
+        parcels = [ParcelInput(county="Brown", parcel_number=str(i)) for i in range(5)]
+        await asyncio.gather(*(engine.fetch(base_url="", cfg={}, parcel=p) for p in parcels[:3]), *(later(p) for p in parcels[3:]))
+        return engine, events
+
+    engine, events = asyncio.run(scenario())
+    # nothing is in flight while the browser is swapped, and late fetches wait for the new one
+    assert events == [("fetch", "0"), ("fetch", "1"), ("fetch", "2"), ("close", 0), ("launch", 0), ("fetch", "3"), ("fetch", "4")]
+    assert engine.stats()["recycles_pages"] == 1
+
+
+def test_failed_relaunch_is_retried_by_later_fetches():
+    async def scenario():
+        engine = AsyncPlaywrightEngine(recycle_pages=None, min_free_mb=None)
+        launches = []
+
+        async def launch():
+            launches.append(len(launches))
+            if len(launches) == 1:
+                raise RuntimeError("firefox exited during startup")
+            engine._browser = object()
+            engine._pool = SessionPool(engine._browser, setup=None)
+
+        async def close_browser():
+            engine._browser = engine._pool = None
+
+        async def fetch(*, base_url, cfg, parcel):
+            return engine._not_running() or ScrapeResult(True)
+
+        engine._launch = launch
+        engine._close_browser = close_browser
+        engine._fetch = fetch
+        engine._browser = object()
+        engine._pool = SessionPool(engine._browser, setup=None)
+        engine._contexts = AdjustableLimiter(4)
+        engine._relaunch_backoff = 0.02
+        parcel = ParcelInput(county="Brown", parcel_number="1")
+
+        engine._request_recycle("crash")
+        await asyncio.sleep(0.01)
+        down = await engine.fetch(base_url="", cfg={}, parcel=parcel)
+        await asyncio.sleep(0.03)
+        # the next fetch after the backoff relaunches the browser and runs on it
+        up = await engine.fetch(base_url="", cfg={}, parcel=parcel)
+        return engine, launches, down, up
+
+    engine, launches, down, up = asyncio.run(scenario())
+    assert not down.ok and down.failure == "transient" and "firefox exited during startup" in down.error
+    assert up.ok and launches == [0, 1]
+    stats = engine.stats()
+    assert (stats["browser_down"], stats["relaunch_failures_total"], stats["recycles_crash"]) == (0, 1, 1)
+
+
+def test_monitor_survives_a_failed_sample(monkeypatch):
+    import inveritax_scraper.engines_playwright as engines_playwright
+
+    samples = []
+
+    def rss():
+        samples.append(1)
+        if len(samples) == 1:
+            raise PermissionError("/proc/1234/statm")
+        return 300.0
+
+    monkeypatch.setattr(engines_playwright, "children_rss_mb", rss)
+    monkeypatch.setattr(engines_playwright, "host_available_mb", lambda: 4000.0)
+
+    async def scenario():
+        engine = AsyncPlaywrightEngine(min_free_mb=None, sample_s=0.01)
+        engine._contexts = AdjustableLimiter(4)
+        monitor = asyncio.create_task(engine._monitor())
+        await asyncio.sleep(0.1)
+        monitor.cancel()
+        return engine, monitor
+
+    engine, monitor = asyncio.run(scenario())
+    assert monitor.cancelled() and len(samples) > 1
+    assert engine.stats()["browser_rss_mb"] == 300.0
+
+
+class _Context:
+    def __init__(self, fail_page):
+        self.fail_page = fail_page
+        self.closed = False
+
+    async def new_page(self):
+        if self.fail_page:
+            raise RuntimeError("page crashed")
+        return object()
+
+    async def close(self):
+        self.closed = True
+
+
+class _Browser:
+    def __init__(self, fail_page=False):
+        self.fail_page = fail_page
+        self.contexts = []
+
+    async def new_context(self, **_):
+        self.contexts.append(_Context(self.fail_page))
+        return self.contexts[-1]
+
+
+@pytest.mark.parametrize("fail_page", [True, False])
+def test_session_pool_closes_contexts_when_setup_fails(fail_page):
+    async def setup(session, cfg):
+        raise TimeoutError("guest login timed out")
+
+    async def scenario():
+        browser = _Browser(fail_page)
+        pool = SessionPool(browser, setup=setup)
+        with pytest.raises((RuntimeError, TimeoutError)):
+            await pool.acquire({"county": "Brown"})
+        return browser, pool
+
+    browser, pool = asyncio.run(scenario())
+    assert browser.contexts[0].closed and pool.open == 0
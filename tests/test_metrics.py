@@ -0,0 +1,70 @@
+import asyncio
+import json
+import urllib.request
+
+from inveritax_scraper.config import CountyConfig
+from inveritax_scraper.engine import ScrapeResult
+from inveritax_scraper.engines_playwright import MockEngine
+from inveritax_scraper.metrics import RunMetrics, Spans, prometheus_text, serve_metrics
+from inveritax_scraper.models import ParcelInput
+from inveritax_scraper.orchestrator import run_scrape
+
+
+class SteppingEngine(MockEngine):
+    async def fetch(self, *, base_url, cfg, parcel):
+        spans = Spans()
+        with spans.step("search"):
+            await asyncio.sleep(0)
+        res = await super().fetch(base_url=base_url, cfg=cfg, parcel=parcel)
+        return ScrapeResult(res.ok, res.data, res.source_url, res.error, timings={"after_search": 0.002}, spans=spans.take())
+
+
+def test_run_metrics_aggregate_per_county_and_export():
+    lines = []
+    metrics = RunMetrics(trace=lines.append)
+    configs = {"brown": CountyConfig(county="Brown", platform="GCS", base_url="http://brown.test")}
+    engine = SteppingEngine(fixtures={"brown::1": {"current_year_total_tax": "10.00"}})
+    parcels = [ParcelInput(county="Brown", parcel_number="1"), ParcelInput(county="Brown", parcel_number="2")]
+
+    asyncio.run(run_scrape(parcels=parcels, county_configs=configs, engine=engine, metrics=metrics))
+
+    summary = metrics.summary()["brown"]
+    assert (summary["total"], summary["ok"], summary["success_rate"]) == (2, 1, 0.5)
+
+    traced = sorted((json.loads(line) for line in lines), key=lambda t: t["parcel_number"])
+    assert [t["ok"] for t in traced] == [True, False]
+    assert traced[0]["steps"][0]["step"] == "search"
+    assert traced[0]["waits"] == {"after_search": 0.002}
+
+    text = prometheus_text(metrics)
+    assert 'inveritax_fetches_total{county="brown",outcome="error"} 1' in text
+    assert 'inveritax_step_seconds_count{county="brown",step="search"} 2' in text
+    assert 'inveritax_wait_seconds_bucket{county="brown",point="after_search",le="0.01"} 2' in text
+
+
+def test_worker_snapshots_merge_into_parent():
+    parent, worker = RunMetrics(), RunMetrics()
+    worker.record("Brown", "1", ok=True, fetch_s=0.3)
+    worker.record("Brown", "2", ok=True, fetch_s=3.0)
+    parent.record("Green Lake", "9", ok=False, fetch_s=1.0)
+    parent.set_remote(0, worker.snapshot())
+
+    summary = parent.summary()
+    assert summary["brown"]["total"] == 2
+    assert summary["brown"]["p50_s"] == 0.5
+    assert summary["brown"]["p95_s"] == 5.0
+    assert summary["green lake"]["success_rate"] == 0.0
+
+
+def test_metrics_endpoint_stays_on_loopback_by_default():
+    metrics = RunMetrics()
+    metrics.record("Brown", "1", ok=True, fetch_s=0.5)
+    server = serve_metrics(metrics, 0)
+    try:
+        host, port = server.server_address[:2]
+        assert host == "127.0.0.1"
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as resp:
+            assert resp.read().decode() == prometheus_text(metrics)
+    finally:
+        server.shutdown()
+        server.server_close()
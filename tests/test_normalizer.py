@@ -0,0 +1,46 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from inveritax_scraper.config import CountyConfig
+from inveritax_scraper.normalizer import normalize_batch, normalize_raw
+
+FIXTURES = json.loads((Path(__file__).parent / "fixtures" / "fixtures.json").read_text())
+
+
+def _dump(rec):
+    return {k: v for k, v in rec.model_dump().items() if k != "scrape_timestamp_utc"}
+
+
+def test_batch_matches_per_record_on_fixtures():
+    items = [(key.split("::")[0], key.split("::")[1], raw, "http://x") for key, raw in FIXTURES.items()]
+    batch = normalize_batch(items)
+    assert [_dump(r) for r in batch] == [_dump(normalize_raw(*item)) for item in items]
+
+    brown = _dump(batch[0])
+    assert brown["delinquent_amount"] is None
+    assert brown["installments"] == []
+
+
+def test_alias_chain_keeps_or_semantics():
+    # an empty first alias falls through, and an all-falsy chain keeps the last value ("0" parses to 0.0)
+    rec = normalize_raw("C", "1", {"delinquent_amount": "", "delinquent": "$1,234.50", "status": " PAID ", "total_tax": 0}, None)
+    assert rec.delinquent_amount == 1234.5
+    assert rec.delinquent_status == "paid"
+    assert rec.current_year_total_tax == 0.0
+
+    rec = normalize_raw("C", "1", {"delinquent_years": "2019, 2020;2021", "installment_1": "10", "first_half_amount": None}, None)
+    assert rec.delinquent_tax_years == ["2019", "2020", "2021"]
+    assert [(i.label, i.amount) for i in rec.installments] == [("installment 1", 10.0)]
+
+
+def test_field_mapping_takes_precedence():
+    mapping = {"total_due": "delinquent_amount", "first_installment_amount": "installments"}
+    raw = {"total_due": "5.00", "delinquent_amount": "9.00", "first_installment_amount": "2.50"}
+    rec = normalize_raw("C", "1", raw, None, mapping)
+    assert rec.delinquent_amount == 5.0
+    assert [(i.label, i.amount) for i in rec.installments] == [("first installment amount", 2.5)]
+
+    with pytest.raises(ValueError):
+        CountyConfig(county="C", platform="x", base_url="http://x", field_mapping={"a": "nope"})
@@ -0,0 +1,296 @@
+import asyncio
+import re
+
+from lxml import html as lxml_html
+from lxml.cssselect import CSSSelector
+
+from inveritax_scraper import engines_playwright
+from inveritax_scraper.config import CountyConfig
+from inveritax_scraper.engines_playwright import CONTEXT_OPTIONS, AsyncPlaywrightEngine
+from inveritax_scraper.extraction import EXTRACT_JS, extract_html
+from inveritax_scraper.models import ParcelInput
+from inveritax_scraper.session_pool import SessionPool
+from inveritax_scraper.throttle import AdjustableLimiter
+
+SEARCH = "<html><body><input id='parcel'/><button id='go'>Search</button></body></html>"
+RESULTS = "<html><body><div id='results'><a class='details' href='/detail'>{parcel}</a></div></body></html>"
+DETAIL = (
+    "<html><body><span id='tax'>{tax}</span><span class='status'>Status: {status}</span>"
+    "<table id='inst'><tr><td>1st</td><td>$500.00</td></tr><tr><td>2nd</td><td>$500.00</td></tr></table></body></html>"
+)
+# parcel -> (tax, status); any other parcel gets an empty page
+PORTAL = {"1-100": ("$1,000.00", "Paid"), "1-200": ("$2,500.50", "Delinquent")}
+
+
+class PageTimeoutError(Exception):
+    # Playwright's TimeoutError, as far as failure classification can tell
+    pass
+
+
+class FakeElement:
+    def __init__(self, el):
+        self.el = el
+
+    async def inner_text(self):
+        return " ".join(self.el.text_content().split())
+
+    async def get_attribute(self, name):
+        return self.el.get(name)
+
+    async def query_selector(self, selector):
+        found = _query(self.el, selector)
+        return FakeElement(found[0]) if found else None
+
+    async def is_visible(self):
+        return True
+
+
+def _query(doc, selector):
+    # CSS through lxml, plus the one Playwright-only pseudo-class the configs use
+    m = re.fullmatch(r'(\w+):has-text\("([^"]*)"\)', selector)
+    if m:
+        return [el for el in doc.iter(m.group(1)) if m.group(2) in el.text_content()]
+    return CSSSelector(selector)(doc)
+
+
+class FakePage:
+    # a portal with a search form, a results grid and a detail page per parcel.
+    # fail_on: a selector whose click times out; fail_search: parcel number -> what searching it raises
+    def __init__(self, fail_on=None, fail_search=None):
+        self.fail_on = fail_on
+        self.fail_search = fail_search or {}
+        self.url = "about:blank"
+        self.query = ""
+        self.doc = lxml_html.fromstring(SEARCH)
+        self.evaluated = 0
+
+    def _show(self, url, document):
+        self.url = url
+        self.doc = lxml_html.fromstring(document)
+
+    def set_default_timeout(self, ms):
+        self.default_timeout = ms
+
+    async def goto(self, url, **_):
+        self._show(url, SEARCH)
+
+    async def wait_for_load_state(self, *_, **__):
+        return None
+
+    async def wait_for_function(self, *_, **__):
+        return None
+
+    async def wait_for_selector(self, selector, **_):
+        if not _query(self.doc, selector):
+            raise PageTimeoutError(f"Timeout waiting for {selector}")
+
+    async def query_selector(self, selector):
+        found = _query(self.doc, selector)
+        return FakeElement(found[0]) if found else None
+
+    async def query_selector_all(self, selector):
+        return [FakeElement(el) for el in _query(self.doc, selector)]
+
+    def locator(self, selector):
+        page = self
+
+        class Locator:
+            async def fill(self, value, **_):
+                page.query = value
+
+        return Locator()
+
+    async def click(self, selector, **_):
+        if selector == self.fail_on:
+            raise PageTimeoutError(f"Timeout 15000ms exceeded clicking {selector}")
+        if selector == "#go" and self.query in self.fail_search:
+            raise self.fail_search[self.query]
+        if selector == "#go":
+            self._show(f"http://brown.test/search?q={self.query}", RESULTS.format(parcel=self.query))
+        elif selector == "a.details":
+            tax, status = PORTAL.get(self.query, (None, None))
+            detail = DETAIL.format(tax=tax, status=status) if tax else "<html><body></body></html>"
+            self._show(f"http://brown.test/detail/{self.query}", detail)
+
+    async def evaluate(self, script, plan):
+        # EXTRACT_JS semantics: querySelector throws on selectors the browser can't parse
+        assert script == EXTRACT_JS
+        self.evaluated += 1
+        if self.fail_on == "evaluate":
+            raise PageTimeoutError("Timeout 30000ms exceeded")
+
+        def matches(root, rule):
+            if not rule.get("xpath"):
+                return CSSSelector(rule["selector"])(root)
+            hits = root.xpath(rule["xpath"])
+            return hits if isinstance(hits, list) else [str(hits)]
+
+        def pick(hit, attr):
+            if hit is None:
+                return None
+            if isinstance(hit, str):  # string results, text and attribute nodes
+                return hit.strip()
+            return hit.get(attr) if attr else " ".join(hit.text_content().split())
+
+        def first(root, rule):
+            return pick(next(iter(matches(root, rule)), None), rule.get("attr"))
+
+        data, fallback = {}, []
+        for rule in plan:
+            try:
+                if rule["kind"] == "one":
+                    data[rule["key"]] = first(self.doc, rule)
+                elif rule["kind"] == "all":
+                    data[rule["key"]] = [pick(hit, rule.get("attr")) for hit in matches(self.doc, rule)]
+                elif rule["kind"] == "table":
+                    data[rule["key"]] = [{c["key"]: first(row, c) for c in rule["columns"]} for row in CSSSelector(rule["rows"])(self.doc)]
+            except Exception:
+                fallback.append(rule["key"])
+        return {"data": data, "fallback": fallback}
+
+
+class FakeContext:
+    def __init__(self, page):
+        self.page = page
+        self.closed = False
+
+    async def route(self, *_):
+        return None
+
+    async def new_page(self):
+        return self.page
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    def __init__(self, fail_on=None, fail_search=None):
+        self.fail_on = fail_on
+        self.fail_search = fail_search
+        self.contexts = []
+
+    async def new_context(self, **_):
+        self.contexts.append(FakeContext(FakePage(self.fail_on, self.fail_search)))
+        return self.contexts[-1]
+
+
+CFG = CountyConfig(
+    county="Brown",
+    platform="GCS",
+    base_url="http://brown.test/search",
+    selectors={
+        "search_input_selector": "#parcel",
+        "search_button_selector": "#go",
+        "wait_for_selector": "#results",
+        "details_link_selector": "a.details",
+        "extract": {
+            "current_year_total_tax": "#tax",
+            "delinquent_status": 'span:has-text("Status")',
+            "installments": {"rows": "#inst tr", "columns": {"label": "td:nth-child(1)", "amount": "td:nth-child(2)"}},
+        },
+    },
+).model_dump()
+
+
+def _fetch_all(parcel_numbers, fail_on=None, engine=None):
+    engine = engine or AsyncPlaywrightEngine(min_free_mb=None)
+
+    async def scenario():
+        browser = FakeBrowser(fail_on)
+        engine._browser = browser
+        engine._contexts = AdjustableLimiter(4)
+        engine._pool = SessionPool(browser, setup=engine._setup_session, context_options=CONTEXT_OPTIONS)
+        results = []
+        for parcel_number in parcel_numbers:
+            parcel = ParcelInput(county="Brown", parcel_number=parcel_number)
+            results.append(await engine.fetch(base_url=CFG["base_url"], cfg=CFG, parcel=parcel))
+        return results, browser
+
+    return asyncio.run(scenario())
+
+
+def test_fetch_extracts_in_one_evaluation_with_a_fallback_for_playwright_selectors():
+    (first, second), browser = _fetch_all(["1-100", "1-200"])
+    assert first.ok and second.ok, (first.error, second.error)
+    assert first.data == {
+        "current_year_total_tax": "$1,000.00",
+        # :has-text isn't CSS, so this one came from the per-field path
+        "delinquent_status": "Status: Paid",
+        "installments": [{"label": "1st", "amount": "$500.00"}, {"label": "2nd", "amount": "$500.00"}],
+    }
+    assert second.data["current_year_total_tax"] == "$2,500.50" and second.source_url == "http://brown.test/detail/1-200"
+    assert [s[0] for s in second.spans] == ["return_to_search", "search", "results", "open_result", "extract"]
+    # one warm context served both parcels
+    assert len(browser.contexts) == 1 and browser.contexts[0].page.evaluated == 2
+
+
+def test_fetch_reports_parcels_the_portal_does_not_have():
+    (res,), _ = _fetch_all(["9-999"])
+    assert not res.ok and res.failure == "not_found" and res.step == "extract"
+
+
+def test_fetch_classifies_a_timed_out_step():
+    (res,), browser = _fetch_all(["1-100"], fail_on="#go")
+    assert not res.ok and res.failure == "transient" and res.step == "search"
+    assert "Timeout 15000ms" in res.error
+    # a timeout keeps the warm context for the retry
+    assert not browser.contexts[0].closed
+
+
+def test_resume_urls_age_out_when_no_retry_comes(monkeypatch):
+    monkeypatch.setattr(engines_playwright, "MAX_RESUME_URLS", 2)
+    engine = AsyncPlaywrightEngine(min_free_mb=None)
+    results, _ = _fetch_all(["1-100", "1-200", "1-300"], fail_on="evaluate", engine=engine)
+    assert all(r.failure == "transient" and r.step == "extract" for r in results)
+    # each reached its detail page, but only the most recent ones are kept for a retry
+    assert list(engine._resume) == [("brown", "1-200"), ("brown", "1-300")]
+    assert engine._resume[("brown", "1-300")] == "http://brown.test/detail/1-300"
+
+
+def test_browser_extraction_matches_http_extraction():
+    page_html = (
+        "<html><body><span id='tax'> $1,000.00 </span><span class='status'>Status: Paid</span><a id='lnk' href='/bill?id=1'>Bill</a>"
+        "<table id='inst'><tr><td>1st</td><td>$500.00</td></tr><tr><td>2nd</td><td>$500.00</td></tr></table></body></html>"
+    )
+    rules = {
+        "tax": "#tax",
+        "tax_css": {"css": "#tax"},
+        "status": {"xpath": "//span[@class='status']"},
+        "status_string": {"xpath": "string(//span[@class='status'])"},
+        "bill": {"xpath": "//a[@id='lnk']", "attr": "href"},
+        "bill_attr_node": {"xpath": "//a[@id='lnk']/@href"},
+        "amounts": {"xpath": "//table[@id='inst']//td[2]", "all": True},
+        "labels": {"css": "#inst td:nth-child(1)", "all": True},
+        "installments": {"rows": "#inst tr", "columns": {"label": {"xpath": "./td[1]"}, "amount": {"css": "td:nth-child(2)"}}},
+        "missing": {"xpath": "//span[@id='nope']"},
+    }
+    page = FakePage()
+    page._show("http://brown.test/detail/1-100", page_html)
+    browser = asyncio.run(AsyncPlaywrightEngine()._extract(page, rules))
+    assert browser == extract_html(page_html, rules)
+    assert browser["bill_attr_node"] == "/bill?id=1" and browser["installments"][0] == {"label": "1st", "amount": "$500.00"}
+
+
+def test_search_loop_keeps_its_context_through_a_timeout():
+    cfg = {**CFG, "selectors": {**CFG["selectors"], "search_loop": {"batch_size": 3}}}
+
+    def batch(fail_search):
+        async def scenario():
+            engine = AsyncPlaywrightEngine(min_free_mb=None)
+            browser = FakeBrowser(fail_search=fail_search)
+            engine._browser = browser
+            engine._contexts = AdjustableLimiter(4)
+            engine._pool = SessionPool(browser, setup=engine._setup_session, context_options=CONTEXT_OPTIONS)
+            parcels = [ParcelInput(county="Brown", parcel_number=n) for n in ("1-100", "1-150", "1-200")]
+            return await engine.fetch_batch(base_url=cfg["base_url"], cfg=cfg, parcels=parcels), browser
+
+        return asyncio.run(scenario())
+
+    results, browser = batch({"1-150": PageTimeoutError("Timeout 15000ms exceeded")})
+    assert [r.ok for r in results] == [True, False, True] and results[1].failure == "transient"
+    # one blip doesn't cost the county its warm context (guest login, popups)
+    assert len(browser.contexts) == 1 and not browser.contexts[0].closed
+
+    results, browser = batch({"1-150": RuntimeError("Target page, context or browser has been closed")})
+    assert results[1].failure != "transient" and browser.contexts[0].closed
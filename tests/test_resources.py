@@ -0,0 +1,20 @@
+from inveritax_scraper.resources import ResourceBlocker
+
+
+def test_default_policy_blocks_heavy_assets():
+    blocker = ResourceBlocker.from_cfg({})
+    assert blocker.should_block("image", "https://example.gov/logo.png")
+    assert blocker.should_block("script", "https://www.googletagmanager.com/gtm.js")
+    assert not blocker.should_block("document", "https://example.gov/Search.aspx")
+    assert not blocker.should_block("stylesheet", "https://example.gov/site.css")
+
+
+def test_allow_patterns_override_blocks():
+    blocker = ResourceBlocker.from_cfg({"resources": {"block_resources": ["image"], "allow_url_patterns": [r"/captcha/"]}})
+    assert not blocker.should_block("image", "https://example.gov/captcha/1.png")
+    assert blocker.should_block("image", "https://example.gov/map.png")
+
+
+def test_empty_policy_disables_interception():
+    blocker = ResourceBlocker.from_cfg({"resources": {"block_resources": [], "block_url_patterns": []}})
+    assert not blocker.active
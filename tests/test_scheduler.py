@@ -0,0 +1,73 @@
+import asyncio
+
+from inveritax_scraper.config import CountyConfig, CountyLimits
+from inveritax_scraper.engine import MockEngine
+from inveritax_scraper.models import ParcelInput
+from inveritax_scraper.orchestrator import run_scrape
+from inveritax_scraper.scheduler import CountyQueues
+
+
+def test_county_queues_interleave_by_priority_and_skip_full_counties():
+    async def scenario():
+        full = {"marathon"}
+        queues = CountyQueues(100, ready=lambda c: c not in full, priority=lambda c: {"dane": 1}.get(c, 0))
+        for county in ("brown", "marathon", "dane"):
+            for i in range(3):
+                await queues.put(county, i)
+        order = [(await queues.get())[0] for _ in range(6)]
+        full.clear()
+        order += [(await queues.get())[0] for _ in range(3)]
+        return order
+
+    assert asyncio.run(scenario()) == ["dane", "brown"] * 3 + ["marathon"] * 3
+
+
+def test_county_queues_bound_the_read_ahead():
+    async def scenario():
+        queues = CountyQueues(2)
+        await queues.put("brown", 1)
+        await queues.put("brown", 2)
+        blocked = asyncio.create_task(queues.put("brown", 3))
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+        # retries skip the bound
+        await queues.put("dane", 4, block=False)
+        assert len(queues) == 3
+        await queues.get()
+        await queues.get()
+        await asyncio.wait_for(blocked, 1)
+
+    asyncio.run(scenario())
+
+
+class CountingEngine(MockEngine):
+    def __init__(self):
+        super().__init__(fixtures={})
+        self.order = []
+        self.peak_tasks = 0
+
+    async def fetch(self, *, base_url, cfg, parcel):
+        self.order.append(parcel.county)
+        self.peak_tasks = max(self.peak_tasks, len(asyncio.all_tasks()))
+        await asyncio.sleep(0)
+        return await super().fetch(base_url=base_url, cfg=cfg, parcel=parcel)
+
+
+def test_run_scrape_keeps_a_fixed_pool_and_interleaves_counties():
+    counties = ("Brown", "Dane", "Marathon")
+    configs = {
+        c.lower(): CountyConfig(county=c, platform="GCS", base_url=f"http://{c.lower()}.test", limits=CountyLimits(adaptive=False))
+        for c in counties
+    }
+    parcels = [ParcelInput(county=c, parcel_number=str(i)) for c in counties for i in range(5_000)]
+    engine = CountingEngine()
+    recs = asyncio.run(run_scrape(parcels=parcels, county_configs=configs, engine=engine, max_concurrency=4))
+    assert len(recs) == len(parcels)
+    # workers + feeder + the run itself, not one task per parcel
+    assert engine.peak_tasks < 20
+
+    # input sorted by county, the worst case for a FIFO dispatcher
+    parcels = [ParcelInput(county=c, parcel_number=str(i)) for c in counties for i in range(100)]
+    engine = CountingEngine()
+    asyncio.run(run_scrape(parcels=parcels, county_configs=configs, engine=engine, max_concurrency=4))
+    assert engine.order[:6] == ["Brown", "Dane", "Marathon"] * 2
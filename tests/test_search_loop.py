@@ -0,0 +1,37 @@
+import asyncio
+
+from inveritax_scraper.config import CountyConfig
+from inveritax_scraper.engines_playwright import MockEngine
+from inveritax_scraper.models import ParcelInput
+from inveritax_scraper.orchestrator import run_scrape
+
+
+class BatchingEngine(MockEngine):
+    def __init__(self, fixtures):
+        super().__init__(fixtures=fixtures)
+        self.batches = []
+
+    def batch_size(self, cfg):
+        loop = cfg["selectors"].get("search_loop")
+        return loop["batch_size"] if loop else 0
+
+    async def fetch_batch(self, *, base_url, cfg, parcels):
+        self.batches.append([p.parcel_number for p in parcels])
+        return await super().fetch_batch(base_url=base_url, cfg=cfg, parcels=parcels)
+
+
+def test_search_loop_counties_are_fetched_in_batches():
+    configs = {
+        "brown": CountyConfig(county="Brown", platform="GCS", base_url="http://brown.test", selectors={"search_loop": {"batch_size": 2}}),
+        "green lake": CountyConfig(county="Green Lake", platform="LandNav", base_url="http://gl.test"),
+    }
+    fixtures = {f"brown::{n}": {"current_year_total_tax": n} for n in "123"}
+    fixtures["green lake::9"] = {"current_year_total_tax": "9"}
+    engine = BatchingEngine(fixtures)
+    parcels = [ParcelInput(county="Brown", parcel_number=n) for n in "123"] + [ParcelInput(county="Green Lake", parcel_number="9")]
+
+    records = asyncio.run(run_scrape(parcels=parcels, county_configs=configs, engine=engine))
+
+    assert sorted(engine.batches) == [["1", "2"], ["3"]]
+    assert sorted(r.parcel_number for r in records) == ["1", "2", "3", "9"]
+    assert all(not r.errors for r in records)
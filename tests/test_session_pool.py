@@ -0,0 +1,147 @@
+import asyncio
+
+import pytest
+
+from inveritax_scraper.engines_playwright import AsyncPlaywrightEngine
+from inveritax_scraper.session_pool import SessionPool
+
+
+class _Page:
+    def __init__(self, goto_error=None):
+        self.goto_error = goto_error
+
+    def set_default_timeout(self, ms):
+        pass
+
+    async def goto(self, url, **_):
+        raise self.goto_error
+
+
+class _Context:
+    def __init__(self, page):
+        self.page = page
+        self.closed = False
+
+    async def route(self, *_):
+        return None
+
+    async def new_page(self):
+        return self.page
+
+    async def close(self):
+        self.closed = True
+
+
+class _Browser:
+    def __init__(self, goto_error=None):
+        self.goto_error = goto_error
+        self.contexts = []
+
+    async def new_context(self, **_):
+        self.contexts.append(_Context(_Page(self.goto_error)))
+        return self.contexts[-1]
+
+
+def _pool(max_open=None):
+    setups = []
+
+    async def setup(session, cfg):
+        setups.append(cfg["county"])
+
+    return SessionPool(_Browser(), setup=setup, max_open=max_open), setups
+
+
+BROWN = {"county": "Brown", "session": {"max_uses": 2}}
+DANE = {"county": "Dane"}
+
+
+def test_released_sessions_are_reused_per_county():
+    async def scenario():
+        pool, setups = _pool()
+        first = await pool.acquire(BROWN)
+        await pool.release(first, BROWN, healthy=True)
+        again = await pool.acquire(BROWN)
+        other = await pool.acquire(DANE)
+        assert again is first and other is not first
+        assert setups == ["Brown", "Dane"] and (pool.open, pool.idle_count) == (2, 0)
+        await pool.release(other, DANE, healthy=True)
+        # a failed fetch never hands its context to the next parcel
+        await pool.release(again, BROWN, healthy=False)
+        assert first.context.closed and (pool.open, pool.idle_count, pool.recycled) == (1, 1, 1)
+
+    asyncio.run(scenario())
+
+
+def test_sessions_retire_after_max_uses():
+    async def scenario():
+        pool, setups = _pool()
+        session = await pool.acquire(BROWN)
+        await pool.release(session, BROWN, healthy=True)
+        assert await pool.acquire(BROWN) is session
+        await pool.release(session, BROWN, healthy=True)
+        assert session.uses == 2 and session.context.closed
+        fresh = await pool.acquire(BROWN)
+        assert fresh is not session and setups == ["Brown", "Brown"] and pool.created == 2
+
+    asyncio.run(scenario())
+
+
+def test_idle_contexts_count_against_the_cap():
+    async def scenario():
+        cap = [2]
+        pool, setups = _pool(max_open=lambda: cap[0])
+        brown = await pool.acquire(BROWN)
+        dane = await pool.acquire(DANE)
+        await pool.release(brown, BROWN, healthy=True)
+        await pool.release(dane, DANE, healthy=True)
+        # a third county takes the place of the longest-idle context
+        green = await pool.acquire({"county": "Green"})
+        assert brown.context.closed and not dane.context.closed
+        assert (pool.open, pool.idle_count, pool.evicted) == (2, 1, 1)
+        # the governor lowered the cap: a released context is closed instead of kept warm
+        cap[0] = 1
+        await pool.release(green, {"county": "Green"}, healthy=True)
+        assert green.context.closed and (pool.open, pool.idle_count) == (1, 1)
+
+    asyncio.run(scenario())
+
+
+def test_engine_setup_failure_closes_the_context():
+    async def scenario():
+        engine = AsyncPlaywrightEngine()
+        browser = _Browser(goto_error=RuntimeError("net::ERR_CONNECTION_REFUSED"))
+        pool = SessionPool(browser, setup=engine._setup_session)
+        with pytest.raises(RuntimeError):
+            await pool.acquire({"county": "Brown", "base_url": "http://brown.test", "selectors": {}})
+        return browser, pool
+
+    browser, pool = asyncio.run(scenario())
+    assert browser.contexts[0].closed and (pool.open, pool.created) == (0, 0)
+
+
+def test_close_drains_checked_out_sessions():
+    async def scenario():
+        pool, _ = _pool()
+        idle = await pool.acquire(BROWN)
+        busy = await pool.acquire(BROWN)
+        await pool.release(idle, BROWN, healthy=True)
+
+        closing = asyncio.create_task(pool.close())
+        await asyncio.sleep(0.01)
+        # idle contexts go at once; the one in use waits for its fetch
+        assert idle.context.closed and not busy.context.closed and not closing.done()
+        with pytest.raises(RuntimeError, match="closed"):
+            await pool.acquire(DANE)
+        await pool.release(busy, BROWN, healthy=True)
+        await asyncio.wait_for(closing, 1)
+        assert busy.context.closed and (pool.open, pool.idle_count) == (0, 0)
+
+        # a fetch that never comes back is closed after the grace period
+        pool, _ = _pool()
+        hung = await pool.acquire(DANE)
+        await pool.close(grace_s=0.01)
+        assert hung.context.closed and pool.open == 0
+        await pool.release(hung, DANE, healthy=True)
+        assert pool.open == 0
+
+    asyncio.run(scenario())
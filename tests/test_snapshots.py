@@ -0,0 +1,70 @@
+import asyncio
+import json
+
+from inveritax_scraper.config import CountyConfig, HttpRecipe
+from inveritax_scraper.engine import ScrapeEngine, ScrapeResult
+from inveritax_scraper.extraction import extract_html
+from inveritax_scraper.models import NormalizedTaxRecord, ParcelInput
+from inveritax_scraper.orchestrator import run_scrape
+from inveritax_scraper.snapshots import SnapshotStore, extract_snapshot, reextract
+
+PAGE = "<html><body><div id='bill'><span class='gross'>${tax}</span><span class='status'>{status}</span></div></body></html>"
+
+
+class PageEngine(ScrapeEngine):
+    # a portal that moved its tax amount: the configured selector no longer matches it
+    async def start(self):
+        return None
+
+    async def stop(self):
+        return None
+
+    async def fetch(self, *, base_url, cfg, parcel):
+        html = PAGE.format(tax="1,000.00" if parcel.parcel_number != "3" else "2,500.50", status="Paid")
+        data = extract_html(html, cfg["selectors"]["extract"])
+        return ScrapeResult(True, data=data, source_url=f"{base_url}/{parcel.parcel_number}", snapshot=html, snapshot_source="browser")
+
+
+def _config(tax_selector):
+    return CountyConfig(
+        county="Brown",
+        platform="GCS",
+        base_url="http://brown.test",
+        selectors={"extract": {"current_year_total_tax": tax_selector, "delinquent_status": "#bill .status"}},
+    )
+
+
+def test_reextract_applies_fixed_selectors_to_stored_pages(tmp_path):
+    store = SnapshotStore(tmp_path / "snapshots")
+    parcels = [ParcelInput(county="Brown", parcel_number=str(i)) for i in (1, 2, 3)]
+    recs = asyncio.run(run_scrape(parcels=parcels, county_configs={"brown": _config("#lblGrossTax")}, engine=PageEngine(), snapshots=store))
+    assert [r.current_year_total_tax for r in recs] == [None, None, None]
+    # parcels 1 and 2 got byte-identical pages: one object on disk
+    assert (store.saved, store.deduped) == (3, 1)
+    assert len(list((tmp_path / "snapshots" / "objects").rglob("*.gz"))) == 2
+
+    fixed = {"brown": _config("#bill .gross").model_dump()}
+    out = [NormalizedTaxRecord.model_validate_json(line) for line in reextract(store, fixed)]
+    assert {(r.parcel_number, r.current_year_total_tax, r.delinquent_status) for r in out} == {
+        ("1", 1000.0, "paid"),
+        ("2", 1000.0, "paid"),
+        ("3", 2500.5, "paid"),
+    }
+    assert all(r.scrape_timestamp_utc and r.source_url.startswith("http://brown.test/") for r in out)
+    # same records from a process pool
+    assert sorted(reextract(store, fixed, workers=2, chunk_size=1)) == sorted(r.model_dump_json() for r in out)
+
+    # rules that match nothing read as not found, like they would live
+    broken = {"brown": _config("#gone").model_dump()}
+    broken["brown"]["selectors"]["extract"]["delinquent_status"] = "#gone"
+    assert {r.failure_class for r in (NormalizedTaxRecord.model_validate_json(line) for line in reextract(store, broken))} == {"not_found"}
+    store.close()
+
+
+def test_extract_snapshot_runs_json_recipes():
+    recipe = HttpRecipe(format="json", steps=[{"url": "/api"}], extract={"current_year_total_tax": {"jsonpath": "$.taxes[0].total"}})
+    cfg = CountyConfig(county="Dane", platform="API", base_url="http://dane.test", http=recipe).model_dump()
+    data, error, _ = extract_snapshot(cfg, "http", json.dumps({"taxes": [{"total": "1,850.42"}]}))
+    assert (data, error) == ({"current_year_total_tax": "1,850.42"}, None)
+    _, error, failure = extract_snapshot(cfg, "http", json.dumps({"taxes": []}))
+    assert error.startswith("http recipe missing fields") and failure == "error"
@@ -0,0 +1,65 @@
+import asyncio
+
+from inveritax_scraper.config import CountyConfig
+from inveritax_scraper.engines_playwright import MockEngine
+from inveritax_scraper.models import ParcelInput
+from inveritax_scraper.orchestrator import run_scrape
+from inveritax_scraper.store import ResultStore
+
+
+class CountingEngine(MockEngine):
+    def __init__(self, fixtures):
+        super().__init__(fixtures=fixtures)
+        self.calls = 0
+
+    async def fetch(self, *, base_url, cfg, parcel):
+        self.calls += 1
+        return await super().fetch(base_url=base_url, cfg=cfg, parcel=parcel)
+
+
+CONFIGS = {"brown": CountyConfig(county="Brown", platform="GCS", base_url="http://brown.test")}
+FIXTURES = {"brown::1": {"current_year_total_tax": "10.00"}, "brown::2": {"current_year_total_tax": "20.00"}}
+
+
+def _scrape(parcels, engine, run):
+    return asyncio.run(run_scrape(parcels=parcels, county_configs=CONFIGS, engine=engine, store=run))
+
+
+def test_duplicate_parcels_are_fetched_once():
+    engine = CountingEngine(FIXTURES)
+    parcels = [ParcelInput(county="Brown", parcel_number="1"), ParcelInput(county="brown", parcel_number="1")]
+    records = _scrape(parcels, engine, None)
+    assert engine.calls == 1
+    assert len(records) == 1
+
+
+def test_resume_skips_finished_parcels_and_retries_failures(tmp_path):
+    store = ResultStore(tmp_path / "results.sqlite")
+    parcels = [ParcelInput(county="Brown", parcel_number=n) for n in ("1", "2", "3")]
+
+    first = CountingEngine(FIXTURES)
+    run = store.open_run("input.xlsx")
+    _scrape(parcels, first, run)  # interrupted: never finished, "3" failed
+
+    second = CountingEngine({**FIXTURES, "brown::3": {"current_year_total_tax": "30.00"}})
+    resumed = store.open_run("input.xlsx", resume=True)
+    assert resumed.run_id == run.run_id
+    records = _scrape(parcels, second, resumed)
+    assert second.calls == 1
+    assert sorted(r.current_year_total_tax for r in records) == [10.0, 20.0, 30.0]
+
+
+def test_ttl_reuses_results_across_runs(tmp_path):
+    store = ResultStore(tmp_path / "results.sqlite")
+    parcels = [ParcelInput(county="Brown", parcel_number="1")]
+    run = store.open_run("a.xlsx")
+    _scrape(parcels, CountingEngine(FIXTURES), run)
+    run.finish()
+
+    engine = CountingEngine(FIXTURES)
+    _scrape(parcels, engine, store.open_run("a.xlsx", resume=True, ttl_s=3600))
+    assert engine.calls == 0
+
+    engine = CountingEngine(FIXTURES)
+    _scrape(parcels, engine, store.open_run("a.xlsx"))
+    assert engine.calls == 1
@@ -0,0 +1,50 @@
+import asyncio
+import time
+
+from inveritax_scraper.throttle import AdjustableLimiter, AimdController, CountyThrottle, TokenBucket
+
+
+def test_aimd_backs_off_on_errors_and_ramps_on_healthy_latency():
+    async def scenario():
+        limiter = AdjustableLimiter(8)
+        aimd = AimdController(limiter, min_limit=1, max_limit=10, target_latency_s=1.0)
+        await aimd.record(False, 0.5)
+        assert limiter.limit == 4
+        # a second failure inside the cooldown window does not halve again
+        await aimd.record(False, 0.5)
+        assert limiter.limit == 4
+        for _ in range(4):
+            await aimd.record(True, 0.2)
+        assert limiter.limit == 5
+
+    asyncio.run(scenario())
+
+
+def test_county_throttle_caps_in_flight_fetches():
+    async def scenario():
+        throttle = CountyThrottle(max_concurrency=2, initial_concurrency=2, adaptive=False)
+        in_flight = peak = 0
+
+        async def fetch():
+            nonlocal in_flight, peak
+            async with throttle.slot():
+                in_flight += 1
+                peak = max(peak, in_flight)
+                await asyncio.sleep(0.01)
+                in_flight -= 1
+
+        await asyncio.gather(*(fetch() for _ in range(10)))
+        return peak
+
+    assert asyncio.run(scenario()) == 2
+
+
+def test_token_bucket_limits_rate():
+    async def scenario():
+        bucket = TokenBucket(rate=50, burst=1)
+        started = time.monotonic()
+        for _ in range(6):
+            await bucket.acquire()
+        return time.monotonic() - started
+
+    assert asyncio.run(scenario()) >= 0.09
@@ -0,0 +1,127 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+from pydantic import ValidationError
+
+from inveritax_scraper.config import CountyConfig
+from inveritax_scraper.waits import ANGULAR_STABLE_JS, Waiter
+
+
+class FakeTimeoutError(Exception):
+    # stands in for playwright.async_api.TimeoutError; the waiter matches timeouts by class name
+    pass
+
+
+class FakePage:
+    def __init__(self, fail=None):
+        self.calls = []
+        # call name -> exception it raises
+        self.fail = fail or {}
+
+    def _call(self, name, *args, **kwargs):
+        self.calls.append((name, *args, kwargs.get("timeout")))
+        if name in self.fail:
+            raise self.fail[name]
+
+    async def wait_for_load_state(self, state, *, timeout):
+        self._call("load_state", state, timeout=timeout)
+
+    async def wait_for_selector(self, selector, *, state, timeout):
+        self._call("selector", selector, state, timeout=timeout)
+
+    async def wait_for_function(self, js, *, timeout, polling):
+        self._call("function", js == ANGULAR_STABLE_JS, timeout=timeout)
+
+    @asynccontextmanager
+    async def expect_response(self, matcher, *, timeout):
+        self._call("expect_response", matcher(type("Response", (), {"url": "http://x.test/api/parcel?id=1"})), timeout=timeout)
+        yield
+        if "response_after" in self.fail:
+            raise self.fail["response_after"]
+
+
+def _run(waiter, point, action=None):
+    asyncio.run(waiter.run(point, action))
+
+
+def test_each_wait_type_calls_the_page():
+    page = FakePage()
+    waiter = Waiter(
+        page,
+        {
+            "after_goto": ["network_idle", "load", "domcontentloaded"],
+            "after_search": [{"type": "selector", "selector": "#results", "timeout_ms": 800}, "angular_stable", {"type": "sleep", "ms": 1}],
+        },
+        timeout_ms=1000,
+    )
+    _run(waiter, "after_goto")
+    _run(waiter, "after_search")
+    assert page.calls == [
+        ("load_state", "networkidle", 1000),
+        ("load_state", "load", 1000),
+        ("load_state", "domcontentloaded", 1000),
+        ("selector", "#results", "visible", 800),
+        ("function", True, 1000),
+    ]
+    assert set(waiter.take_timings()) == {"after_goto", "after_search"}
+
+
+def test_response_waits_are_armed_before_the_action():
+    page = FakePage()
+    waiter = Waiter(page, {"after_search": {"type": "response", "url": r"/api/parcel"}})
+
+    async def click():
+        page.calls.append(("click",))
+
+    _run(waiter, "after_search", click)
+    assert page.calls == [("expect_response", True, 5000), ("click",)]
+
+
+def test_timeouts_fall_through_and_other_errors_raise():
+    page = FakePage(fail={"load_state": FakeTimeoutError("Timeout 5000ms exceeded"), "response_after": FakeTimeoutError("no response")})
+    waiter = Waiter(page, {"after_goto": ["network_idle", {"type": "selector", "selector": "#form"}], "after_search": {"type": "response", "url": "x"}})
+    _run(waiter, "after_goto")
+    # the timed-out wait is skipped and the next one still runs
+    assert [c[0] for c in page.calls] == ["load_state", "selector"]
+
+    async def click():
+        return None
+
+    _run(waiter, "after_search", click)
+
+    page = FakePage(fail={"load_state": RuntimeError("Target page, context or browser has been closed")})
+    with pytest.raises(RuntimeError):
+        _run(Waiter(page), "after_goto")
+
+    # a failed action is never swallowed, timeout or not
+    async def broken_click():
+        raise FakeTimeoutError("click timed out")
+
+    with pytest.raises(FakeTimeoutError):
+        _run(Waiter(FakePage(), {"after_search": {"type": "response", "url": "x"}}), "after_search", broken_click)
+
+
+def _config(waits):
+    return CountyConfig(county="Brown", platform="GCS", base_url="http://brown.test", selectors={"waits": waits})
+
+
+@pytest.mark.parametrize(
+    "waits, message",
+    [
+        ({"after_search": "netwrok_idle"}, "unknown wait type 'netwrok_idle'"),
+        ({"after_search": [{"selector": "#results"}]}, "unknown wait type None"),
+        ({"after_serach": "network_idle"}, "unknown wait point 'after_serach'"),
+        ({"after_search": {"type": "response"}}, "needs `url`"),
+        ({"after_search": {"type": "selector"}}, "needs `selector`"),
+    ],
+)
+def test_config_rejects_bad_waits(waits, message):
+    with pytest.raises(ValidationError, match=message):
+        _config(waits)
+
+
+def test_waiter_rejects_unknown_types_at_runtime():
+    with pytest.raises(ValueError, match="Unknown wait type"):
+        _run(Waiter(FakePage(), {"after_goto": "netwrok_idle"}), "after_goto")
+    assert _config({"after_search": [{"type": "response", "url": "/api"}, "network_idle"]}).selectors["waits"]
@@ -0,0 +1,49 @@
+import json
+from pathlib import Path
+
+from inveritax_scraper.county_registry import load_county_configs
+from inveritax_scraper.models import ParcelInput
+from inveritax_scraper.workers import county_workers, run_sharded, shard_of, worker_budget
+
+
+ROOT = Path(__file__).parent.parent
+CONFIG_DIR = ROOT / "src" / "inveritax_scraper" / "county_configs"
+
+
+def test_shard_by_county_keeps_a_county_together():
+    a = ParcelInput(county="Brown", parcel_number="1")
+    b = ParcelInput(county="brown", parcel_number="2")
+    assert shard_of(a, 8, "county") == shard_of(b, 8, "county")
+    assert {shard_of(ParcelInput(county="Brown", parcel_number=str(i)), 4, "hash") for i in range(50)} == {0, 1, 2, 3}
+
+
+def test_sharded_run_returns_every_parcel_once():
+    spec = {
+        "workers": 2,
+        "shard_by": "hash",
+        "config_dir": str(CONFIG_DIR),
+        "input_path": str(ROOT / "test_sample.xlsx"),
+        "max_concurrency": 4,
+        "engine": {"mode": "mock", "fixtures_path": ROOT / "test_fixtures.json"},
+    }
+    summary = {}
+    records = [json.loads(line) for line in run_sharded(spec, summary=summary)]
+    assert sorted(r["parcel_number"] for r in records) == ["01-00023-010", "1-1360-1", "6000350000"]
+    assert sum(s["parcels"] for s in summary.values()) == 3
+
+
+def test_workers_share_the_global_cap():
+    configs = load_county_configs(CONFIG_DIR)
+    owners = county_workers((c.county for c in configs.values()), 8)
+
+    budgets = [worker_budget(configs, index=i, workers=8, shard_by="county", max_concurrency=30) for i in range(8)]
+    # each county keeps its whole `limits` in the worker that owns it
+    assert all(cfgs == configs for cfgs, _ in budgets)
+    # the owners split --max-concurrency between them instead of each taking all of it
+    assert sum(cap for i, (_, cap) in enumerate(budgets) if i in owners) <= 30
+    assert all(cap >= 30 // len(configs) for i, (_, cap) in enumerate(budgets) if i in owners)
+
+    # hash spreads every county over all workers; together they still reach the single-process limits
+    sliced, cap = worker_budget(configs, index=0, workers=8, shard_by="hash", max_concurrency=16)
+    assert 8 * cap >= 16
+    assert all(8 * sliced[k].limits.max_concurrency >= (c.limits.max_concurrency or 16) for k, c in configs.items())
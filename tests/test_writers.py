@@ -0,0 +1,58 @@
+import json
+
+import pytest
+
+from inveritax_scraper.models import Installment, NormalizedTaxRecord
+from inveritax_scraper.writers import ArrowWriter, JsonlWriter, jsonl_to_json
+
+
+def _records():
+    return [
+        NormalizedTaxRecord(county="Brown", parcel_number="1-1360-1", current_year_total_tax=3207.13, raw={"x": "1"}),
+        NormalizedTaxRecord(
+            county="Green Lake",
+            parcel_number="6000350000",
+            installments=[Installment(label="first half amount", amount=925.21)],
+            errors=["boom"],
+        ),
+    ]
+
+
+def test_jsonl_to_json_matches_pretty_dump(tmp_path):
+    jsonl = tmp_path / "out.jsonl"
+    with JsonlWriter(jsonl, flush_every=1) as writer:
+        for rec in _records():
+            writer.write(rec)
+
+    out = tmp_path / "out.json"
+    assert jsonl_to_json(jsonl, out) == 2
+    expected = json.dumps([r.model_dump() for r in _records()], indent=2, default=str)
+    assert out.read_text() == expected
+
+
+def test_arrow_writer_round_trips_typed_columns(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    recs = _records()
+    recs[0].scrape_timestamp_utc = "2024-05-01T12:00:00Z"
+    with ArrowWriter(tmp_path / "out.parquet", row_group_size=1) as writer:
+        writer.write(recs[0])
+        writer.write_line(recs[1].model_dump_json())
+    table = pq.read_table(tmp_path / "out.parquet")
+    assert table.num_rows == 2
+    assert table.schema.field("installments").type.value_type.field("amount").type == pa.float64()
+    rows = table.to_pylist()
+    assert rows[0]["current_year_total_tax"] == 3207.13
+    assert rows[0]["scrape_timestamp_utc"].year == 2024
+    assert json.loads(rows[0]["raw"]) == {"x": "1"}
+    assert rows[1]["installments"] == [{"label": "first half amount", "amount": 925.21, "due_date": None}]
+    assert rows[1]["errors"] == ["boom"]
+
+    with ArrowWriter(tmp_path / "out.arrow", fmt="arrow", include_raw=False) as writer:
+        for rec in recs:
+            writer.write(rec)
+    with pa.ipc.open_file(tmp_path / "out.arrow") as reader:
+        table = reader.read_all()
+    assert table.num_rows == 2
+    assert "raw" not in table.column_names